@@ -0,0 +1,38 @@
+import importlib
+
+
+# public names of the form { name : module }, submodules are only imported when a name is first accessed
+_EXPORTS = {
+    'ENGINE_VERSION': 'core',
+    'Simulation_core': 'core',
+    'multirate_error': 'core',
+    'Swarmalator': 'swarmalator',
+    'Swarm': 'swarm',
+    'Parallel_swarm': 'parallel',
+    'Dataset': 'dataset',
+    'Virtual_dataset': 'virtual',
+    'Preset': 'preset',
+    'Log_policy': 'log_policy',
+    'Profiler': 'profiling',
+    'Telemetry': 'telemetry',
+    'Compressed_trajectory': 'compression',
+    'Catalog': 'catalog',
+    'Results_store': 'store',
+    'Series_cache': 'cache',
+    'Analysis': 'analysis',
+    'Convergence_study': 'study',
+    'Simulation_run': 'simulation_run',
+    'Coordinator': 'distributed',
+    'Sweep_worker': 'distributed',
+    'Simulation': 'simulation',
+    'Replay': 'replay',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS: raise AttributeError(f'module {__name__} has no attribute {name}')
+    value = getattr(importlib.import_module(f'{__name__}.{_EXPORTS[name]}'), name)
+    globals()[name] = value
+    return value
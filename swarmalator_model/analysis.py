@@ -1,14 +1,27 @@
 from swarmalator_model.dataset import Dataset
+import os
+import pickle
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from swarmalator_model import helper_functions as hlp
+from swarmalator_model import metrics
+from swarmalator_model.cache import Series_cache
 
 
 class Analysis:
-    def __init__(self):
+    def __init__(self, cache: Series_cache=None):
         '''
         Instantiates an Analysis object.
+
+        Parameters
+        ----------
+        cache : Series_cache, optional
+            Cache of derived series. If `None`, a new cache is used that stores series on disk only next to dataset
+            files. default=`None`
         '''
         self.datasets = {}
+        self.series = {}
+        self.cache = cache if cache is not None else Series_cache()
 
     def add_dataset(self, dataset: Dataset, name: str):
         '''
@@ -26,39 +39,99 @@ class Analysis:
             return
         self.datasets[name] = dataset
 
+    def add_series(self, sources, names: list=None, catalog=None, workers: int=None, processes: bool=True, max_pending: int=None):
+        '''
+        Loads and reduces many datasets concurrently. Only the reduced series (average speed, order parameters) and
+        summary statistics are kept in the series dictionary, the datasets themselves are discarded.
+
+        Parameters
+        ----------
+        sources : list or str
+            List of .ssd filenames or Dataset_handle objects, or a query expression for the catalog.
+        names : list, optional
+            Names of the series to be used as keys. Dataset identifiers are used if `None`. default=`None`
+        catalog : Catalog, optional
+            Catalog used to resolve a query expression. default=`None`
+        workers : int, optional
+            Number of worker processes or threads. Uses the number of CPUs if `None`. default=`None`
+        processes : bool, optional
+            Whether to use a process pool instead of a thread pool. default=`True`
+        max_pending : int, optional
+            Maximum number of datasets loaded at the same time, which bounds memory usage. default=`2 * workers`
+        '''
+        if isinstance(sources, str):
+            if catalog is None:
+                print('A catalog is required for queries.')
+                return
+            sources = catalog.query(sources)
+
+        filenames = [s.filename if hasattr(s, 'filename') else s for s in sources]
+        if names is None:
+            names = [s.identifier if hasattr(s, 'identifier') else os.path.splitext(os.path.basename(s))[0] for s in sources]
+
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or 2 * workers
+        pool = ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+
+        with pool:
+            pending = {}
+            queue = list(zip(names, filenames))
+            while queue or pending:
+                # only keep a bounded number of datasets in flight
+                while queue and len(pending) < max_pending:
+                    name, filename = queue.pop(0)
+                    pending[pool.submit(_reduce_file, filename, self.cache.persistent)] = name
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done: self.series[pending.pop(f)] = f.result()
+
     def list_datasets(self):
         '''
-        Lists the names of all Dataset objects within the datasets dictionary.
+        Lists the names of all Dataset objects within the datasets dictionary and of all reduced series.
         '''  
         for d in self.datasets:
             print(d)
+        for s in self.series:
+            print(s)
 
-    def plot_avg_speed(self, dataset_names: list, save: bool = False):
+    def plot_avg_speed(self, dataset_names: list, save: bool = False, max_points: int=2000):
         '''
         Plots the average speed over all iterations of Dataset objects.
 
         Parameters
         ----------
         dataset_names : list
-            List of Dataset object names within the datasets dictionary.
+            List of Dataset object or reduced series names within the datasets and series dictionaries.
         save : bool, optional
             Whether to save to plot as .jpg. default=False
+        max_points : int, optional
+            Maximum number of points plotted per dataset. All points are plotted if `None`. default=`2000`
         '''
 
         data = {}
 
         for d in dataset_names:
+            if d in self.series:
+                s = self.series[d]
+                data[d] = [s['iterations'], s['avg_speed']]
+                continue
+
             if d not in self.datasets:
                 print(f'Dataset {d} not found.')
                 return
             
             ds = self.datasets[d]
-            pos, pha, vel = ds.prep_data()
-            y = np.average(np.linalg.norm(vel, axis=2), axis=1)
-            x = np.arange(1, len(y) + 1)
+            y = self.cache.get(ds, 'avg_speed')
+            x = self.cache.get(ds, 'iterations')
 
             data[d] = [x, y]
 
-        hlp.plot_lines(data=data, x_label='Iteration', y_label='Average Speed in Units/Timestep', title='Average Speed per Iteration', save=save)
+        hlp.plot_lines(data=data, x_label='Iteration', y_label='Average Speed in Units/Timestep', title='Average Speed per Iteration', save=save, max_points=max_points)
 
 
+def _reduce_file(filename: str, persistent: bool):
+    '''
+    Loads a dataset from an .ssd file and reduces it to series and summary statistics, reusing series from the on-disk cache.
+    '''
+    with open(filename, 'rb') as fp: dataset = pickle.load(fp)
+    dataset.filename = filename
+    return metrics.reduce_dataset(dataset, cache=Series_cache(max_items=8, persistent=persistent))
@@ -0,0 +1,117 @@
+import os
+import glob
+import uuid
+from collections import OrderedDict
+import numpy as np
+from swarmalator_model import metrics
+
+
+class Series_cache:
+    def __init__(self, max_items: int=256, directory: str=None, persistent: bool=True, mmap: bool=False):
+        '''
+        Instantiates a Series_cache object that memoizes derived series of datasets. Series are keyed by the content hash
+        of the dataset and the name and version of the series. Recently used series are kept in memory, all series are
+        stored on disk in a `.cache` directory next to the dataset file. Series of datasets that were not loaded from
+        a file are only stored on disk if a directory is given.
+
+        Parameters
+        ----------
+        max_items : int, optional
+            Maximum number of series kept in memory. default=`256`
+        directory : str, optional
+            Directory of the on-disk cache for datasets that were not loaded from a file. Their series are only kept in
+            memory if `None`. default=`None`
+        persistent : bool, optional
+            Whether to store series on disk. default=`True`
+        mmap : bool, optional
+            Whether series found on disk are memory-mapped read-only instead of loaded, e.g. for plotting long runs. default=`False`
+        '''
+        self.max_items = max_items
+        self.directory = directory
+        self.persistent = persistent
+        self.mmap = mmap
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset, name: str):
+        '''
+        Returns a derived series of a dataset, computing it only if it is neither in memory nor on disk.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Dataset object.
+        name : str
+            Name of the series as registered in `metrics.SERIES`.
+
+        Returns
+        ----------
+        series : np.ndarray
+            Derived series.
+        '''
+        function, version = metrics.SERIES[name]
+        key = f'{dataset.content_hash()}_{name}_v{version}'
+
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+
+        directory = self.__cache_directory(dataset)
+        path = os.path.join(directory, key + '.npy') if self.persistent and directory is not None else None
+        if path is not None and os.path.exists(path):
+            series = np.load(path, mmap_mode='r' if self.mmap else None)
+            self.hits += 1
+        else:
+            series = np.asarray(function(dataset))
+            self.misses += 1
+            if path is not None: self.__store(path, series)
+
+        self.items[key] = series
+        if len(self.items) > self.max_items: self.items.popitem(last=False)
+        return series
+
+    def clear(self, disk: bool=False):
+        '''
+        Clears the in-memory cache and optionally the on-disk cache of the default directory.
+
+        Parameters
+        ----------
+        disk : bool, optional
+            Whether to delete the on-disk cache as well. default=`False`
+        '''
+        self.items.clear()
+        if disk and self.directory is not None:
+            for f in glob.glob(os.path.join(self.directory, '.cache', '*.npy')):
+                try: os.remove(f)
+                except FileNotFoundError: pass
+
+    def __cache_directory(self, dataset):
+        '''
+        Returns the cache directory next to the file of a dataset, `None` if it has no file and no directory is set.
+        '''
+        filename = getattr(dataset, 'filename', None)
+        directory = os.path.dirname(filename) if filename else self.directory
+        return os.path.join(directory, '.cache') if directory is not None else None
+
+    def __store(self, path: str, series: np.ndarray):
+        '''
+        Stores a series on disk and removes entries of other versions of the same series. Several processes may store
+        series in the same directory at once, so the series is written to a temporary file that is moved into place
+        and readers never see a partially written file.
+        '''
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.basename(path).rsplit('_v', 1)[0]
+        for f in glob.glob(os.path.join(directory, glob.escape(prefix) + '_v*.npy')):
+            if os.path.basename(f) == os.path.basename(path): continue
+            try: os.remove(f)
+            except FileNotFoundError: pass # removed by another process
+
+        temporary = os.path.join(directory, f'{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temporary, 'wb') as fp: np.save(fp, series)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary): os.remove(temporary)
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import pickle
+import sqlite3
+from datetime import datetime
+from swarmalator_model import metrics
+
+
+PARAMETER_COLUMNS = {'n': 'INTEGER', 'i': 'TEXT', 'dt': 'REAL', 'cp': 'REAL', 'j': 'REAL', 'k': 'REAL', 'a': 'REAL', 'seed': 'INTEGER'}
+INFO_COLUMNS = {'sim_time': 'REAL', 'iterations': 'INTEGER', 'logged_iterations': 'INTEGER', 'file_size': 'INTEGER', 'created': 'TEXT'}
+SUMMARY_COLUMNS = {'final_speed': 'REAL', 'mean_speed': 'REAL', 'convergence_time': 'REAL', 's_plus': 'REAL', 's_minus': 'REAL', 'sync': 'REAL'}
+COLUMNS = {**PARAMETER_COLUMNS, **INFO_COLUMNS, **SUMMARY_COLUMNS}
+
+# tokens of filter expressions
+NUMBER = r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?'
+TOKEN = rf'\s*(==|!=|<=|>=|<|>|\(|\)|,|"[^"]*"|\'[^\']*\'|{NUMBER}|\w+)'
+
+
+class Catalog:
+    def __init__(self, directory: str='sim_data'):
+        '''
+        Instantiates a Catalog object, an SQLite index of the datasets stored in a directory.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory containing the .ssd files and the catalog. default=`sim_data`
+        '''
+        self.directory = directory
+        self.path = os.path.join(directory, 'catalog.sqlite')
+        if not os.path.exists(directory): os.makedirs(directory)
+
+        columns = ', '.join(f'{c} {t}' for c, t in COLUMNS.items())
+        with self.__connect() as con:
+            con.execute(f'CREATE TABLE IF NOT EXISTS runs (identifier TEXT PRIMARY KEY, filename TEXT, parameters TEXT, {columns})')
+            for c in PARAMETER_COLUMNS: con.execute(f'CREATE INDEX IF NOT EXISTS idx_{c} ON runs ({c})')
+
+    def __connect(self):
+        return sqlite3.connect(self.path)
+
+    def add(self, dataset, filename: str):
+        '''
+        Adds a Dataset object to the catalog or updates its entry.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Dataset object that was saved.
+        filename : str
+            Name of the .ssd file containing the dataset.
+        '''
+        iterations = dataset.get_iterations()
+        row = {c: dataset.parameters.get(c) for c in PARAMETER_COLUMNS}
+        row.update({
+            'sim_time': dataset.sim_time,
+            'iterations': round(dataset.sim_time / dataset.parameters['dt']),
+            'logged_iterations': len(iterations),
+            'file_size': os.path.getsize(filename) if os.path.exists(filename) else None,
+            'created': datetime.now().isoformat(timespec='seconds')})
+        row.update(metrics.summarize(dataset))
+        row.update({'identifier': dataset.identifier, 'filename': filename, 'parameters': json.dumps(dataset.parameters)})
+
+        names = list(row.keys())
+        with self.__connect() as con:
+            con.execute(
+                f'INSERT OR REPLACE INTO runs ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+                [row[c] for c in names])
+
+    def rebuild(self):
+        '''
+        Indexes all .ssd files in the directory that are not in the catalog yet.
+        '''
+        with self.__connect() as con: known = {r[0] for r in con.execute('SELECT filename FROM runs')}
+        for f in sorted(os.listdir(self.directory)):
+            filename = os.path.join(self.directory, f)
+            if not f.endswith('.ssd') or filename in known: continue
+            with open(filename, 'rb') as fp: dataset = pickle.load(fp)
+            if not hasattr(dataset, 'parameters'):
+                print(f'Dataset {f} outdated.')
+                continue
+            self.add(dataset, filename)
+
+    def query(self, expression: str=None, order_by: str=None):
+        '''
+        Selects datasets by their parameters and summary statistics without loading them.
+
+        Parameters
+        ----------
+        expression : str, optional
+            Filter expression using column names, numbers, quoted strings, comparison operators,
+            `and`, `or`, `not`, `in (...)` and parentheses, e.g. `cp == 0.1 and j == 1.0 and a in (0, 0.5)`.
+            All datasets are returned if `None`. default=`None`
+        order_by : str, optional
+            Column to sort the results by. default=`None`
+
+        Returns
+        ----------
+        handles : list
+            List of Dataset_handle objects.
+        '''
+        sql = 'SELECT * FROM runs'
+        args = []
+        if expression:
+            where, args = _to_sql(expression)
+            sql += f' WHERE {where}'
+        if order_by is not None:
+            if order_by not in COLUMNS and order_by != 'identifier': raise ValueError(f'Unknown column {order_by}.')
+            sql += f' ORDER BY {order_by}'
+
+        with self.__connect() as con:
+            con.row_factory = sqlite3.Row
+            return [Dataset_handle(dict(r)) for r in con.execute(sql, args)]
+
+
+class Dataset_handle:
+    def __init__(self, row: dict):
+        '''
+        Instantiates a lazy handle to a dataset in the catalog. The dataset is only loaded when calling `load`.
+
+        Parameters
+        ----------
+        row : dict
+            Catalog entry of the dataset.
+        '''
+        self.identifier = row['identifier']
+        self.filename = row['filename']
+        self.parameters = json.loads(row['parameters'])
+        self.info = {c: row[c] for c in INFO_COLUMNS}
+        self.stats = {c: row[c] for c in SUMMARY_COLUMNS}
+
+    def __repr__(self):
+        return f'Dataset_handle({self.identifier})'
+
+    def load(self):
+        '''
+        Loads the dataset from its .ssd file.
+
+        Returns
+        ----------
+        dataset : Dataset
+            Dataset object.
+        '''
+        with open(self.filename, 'rb') as fp: dataset = pickle.load(fp)
+        dataset.filename = self.filename
+        return dataset
+
+
+def _to_sql(expression: str):
+    '''
+    Translates a filter expression into an SQL WHERE clause with parameters.
+    '''
+    sql = []
+    args = []
+    for t in _tokenize(expression):
+        low = t.lower()
+        if t in COLUMNS or t == 'identifier': sql.append(t)
+        elif low in ('and', 'or', 'not', 'in'): sql.append(low.upper())
+        elif t == '==': sql.append('=')
+        elif t in ('!=', '<', '<=', '>', '>=', '(', ')', ','): sql.append(t)
+        elif t[0] in '"\'':
+            sql.append('?')
+            args.append(t[1:-1])
+        elif re.fullmatch(NUMBER, t):
+            sql.append('?')
+            args.append(_number(t))
+        else: raise ValueError(f'Unknown column {t}.')
+    return ' '.join(sql), args
+
+def _tokenize(expression: str):
+    '''
+    Splits a filter expression into tokens.
+    '''
+    tokens = re.findall(TOKEN, expression)
+    if ''.join(tokens).replace(' ', '') != re.sub(r'\s+', '', expression): raise ValueError(f'Invalid expression: {expression}')
+    return tokens
+
+def _number(token: str):
+    return float(token) if any(ch in token for ch in '.eE') else int(token)
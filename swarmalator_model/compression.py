@@ -0,0 +1,123 @@
+import zlib
+import lzma
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Compressed_trajectory:
+    def __init__(self, data: np.ndarray, error_bound: float=1e-4, coding: str='delta', chunk_size: int=256, compressor: str='zlib', period: float=None):
+        '''
+        Instantiates a compressed trajectory. Values are quantized to fixed-point integers with a maximum absolute error,
+        delta coded along the time axis and compressed in chunks of iterations that can be decoded independently.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            Trajectory of shape (iterations, ...).
+        error_bound : float, optional
+            Maximum absolute error of decoded values. default=`1e-4`
+        coding : {'delta', 'delta2', 'none'}, optional
+            Coding along the time axis. default=`delta`
+            `delta`: differences between consecutive iterations.
+            `delta2`: differences of differences, suited for smooth motion.
+            `none`: quantized values only.
+        chunk_size : int, optional
+            Number of iterations per chunk. default=`256`
+        compressor : {'zlib', 'lzma', 'zstd'}, optional
+            General-purpose compressor applied to each chunk. `zstd` requires the zstandard package. default=`zlib`
+        period : float, optional
+            Period of periodic values such as phases. Values are unwrapped before and wrapped after coding. default=`None`
+        '''
+        if compressor == 'zstd' and zstandard is None:
+            print('zstandard not installed, using zlib.')
+            compressor = 'zlib'
+
+        data = np.asarray(data, dtype=np.float64)
+        self.shape = data.shape
+        self.step = 2.0 * error_bound
+        self.coding = coding
+        self.chunk_size = chunk_size
+        self.compressor = compressor
+        self.period = period
+        self.chunks = []
+
+        if period is not None: data = np.unwrap(data, axis=0, period=period)
+        for start in range(0, len(data), chunk_size):
+            q = np.round(data[start:start + chunk_size] / self.step).astype(np.int64)
+            self.chunks.append(self.__encode(q))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        '''
+        Decodes the iterations selected by an index or slice. Only chunks containing these iterations are decoded.
+        '''
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step < 0: return self[:][key]
+            if start >= stop: return np.zeros((0,) + self.shape[1:])
+            first, last = start // self.chunk_size, (stop - 1) // self.chunk_size
+            data = np.concatenate([self.__decode(c) for c in range(first, last + 1)])
+            offset = first * self.chunk_size
+            return data[start - offset:stop - offset:step]
+
+        key = int(key)
+        if key < 0: key += len(self)
+        if key < 0 or key >= len(self): raise IndexError('iteration out of range')
+        return self.__decode(key // self.chunk_size)[key % self.chunk_size]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype)
+
+    @property
+    def nbytes(self):
+        '''
+        Number of bytes of the compressed chunks.
+        '''
+        return sum(len(c[1]) for c in self.chunks)
+
+    def __encode(self, q: np.ndarray):
+        '''
+        Delta codes, packs and compresses a chunk of quantized values.
+        '''
+        for _ in range({'none': 0, 'delta': 1, 'delta2': 2}[self.coding]):
+            q[1:] = np.diff(q, axis=0)
+
+        # use the smallest integer type and shuffle bytes so that equal byte planes are compressed together
+        bound = max(abs(int(q.min(initial=0))), abs(int(q.max(initial=0))))
+        dtype = next(t for t in (np.int8, np.int16, np.int32, np.int64) if bound <= np.iinfo(t).max)
+        raw = q.astype(dtype)
+        shuffled = raw.view(np.uint8).reshape(-1, raw.itemsize).T.tobytes()
+        return (np.dtype(dtype).str, self.__compress(shuffled), raw.shape)
+
+    def __decode(self, c: int):
+        '''
+        Decompresses and decodes a chunk.
+        '''
+        dtype, payload, shape = self.chunks[c]
+        itemsize = np.dtype(dtype).itemsize
+        shuffled = np.frombuffer(self.__decompress(payload), dtype=np.uint8)
+        q = shuffled.reshape(itemsize, -1).T.copy().view(dtype).reshape(shape).astype(np.int64)
+
+        for _ in range({'none': 0, 'delta': 1, 'delta2': 2}[self.coding]):
+            q = np.cumsum(q, axis=0)
+
+        data = q * self.step
+        if self.period is not None: data = np.mod(data + self.period / 2.0, self.period) - self.period / 2.0
+        return data
+
+    def __compress(self, raw: bytes):
+        if self.compressor == 'lzma': return lzma.compress(raw, preset=1)
+        if self.compressor == 'zstd': return zstandard.ZstdCompressor(level=3).compress(raw)
+        return zlib.compress(raw, 1)
+
+    def __decompress(self, payload: bytes):
+        if self.compressor == 'lzma': return lzma.decompress(payload)
+        if self.compressor == 'zstd': return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
@@ -0,0 +1,470 @@
+import numpy as np
+from swarmalator_model import helper_functions as hlp
+from swarmalator_model import metrics
+from swarmalator_model.swarmalator import Swarmalator
+from swarmalator_model.swarm import Swarm, initial_arrays, arrays_from_state
+from swarmalator_model.dataset import Dataset
+from swarmalator_model.log_policy import Log_policy
+
+
+# version of the simulation engine, increased whenever a change alters the trajectories of seeded runs
+ENGINE_VERSION = 3
+
+
+class Simulation_core:
+    def __init__(self, num_swarmalators: int=100,
+        memory_init: str='random',
+        time_step: float=0.1,
+        coupling_probability: float=0.1,
+        J: float=0.1,
+        K: float=1.0,
+        alpha: float=0,
+        logging: bool=False,
+        use_phasors: bool=False,
+        engine: str='agents',
+        memory_budget: int=2**24,
+        num_workers: int=1,
+        compression: dict=None,
+        log_policy: Log_policy=None,
+        seed: int=None,
+        initial_state=None,
+        initial_index: int=-1,
+        communication: str='probabilistic',
+        messages: int=1,
+        sampling: str='uniform',
+        monitor: str=None,
+        monitor_every: int=1,
+        multirate: int=1,
+        quiescence_threshold: float=1e-3,
+        telemetry=None,
+        run_id: str=None,
+        track_age: bool=False):
+        '''
+        Instantiates a headless swarmalator-simulation that owns the population, steps it and logs and saves its
+        trajectories. It only depends on NumPy and is used by the GUI and by headless runs.
+
+        Parameters
+        ----------
+        num_swarmalators : int, optional
+            Number of swarmalators in the simulation. default=`100`
+        memory_init : {'random', 'zeroes', 'gradual'}, optional
+            Method of swarmalator memory initialization. default=`random`
+        time_step : float, optional
+            Time step of an iteration in seconds. default=`0.1`
+        coupling_probability : float, optional
+            Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration. default=`0.1`
+        J : float, optional
+            Phase attraction strength. default=`0.1`
+        K : float, optional
+            Phase coupling strength. default=`1.0`
+        alpha : float, optional
+            Momentum factor. Must be between 0 and 1. default=`0`
+        logging : bool, optional
+            Logs the fields selected by the log policy for later analysis. default=`False`
+        use_phasors : bool, optional
+            If true, swarmalators keep phases as unit phasors to avoid per-pair trigonometry. default=`False`
+        engine : {'agents', 'swarm'}, optional
+            Simulation engine. default=`agents`
+        memory_budget : int, optional
+            Maximum number of bytes used for temporary arrays of the `swarm` engine. default=`2**24`
+        num_workers : int, optional
+            Number of worker processes of the `swarm` engine. Each worker draws from its own random stream derived from
+            the seed, so seeded trajectories are only reproduced with the same number of workers. default=`1`
+        compression : dict, optional
+            Keyword arguments of `Dataset.compress` used to compress saved trajectories. default=`None`
+        log_policy : Log_policy, optional
+            Policy deciding which iterations, fields and swarmalators are logged. default=`None`
+        seed : int, optional
+            Seed of the random number generators used to initialize and run the swarmalators. default=`None`
+        initial_state : Dataset, np.ndarray or dict, optional
+            State the simulation starts from instead of initializing the memories with `memory_init`. default=`None`
+            `Dataset`: the logged iteration `initial_index` of a stored run, which all swarmalators start with in their memory.
+            `np.ndarray`: positions and phases of shape (n, 3) or memories of all swarmalators of shape (n, n, 3).
+            `dict`: dictionary of the form { 'memory' : np.ndarray, 'velocities' : np.ndarray }.
+            The number of swarmalators is taken from the state. Velocities are random if not given.
+        initial_index : int, optional
+            Index of the logged iteration used if `initial_state` is a Dataset. default=`-1`
+        communication : {'probabilistic', 'budget'}, optional
+            Communication model. default=`probabilistic`
+            `probabilistic`: each swarmalator receives the state of every other swarmalator with the coupling probability.
+            `budget`: each swarmalator receives at most `messages` states per step.
+        messages : int, optional
+            Number of messages a swarmalator receives per step in the `budget` model. default=`1`
+        sampling : {'uniform', 'proximity', 'age'}, optional
+            How senders are chosen in the `budget` model, see `Swarm`. default=`uniform`
+        monitor : str, optional
+            Name of a shared memory block the latest state is published to, which a Monitor_reader or Monitor_view can attach to. default=`None`
+        monitor_every : int, optional
+            Only every n-th iteration is published. default=`1`
+        multirate : int, optional
+            If greater than 1, quiescent swarmalators only think and move every `multirate` steps with a scaled time
+            step, see `Swarm`. Use `multirate_error` to measure the error against full-rate stepping. Not available with
+            more than one worker. default=`1`
+        quiescence_threshold : float, optional
+            Speed and phase change below which a swarmalator is considered quiescent. default=`1e-3`
+        telemetry : Telemetry, optional
+            Telemetry object the progress of the simulation is reported to. default=`None`
+        run_id : str, optional
+            Name of the simulation in the telemetry. default=`None`
+        track_age : bool, optional
+            If true, the age of the memory entries and the error of remembered against true states are summarized with
+            `metrics.information_age` every iteration and stored with the dataset. Costs about as much as a scan per
+            iteration. default=`False`
+        '''
+        self.num_swarmalators = num_swarmalators
+        self.memory_init = memory_init
+        self.time_step = time_step
+        self.coupling_probability = coupling_probability
+        self.J = J
+        self.K = K
+        self.alpha = alpha
+        self.logging = logging
+        self.use_phasors = use_phasors
+        self.engine = engine
+        self.memory_budget = memory_budget
+        self.num_workers = num_workers
+        self.compression = compression
+        self.log_policy = log_policy if log_policy is not None else Log_policy()
+        self.seed = seed
+        self.initial_state = initial_state
+        self.initial_index = initial_index
+        self.communication = {'communication': communication, 'messages': messages, 'sampling': sampling}
+        self.multirate = {'multirate': multirate, 'quiescence_threshold': quiescence_threshold}
+        if multirate > 1 and engine == 'swarm' and num_workers > 1: raise ValueError('Multi-rate stepping is not available with more than one worker.')
+        self.monitor = monitor
+        self.monitor_every = monitor_every
+        self.publisher = None
+        self.telemetry = telemetry
+        self.run_id = run_id if run_id is not None else f'run-{id(self):x}'
+        self.track_age = track_age
+
+        self.list_of_swarmalators = []
+        self.swarm = None
+        self.memory = None
+        self.velocities = None
+        self.memories = None
+        self.ages = None
+
+        self.reset()
+
+    def reset(self):
+        '''
+        Creates a new population and clears the logs.
+        '''
+        self.close()
+        self.iteration = 1
+        self.simulation_time = 0.0
+        self.field_log = {}
+        self.log_iterations = []
+        self.age_log = {}
+        self.__init_swarmalators()
+        self.__init_positions_phases()
+        if self.monitor is not None:
+            from swarmalator_model.monitor import Monitor_publisher # shared memory is only imported when needed
+            self.publisher = Monitor_publisher(self.monitor, self.num_swarmalators, every=self.monitor_every)
+
+    def step(self, profiler=None):
+        '''
+        Makes each swarmalator perform one step of syncing and moving and logs the result.
+
+        Parameters
+        ----------
+        profiler : Profiler, optional
+            Profiler of the current step. default=`None`
+        '''
+        if self.swarm is not None: self.swarm.step(self.time_step, self.J, self.K, self.coupling_probability, self.alpha, profiler)
+        else:
+            for s in self.list_of_swarmalators: s.run(self.memory, self.velocities, self.time_step, self.J, self.K, self.coupling_probability, self.alpha, profiler)
+        self.simulation_time += self.time_step
+
+        if self.track_age:
+            if profiler is not None: profiler.start('age')
+            self.__log_age()
+            if profiler is not None: profiler.stop('age')
+
+        if self.logging:
+            if profiler is not None: profiler.start('log')
+            self.__log()
+            if profiler is not None: profiler.stop('log')
+
+        if self.publisher is not None:
+            if profiler is not None: profiler.start('monitor')
+            self.publisher.publish(self.iteration, self.simulation_time, self.memory, self.velocities)
+            if profiler is not None: profiler.stop('monitor')
+
+        self.iteration += 1
+        if self.telemetry is not None: self.telemetry.update(self.run_id, self.iteration - 1, self.simulation_time)
+
+    def run(self, max_simulation_time: float, profiler=None):
+        '''
+        Steps the simulation until the simulation time is reached.
+
+        Parameters
+        ----------
+        max_simulation_time : float
+            Time in s after which the simulation is stopped.
+        profiler : Profiler, optional
+            Profiler measuring the sampled steps. default=`None`
+        '''
+        if self.telemetry is not None: self.telemetry.start(self.run_id, max_simulation_time, profiler)
+        while self.simulation_time < max_simulation_time:
+            if profiler is None:
+                self.step()
+                continue
+            profiler.start_step(self.iteration)
+            self.step(profiler if profiler.active else None)
+            profiler.end_step()
+        if self.telemetry is not None: self.telemetry.finish(self.run_id)
+
+    def parameters(self):
+        '''
+        Returns the parameters of the simulation.
+
+        Returns
+        ----------
+        parameters : dict
+            Dictionary of parameters as used in presets and datasets.
+        '''
+        parameters = {
+            'n' : self.num_swarmalators,
+            'i' : self.memory_init,
+            'dt' : self.time_step,
+            'cp' : self.coupling_probability,
+            'j' : self.J,
+            'k' : self.K,
+            'a' : self.alpha,
+            'seed' : self.seed
+        }
+        if self.communication['communication'] == 'budget':
+            parameters['messages'] = self.communication['messages']
+            parameters['sampling'] = self.communication['sampling']
+        if self.engine == 'swarm' and min(self.num_workers, self.num_swarmalators) > 1:
+            parameters['num_workers'] = min(self.num_workers, self.num_swarmalators)
+        if self.multirate['multirate'] > 1:
+            parameters['multirate'] = self.multirate['multirate']
+            parameters['quiescence_threshold'] = self.multirate['quiescence_threshold']
+        if self.initial_state is not None:
+            parameters['i'] = 'warm'
+            if hasattr(self.initial_state, 'identifier'): parameters['warm_start'] = f'{self.initial_state.identifier}[{self.initial_index}]'
+        return parameters
+
+    def to_dataset(self):
+        '''
+        Creates a Dataset object of the logged trajectories.
+
+        Returns
+        ----------
+        dataset : Dataset
+            Dataset object.
+        '''
+        data = [self.field_log, None, round(self.simulation_time, 2), self.parameters()]
+        age = {name: np.array(values) for name, values in self.age_log.items()} if self.age_log else None
+        dataset = Dataset(data, self.log_policy.schedule(self.log_iterations), age)
+        if self.compression is not None: dataset.compress(**self.compression)
+        return dataset
+
+    def save_data(self, directory: str='sim_data'):
+        '''
+        Saves the logged trajectories to a Dataset file.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory the dataset is saved to. default=`sim_data`
+
+        Returns
+        ----------
+        dataset : Dataset
+            Saved Dataset object.
+        '''
+        dataset = self.to_dataset()
+        dataset.save_to_file(directory)
+        return dataset
+
+    def checkpoint(self):
+        '''
+        Returns a copy of the complete state of the simulation including the state of the random number generator,
+        so that stepping on from a restored checkpoint reproduces the original trajectory exactly. Requires the
+        `swarm` engine with one worker.
+
+        Returns
+        ----------
+        checkpoint : dict
+            Dictionary containing the iteration, simulation time, state arrays and random number generator state.
+        '''
+        if self.swarm is None or hasattr(self.swarm, 'close'): raise ValueError('Checkpoints require the swarm engine with one worker.')
+        return {
+            'iteration': self.iteration,
+            'simulation_time': self.simulation_time,
+            'arrays': {name: array.copy() for name, array in self.swarm.state_arrays().items()},
+            'rng': self.swarm.rng.bit_generator.state}
+
+    def restore(self, checkpoint: dict):
+        '''
+        Restores a state returned by `checkpoint`. The logs are not changed.
+
+        Parameters
+        ----------
+        checkpoint : dict
+            Checkpoint of a simulation with the same parameters.
+        '''
+        if self.swarm is None or hasattr(self.swarm, 'close'): raise ValueError('Checkpoints require the swarm engine with one worker.')
+        for name, array in checkpoint['arrays'].items(): np.copyto(getattr(self.swarm, name), array)
+        self.swarm.rng.bit_generator.state = checkpoint['rng']
+        self.iteration = checkpoint['iteration']
+        self.simulation_time = checkpoint['simulation_time']
+
+    def updates(self):
+        '''
+        Returns the number of swarmalator updates (think and move) made so far, which is the number of swarmalators
+        times the number of steps unless multi-rate stepping is used.
+
+        Returns
+        ----------
+        updates : int
+            Number of updates.
+        '''
+        if self.swarm is not None: return getattr(self.swarm, 'updates', self.num_swarmalators * (self.iteration - 1))
+        return sum(s.updates for s in self.list_of_swarmalators)
+
+    def close(self):
+        '''
+        Releases the worker processes and shared memory of a parallel swarm and of the monitor.
+        '''
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+        if self.swarm is not None and hasattr(self.swarm, 'close'):
+            # keep a copy of the last state, since shared memory is released
+            self.memory = self.memory.copy()
+            self.velocities = self.velocities.copy()
+            self.memories = self.ages = None
+            self.swarm.close()
+        self.swarm = None
+
+    def __init_swarmalators(self):
+        '''
+        Creates the swarmalator population.
+        '''
+        self.list_of_swarmalators = []
+        arrays = self.__initial_arrays()
+        if self.engine == 'swarm':
+            if self.num_workers > 1:
+                from swarmalator_model.parallel import Parallel_swarm # multiprocessing is only imported when needed
+                self.swarm = Parallel_swarm(self.num_swarmalators, self.memory_init, self.num_workers, self.use_phasors, self.memory_budget, self.seed, arrays, **self.communication, track_age=self.track_age)
+            else: self.swarm = Swarm(self.num_swarmalators, self.memory_init, self.use_phasors, self.memory_budget, self.seed, arrays, **self.communication, **self.multirate, track_age=self.track_age)
+            swarm = getattr(self.swarm, 'swarm', self.swarm)
+            self.memories = swarm.memory
+            self.ages = swarm.ages
+            return
+
+        # memories of all swarmalators are created in bulk and each swarmalator works on its row
+        if arrays is None: arrays = initial_arrays(self.num_swarmalators, self.memory_init, np.random.default_rng(self.seed))
+        self.memories = arrays['memory']
+        self.ages = np.zeros((self.num_swarmalators, self.num_swarmalators)) if self.track_age else None
+        seeds = np.random.SeedSequence(self.seed).spawn(self.num_swarmalators)
+        for n in range(self.num_swarmalators):
+            ages = self.ages[n] if self.ages is not None else None
+            self.list_of_swarmalators.append(Swarmalator(n, self.num_swarmalators, self.memory_init, self.use_phasors, arrays['memory'][n], arrays['velocities'][n], ages, **self.communication, **self.multirate, seed=seeds[n]))
+
+    def __initial_arrays(self):
+        '''
+        Creates the state arrays of the initial state. Returns `None` if the memories are initialized with `memory_init`.
+        '''
+        if self.initial_state is None: return None
+
+        velocities = None
+        if isinstance(self.initial_state, dict):
+            memory = self.initial_state['memory']
+            velocities = self.initial_state.get('velocities')
+        elif hasattr(self.initial_state, 'get_state'): memory, velocities = self.initial_state.get_state(self.initial_index)
+        else: memory = self.initial_state
+
+        arrays = arrays_from_state(memory, velocities, np.random.default_rng(self.seed), self.use_phasors)
+        self.num_swarmalators = len(arrays['memory'])
+        return arrays
+
+    def __init_positions_phases(self):
+        '''
+        Initializes the environment memory with swarmalator positons, phases and velocities.
+        '''
+        if self.swarm is not None:
+            self.memory = self.swarm.env_memory
+            self.velocities = self.swarm.env_velocities
+            return
+
+        self.memory = np.zeros((self.num_swarmalators, 3))
+        self.velocities = np.zeros((self.num_swarmalators, 2))
+
+        for i, s in enumerate(self.list_of_swarmalators):
+            self.memory[i] = s.memory[i]
+            self.velocities[i] = s.velocity
+
+    def __log(self):
+        '''
+        Stores the fields selected by the log policy to seperate lists for later analysis.
+        '''
+        if not self.log_policy.should_log(self.iteration): return
+        for field, values in self.log_policy.record(self.memory, self.velocities).items():
+            self.field_log.setdefault(field, []).append(values)
+        self.log_iterations.append(self.iteration)
+
+    def __log_age(self):
+        '''
+        Stores the age of information statistics of the current iteration.
+        '''
+        statistics = metrics.information_age(self.ages, self.memories, self.memory, self.memory_budget)
+        self.age_log.setdefault('iterations', []).append(self.iteration)
+        for name, value in statistics.items(): self.age_log.setdefault(name, []).append(value)
+
+
+def multirate_error(max_simulation_time: float, multirate: int=4, quiescence_threshold: float=1e-3, **kwargs):
+    '''
+    Runs a simulation at full rate and with multi-rate stepping from the same seed and reports the error of the
+    multi-rate run and the fraction of swarmalator updates it saved.
+
+    Parameters
+    ----------
+    max_simulation_time : float
+        Time in s after which the simulations are stopped.
+    multirate : int, optional
+        Update period of quiescent swarmalators. default=`4`
+    quiescence_threshold : float, optional
+        Speed and phase change below which a swarmalator is considered quiescent. default=`1e-3`
+    **kwargs
+        Further arguments of `Simulation_core`. A random seed is used if none is given.
+
+    Returns
+    ----------
+    report : dict
+        Dictionary containing the iterations, the per-iteration RMS position error, mean absolute phase error and
+        absolute errors of the average speed and phase synchronization, their maxima and the fraction of saved updates.
+    '''
+    kwargs.setdefault('seed', int(np.random.randint(2**31 - 1)))
+    kwargs.pop('multirate', None)
+    kwargs.pop('quiescence_threshold', None)
+
+    runs = []
+    for m in (1, multirate):
+        core = Simulation_core(multirate=m, quiescence_threshold=quiescence_threshold, **kwargs)
+        states = []
+        while core.simulation_time < max_simulation_time:
+            core.step()
+            states.append((core.memory.copy(), core.velocities.copy()))
+        runs.append((states, core.updates()))
+        core.close()
+
+    (full, full_updates), (multi, multi_updates) = runs
+    memory = np.array([m for m, _ in full]), np.array([m for m, _ in multi])
+    speed = [np.linalg.norm(np.array([v for _, v in r]), axis=2).mean(axis=1) for r in (full, multi)]
+    sync = [np.abs(np.mean(np.exp(1j * m[:, :, 2]), axis=1)) for m in memory]
+
+    report = {
+        'iterations': np.arange(1, len(full) + 1),
+        'position_error': np.sqrt(np.mean(np.sum((memory[1][:, :, :2] - memory[0][:, :, :2]) ** 2, axis=2), axis=1)),
+        'phase_error': np.mean(np.abs(hlp.wrap_phase(memory[1][:, :, 2] - memory[0][:, :, 2])), axis=1),
+        'speed_error': np.abs(speed[1] - speed[0]),
+        'sync_error': np.abs(sync[1] - sync[0])}
+    for key in ['position_error', 'phase_error', 'speed_error', 'sync_error']: report['max_' + key] = float(report[key].max(initial=0.0))
+    report['saved_updates'] = 1.0 - multi_updates / full_updates if full_updates > 0 else 0.0
+    return report
@@ -1,53 +1,125 @@
 import pickle
 import os
+import hashlib
 from sqlite3 import Time
+import math
+import uuid
 import numpy as np
 from datetime import datetime
+from swarmalator_model.compression import Compressed_trajectory
+from swarmalator_model.catalog import Catalog
 
 
 class Dataset():
-    def __init__(self, data: list):
+    def __init__(self, data: list, schedule: dict=None, age: dict=None):
         '''
         Instantiates a Dataset object.
 
         Parameters
         ----------
         data : list
-            List of data to be loaded into the Dataset object.
+            List of data to be loaded into the Dataset object of the form [memory_log, velocity_log, sim_time, parameters].
+            The memory log may also be a dictionary of field logs of the form { field : list } as recorded by a Log_policy object.
+            In this case the velocity log is ignored.
+        schedule : dict, optional
+            Sampling schedule as returned by `Log_policy.schedule`. If `None`, every iteration is assumed to be logged. default=`None`
+        age : dict, optional
+            Age of information statistics per iteration of the form { name : np.ndarray } as recorded by a Simulation_core
+            object with `track_age`. default=`None`
         '''
         if len(data) != 4:
             print('Dataset outdated')
             return
-        self.positions = np.array(data[0])[:, :, :2].tolist()
-        self.phases =  np.array(data[0])[:, :, 2].tolist()
-        self.velocities = data[1]
+        if isinstance(data[0], dict):
+            fields = data[0]
+            self.positions = np.array(fields['positions']).tolist() if 'positions' in fields else None
+            self.phases = np.array(fields['phases']).tolist() if 'phases' in fields else None
+            self.velocities = fields.get('velocities')
+            self.speeds = fields.get('speeds')
+        else:
+            self.positions = np.array(data[0])[:, :, :2].tolist()
+            self.phases =  np.array(data[0])[:, :, 2].tolist()
+            self.velocities = data[1]
+            self.speeds = None
         self.sim_time = data[2]
         self.parameters = data[3]
-        self.identifier = '_'.join([
-            str(self.parameters['n']),
-            self.parameters['i'],
-            str(self.parameters['dt']),
-            str(self.parameters['cp']),
-            str(self.parameters['j']),
-            str(self.parameters['k']),
-            str(self.parameters['a']),
-            str(datetime.now().strftime('%Y%m%d%H%M%S'))])
-
-    def save_to_file(self):
+        self.schedule = schedule
+        self.age = age
+        self.identifier = _identifier(self.parameters)
+
+    def save_to_file(self, directory: str='sim_data', catalog: bool=True):
         '''
         Saves the Dataset object to a binary file using pickle.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory the file is saved to. default=`sim_data`
+        catalog : bool, optional
+            Whether to add the dataset and its summary statistics to the catalog of the directory. default=`True`
         '''
-        if not os.path.exists('sim_data\\'): os.makedirs('sim_data\\')
-        filename = 'sim_data\\' + self.identifier + '.ssd'
+        if not os.path.exists(directory): os.makedirs(directory)
+        filename = os.path.join(directory, self.identifier + '.ssd')
+        self.content_hash()
+        self.filename = filename
         with open(filename, 'wb') as fp:
             pickle.dump(self, fp)
+        if catalog: Catalog(directory).add(self, filename)
     
+    def content_hash(self):
+        '''
+        Returns a hash of the parameters and logged data that identifies the Dataset object. The hash is computed once
+        and stored with the object.
+
+        Returns
+        ----------
+        hash : str
+            Hexadecimal hash.
+        '''
+        if getattr(self, 'hash', None) is not None: return self.hash
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((sorted(self.parameters.items()), self.sim_time, getattr(self, 'schedule', None))).encode())
+        for field in ['positions', 'phases', 'velocities', 'speeds']:
+            values = getattr(self, field, None)
+            h.update(field.encode())
+            if values is None: continue
+            if isinstance(values, Compressed_trajectory):
+                for chunk in values.chunks: h.update(chunk[1])
+            else: h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        self.hash = h.hexdigest()
+        return self.hash
+
+    def compress(self, error_bound: float=1e-4, coding: str='delta', chunk_size: int=256, compressor: str='zlib'):
+        '''
+        Replaces positions, phases and velocities with compressed trajectories that are decoded lazily when accessed.
+
+        Parameters
+        ----------
+        error_bound : float, optional
+            Maximum absolute error of decoded values. default=`1e-4`
+        coding : {'delta', 'delta2', 'none'}, optional
+            Coding along the time axis. default=`delta`
+        chunk_size : int, optional
+            Number of iterations per independently decodable chunk. default=`256`
+        compressor : {'zlib', 'lzma', 'zstd'}, optional
+            General-purpose compressor applied to each chunk. default=`zlib`
+        '''
+        self.content_hash()
+        for field in ['positions', 'phases', 'velocities', 'speeds']:
+            values = getattr(self, field, None)
+            if values is None or isinstance(values, Compressed_trajectory): continue
+            period = 2.0 * math.pi if field == 'phases' else None
+            setattr(self, field, Compressed_trajectory(values, error_bound, coding, chunk_size, compressor, period))
+
     def summary(self):
         '''
         Prints information about the Dataset object.
         '''
-        print(f'Number of swarmalators: {len(self.positions[0])}')
-        print(f'Simulation iterations: {len(self.positions)}')
+        logged = self.__logged_field()
+        print(f'Number of swarmalators: {len(logged[0])}')
+        print(f'Simulation iterations: {round(self.sim_time / self.parameters["dt"])}')
+        print(f'Logged iterations: {len(logged)}')
         print(f'Simulation time: {self.sim_time}s')
         print(f'Time step: {self.parameters["dt"]}s')
         print(f'J: {self.parameters["j"]}')
@@ -55,10 +127,111 @@ class Dataset():
         print(f'Coupling probabiltity: {self.parameters["cp"]}')
         print(f'alpha: {self.parameters["a"]}')
     
-    def prep_data(self):
+    def export_arrays(self, directory: str, chunk_size: int=256):
+        '''
+        Writes the logged positions and phases, velocities and iterations to .npy files that can be memory-mapped.
+        Data is converted in chunks of iterations, so compressed datasets are never decoded completely.
+
+        Parameters
+        ----------
+        directory : str
+            Directory the files are written to.
+        chunk_size : int, optional
+            Number of iterations converted at once. default=`256`
+        '''
+        if self.positions is None or self.phases is None:
+            print('Positions and phases are required.')
+            return
+        if not os.path.exists(directory): os.makedirs(directory)
+
+        iterations = self.get_iterations()
+        shape = (len(iterations), len(self.positions[0]))
+        memory = np.lib.format.open_memmap(os.path.join(directory, 'memory.npy'), mode='w+', dtype=np.float64, shape=shape + (3,))
+        velocities = None
+        if self.velocities is not None:
+            velocities = np.lib.format.open_memmap(os.path.join(directory, 'velocities.npy'), mode='w+', dtype=np.float64, shape=shape + (2,))
+
+        for start in range(0, shape[0], chunk_size):
+            window = slice(start, start + chunk_size)
+            memory[window, :, :2] = np.array(self.positions[window])
+            memory[window, :, 2] = np.array(self.phases[window])
+            if velocities is not None: velocities[window] = np.array(self.velocities[window])
+
+        memory.flush()
+        if velocities is not None: velocities.flush()
+        np.save(os.path.join(directory, 'iterations.npy'), iterations)
+        with open(os.path.join(directory, 'parameters.pkl'), 'wb') as fp: pickle.dump(self.parameters, fp)
+
+    def get_state(self, index: int=-1):
+        '''
+        Returns the state of all swarmalators at a logged iteration, e.g. to start a new simulation from it.
+
+        Parameters
+        ----------
+        index : int, optional
+            Index of the logged iteration. default=`-1`
+
+        Returns
+        ----------
+        memory : np.ndarray
+            Positions and phases of shape (n, 3).
+        velocities : np.ndarray
+            Velocities of shape (n, 2). `None` if velocities were not logged.
+        '''
+        if self.positions is None or self.phases is None: raise ValueError('Positions and phases are required.')
+        memory = np.column_stack([np.asarray(self.positions[index]), np.asarray(self.phases[index])])
+        if len(memory) != self.parameters['n']: raise ValueError('The state of all swarmalators is required, but only some were logged.')
+        velocities = np.array(self.velocities[index]) if self.velocities is not None else None
+        return memory, velocities
+
+    def get_iterations(self):
+        '''
+        Returns the iterations at which data was logged.
+
+        Returns
+        ----------
+        iterations : np.ndarray
+            Numpy array of logged iterations starting at 1.
+        '''
+        schedule = getattr(self, 'schedule', None)
+        if schedule is not None: return np.array(schedule['iterations'])
+        logged = self.__logged_field()
+        return np.arange(1, len(logged) + 1)
+
+    def __logged_field(self):
+        '''
+        Returns the first field that was logged.
+        '''
+        return next(f for f in [self.positions, self.phases, self.velocities, getattr(self, 'speeds', None)] if f is not None)
+
+    def get_speeds(self, window: slice=None):
+        '''
+        Returns the speeds of the logged swarmalators, either logged directly or computed from velocities.
+
+        Parameters
+        ----------
+        window : slice, optional
+            Logged iterations to be returned. default=`None`
+
+        Returns
+        ----------
+        speeds : np.ndarray
+            Numpy array of speeds of shape (iterations, n)
+        '''
+        if window is None: window = slice(None)
+        speeds = getattr(self, 'speeds', None)
+        if speeds is not None: return np.array(speeds[window])
+        return np.linalg.norm(np.array(self.velocities[window]), axis=2)
+
+    def prep_data(self, window: slice=None):
         '''
         Converts data into numpy arrays for analysis.
 
+        Parameters
+        ----------
+        window : slice, optional
+            Iterations to be converted. Compressed datasets only decode the chunks within the window. default=`None`
+
         Retruns
         ----------
         positions : np.ndarray
@@ -68,7 +241,22 @@ class Dataset():
         velocities : np.ndarray
             Numpy array with swarmalator velocities of shape (n, 2)
         '''
-        positions = np.array(self.positions)
-        phases = np.array(self.phases)
-        velocities = np.array(self.velocities)
+        if window is None: window = slice(None)
+        positions = np.array(self.positions[window]) if self.positions is not None else None
+        phases = np.array(self.phases[window]) if self.phases is not None else None
+        velocities = np.array(self.velocities[window]) if self.velocities is not None else None
         return positions, phases, velocities
+
+
+def _identifier(parameters: dict):
+    # the random suffix keeps runs with equal parameters that finish in the same second apart
+    return '_'.join([
+        str(parameters['n']),
+        parameters['i'],
+        str(parameters['dt']),
+        str(parameters['cp']),
+        str(parameters['j']),
+        str(parameters['k']),
+        str(parameters['a']),
+        str(datetime.now().strftime('%Y%m%d%H%M%S')),
+        uuid.uuid4().hex[:8]])
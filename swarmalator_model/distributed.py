@@ -0,0 +1,410 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import socketserver
+from collections import deque
+import numpy as np
+from swarmalator_model.core import Simulation_core
+from swarmalator_model import metrics
+from swarmalator_model.store import SERIES_COLUMNS
+from swarmalator_model.profiling import Profiler
+from swarmalator_model.telemetry import phase_means, memory_usage
+
+
+# arguments of Simulation_core taken from a preset of the form { preset key : argument }
+PRESET_ARGUMENTS = {'n': 'num_swarmalators', 'i': 'memory_init', 'dt': 'time_step', 'cp': 'coupling_probability', 'j': 'J', 'k': 'K', 'a': 'alpha'}
+
+
+class Coordinator:
+    def __init__(self, presets: list, sim_time: float, store, replicas: int=1, seed: int=None, options: dict=None,
+        host: str='127.0.0.1',
+        port: int=0,
+        lease_timeout: float=30.0,
+        max_attempts: int=3,
+        telemetry=None):
+        '''
+        Instantiates a Coordinator object that serves the jobs of a sweep (preset and seed) to Sweep_worker processes
+        on any number of hosts over TCP. Messages are JSON lines. Workers send heartbeats while running a job, jobs
+        whose lease runs out without a heartbeat are queued again, and the reduced results uploaded by the workers
+        are appended to a Results_store. No shared filesystem is required.
+
+        Parameters
+        ----------
+        presets : list
+            List of Preset objects or parameter dictionaries.
+        sim_time : float
+            Time in s each simulation runs for.
+        store : Results_store or str
+            Results store or its directory the results are appended to.
+        replicas : int, optional
+            Number of runs per preset with different seeds. default=`1`
+        seed : int, optional
+            Seed used to derive the seeds of runs whose preset has no seed. default=`None`
+        options : dict, optional
+            Further arguments of Simulation_core used for all runs, e.g. `{'engine': 'swarm'}`. default=`None`
+        host : str, optional
+            Address the coordinator listens on. Use `0.0.0.0` to accept workers from other hosts. default=`127.0.0.1`
+        port : int, optional
+            Port the coordinator listens on. A free port is chosen if `0`. default=`0`
+        lease_timeout : float, optional
+            Time in s after the last heartbeat after which a job is considered lost and queued again. default=`30.0`
+        max_attempts : int, optional
+            Number of times a job is leased before it is marked as failed. default=`3`
+        telemetry : Telemetry, optional
+            Telemetry object the progress reported by the workers is passed on to. default=`None`
+        '''
+        if isinstance(store, str):
+            from swarmalator_model.store import Results_store
+            store = Results_store(store)
+        self.store = store
+        self.sim_time = sim_time
+        self.options = options if options is not None else {}
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+
+        rng = np.random.default_rng(seed)
+        self.jobs = {}
+        for p in presets:
+            parameters = p.dict if hasattr(p, 'dict') else p
+            for r in range(replicas):
+                seed = parameters.get('seed') if replicas == 1 and parameters.get('seed') is not None else int(rng.integers(2**31 - 1))
+                self.jobs[len(self.jobs)] = {'preset': parameters, 'seed': seed, 'status': 'queued', 'attempts': 0, 'worker': None, 'deadline': None, 'progress': {}}
+        self.queue = deque(self.jobs)
+        self.telemetry = telemetry
+        if self.telemetry is not None: self.telemetry.enqueue(len(self.jobs))
+        self.workers = {}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.__check_finished()
+
+        self.server = socketserver.ThreadingTCPServer((host, port), _Handler, bind_and_activate=True)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        self.address = self.server.server_address
+        self.thread = None
+
+    def start(self):
+        '''
+        Starts serving jobs in a background thread.
+
+        Returns
+        ----------
+        address : tuple
+            Host and port the coordinator listens on.
+        '''
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True)
+        self.thread.start()
+        threading.Thread(target=self.__watch, daemon=True).start()
+        return self.address
+
+    def wait(self, timeout: float=None):
+        '''
+        Waits until all jobs are done or failed.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time to wait in s. Waits indefinitely if `None`. default=`None`
+
+        Returns
+        ----------
+        finished : bool
+            Whether all jobs are done or failed.
+        '''
+        return self.finished.wait(timeout)
+
+    def status(self):
+        '''
+        Returns the number of jobs per status and the jobs that are running.
+
+        Returns
+        ----------
+        status : dict
+            Dictionary containing the number of queued, leased, done and failed jobs, the running jobs with their
+            worker and progress, and the last time each worker was seen.
+        '''
+        with self.lock:
+            status = {s: sum(j['status'] == s for j in self.jobs.values()) for s in ['queued', 'leased', 'done', 'failed']}
+            status['running'] = {i: {'worker': j['worker'], 'seed': j['seed'], 'preset': j['preset'], **j['progress']} for i, j in self.jobs.items() if j['status'] == 'leased'}
+            status['workers'] = dict(self.workers)
+        return status
+
+    def close(self):
+        '''
+        Stops the server. Workers asking for jobs afterwards stop once they cannot reach the coordinator.
+        '''
+        # shutdown waits for a running serve_forever loop, which does not exist if the coordinator was never started
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server.server_close()
+
+    def handle(self, message: dict):
+        '''
+        Handles one message of a worker and returns the reply.
+
+        Parameters
+        ----------
+        message : dict
+            Message of the form { 'type' : 'request' | 'heartbeat' | 'result', 'worker' : str, ... }.
+
+        Returns
+        ----------
+        reply : dict
+            Reply to the worker.
+        '''
+        with self.lock:
+            self.workers[message.get('worker')] = time.time()
+            self.__expire()
+            kind = message.get('type')
+
+            if kind == 'request':
+                if not self.queue:
+                    if all(j['status'] in ('done', 'failed') for j in self.jobs.values()): return {'type': 'done'}
+                    return {'type': 'wait', 'delay': min(1.0, self.lease_timeout / 4.0)}
+                i = self.queue.popleft()
+                job = self.jobs[i]
+                job.update({'status': 'leased', 'worker': message.get('worker'), 'deadline': time.monotonic() + self.lease_timeout, 'progress': {}})
+                job['attempts'] += 1
+                if self.telemetry is not None: self.telemetry.start(f'job-{i}', self.sim_time)
+                return {'type': 'job', 'job': i, 'preset': job['preset'], 'seed': job['seed'], 'sim_time': self.sim_time,
+                        'options': self.options, 'heartbeat': self.lease_timeout / 3.0}
+
+            job = self.jobs.get(message.get('job'))
+            if job is None: return {'type': 'error', 'reason': 'unknown job'}
+            leased = job['status'] == 'leased' and job['worker'] == message.get('worker')
+
+            if kind == 'heartbeat':
+                if not leased: return {'type': 'cancel'}
+                job['deadline'] = time.monotonic() + self.lease_timeout
+                job['progress'] = message.get('progress', {})
+                if self.telemetry is not None:
+                    p = job['progress']
+                    self.telemetry.update(f'job-{message["job"]}', p.get('iteration', 0), p.get('simulation_time', 0.0), phases=p.get('phases'), memory=p.get('memory'))
+                return {'type': 'ok'}
+
+            if kind == 'result':
+                # a result of a job that was queued again is still accepted if no other worker finished it, results of
+                # jobs that already failed are dropped, so they are counted once
+                if job['status'] in ('done', 'failed'): return {'type': 'ok'}
+                if job['status'] == 'queued':
+                    self.queue.remove(message['job'])
+                    if self.telemetry is not None: self.telemetry.start(f'job-{message["job"]}')
+                self.store.append([_from_json(message['reduced'])])
+                if self.telemetry is not None: self.telemetry.finish(f'job-{message["job"]}')
+                job.update({'status': 'done', 'worker': message.get('worker'), 'deadline': None})
+                self.__check_finished()
+                return {'type': 'ok'}
+
+            return {'type': 'error', 'reason': f'unknown message type {kind}'}
+
+    def __watch(self):
+        '''
+        Periodically queues jobs again whose lease ran out, even if no worker is connected.
+        '''
+        while not self.finished.is_set():
+            with self.lock: self.__expire()
+            self.finished.wait(min(1.0, self.lease_timeout / 4.0))
+
+    def __expire(self):
+        now = time.monotonic()
+        for i, job in self.jobs.items():
+            if job['status'] != 'leased' or job['deadline'] > now: continue
+            job.update({'status': 'queued' if job['attempts'] < self.max_attempts else 'failed', 'worker': None, 'deadline': None})
+            if job['status'] == 'queued': self.queue.append(i)
+            if self.telemetry is None: continue
+            if job['status'] == 'queued': self.telemetry.requeue(f'job-{i}')
+            else: self.telemetry.finish(f'job-{i}', completed=False)
+        self.__check_finished()
+
+    def __check_finished(self):
+        if all(j['status'] in ('done', 'failed') for j in self.jobs.values()): self.finished.set()
+
+
+class Sweep_worker:
+    def __init__(self, host: str, port: int, name: str=None, retry_timeout: float=60.0):
+        '''
+        Instantiates a Sweep_worker object that runs the jobs of a Coordinator headless until the sweep is done.
+
+        Parameters
+        ----------
+        host : str
+            Address of the coordinator.
+        port : int
+            Port of the coordinator.
+        name : str, optional
+            Name of the worker. Host name and process id if `None`. default=`None`
+        retry_timeout : float, optional
+            Time in s the worker keeps trying to reach an unreachable coordinator before it stops. default=`60.0`
+        '''
+        self.name = name if name is not None else f'{socket.gethostname()}-{os.getpid()}'
+        self.connection = _Connection((host, port))
+        self.retry_timeout = retry_timeout
+        self.completed = 0
+        self.core = None
+
+    def run(self):
+        '''
+        Requests and runs jobs until the coordinator has no jobs left or cannot be reached.
+
+        Returns
+        ----------
+        completed : int
+            Number of jobs completed by this worker.
+        '''
+        while True:
+            reply = self.__call({'type': 'request'})
+            if reply is None or reply['type'] == 'done': return self.completed
+            if reply['type'] == 'wait':
+                time.sleep(reply['delay'])
+                continue
+            if reply['type'] == 'job': self.__run_job(reply)
+
+    def __run_job(self, job: dict):
+        '''
+        Runs one job while a background thread sends heartbeats, and uploads its reduced result.
+        '''
+        arguments = {PRESET_ARGUMENTS[k]: v for k, v in job['preset'].items() if k in PRESET_ARGUMENTS}
+        self.core = Simulation_core(**{**arguments, **job['options'], 'seed': job['seed'], 'logging': True})
+        profiler = Profiler(sample_every=10, window=100)
+        cancelled = threading.Event()
+        stopped = threading.Event()
+
+        def heartbeat():
+            while not stopped.wait(job['heartbeat']):
+                progress = {
+                    'iteration': self.core.iteration - 1, 'simulation_time': self.core.simulation_time, 'sim_time': job['sim_time'],
+                    'phases': phase_means(profiler), 'memory': memory_usage()}
+                reply = self.__call({'type': 'heartbeat', 'job': job['job'], 'progress': progress}, retry=False)
+                if reply is not None and reply['type'] == 'cancel': cancelled.set()
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            while self.core.simulation_time < job['sim_time'] and not cancelled.is_set():
+                profiler.start_step(self.core.iteration)
+                self.core.step(profiler if profiler.active else None)
+                profiler.end_step()
+        finally:
+            stopped.set()
+            thread.join()
+            self.core.close()
+        if cancelled.is_set(): return
+
+        reduced = metrics.reduce_dataset(self.core.to_dataset())
+        if self.__call({'type': 'result', 'job': job['job'], 'reduced': _to_json(reduced)}) is not None: self.completed += 1
+        self.core = None
+
+    def __call(self, message: dict, retry: bool=True):
+        '''
+        Sends a message to the coordinator and returns the reply. Returns `None` if the coordinator cannot be reached.
+        '''
+        message['worker'] = self.name
+        end = time.monotonic() + (self.retry_timeout if retry else 0.0)
+        delay = 0.1
+        while True:
+            try: return self.connection.call(message)
+            except OSError:
+                if time.monotonic() >= end: return None
+                time.sleep(delay)
+                delay = min(2.0 * delay, 5.0)
+
+
+def run_local(presets: list, sim_time: float, store, workers: int=2, **kwargs):
+    '''
+    Runs a sweep with a coordinator and worker processes on localhost, e.g. for testing.
+
+    Parameters
+    ----------
+    presets : list
+        List of Preset objects or parameter dictionaries.
+    sim_time : float
+        Time in s each simulation runs for.
+    store : Results_store or str
+        Results store or its directory the results are appended to.
+    workers : int, optional
+        Number of worker processes. default=`2`
+    **kwargs
+        Further arguments of Coordinator.
+
+    Returns
+    ----------
+    status : dict
+        Final status of the coordinator.
+    '''
+    import multiprocessing
+
+    coordinator = Coordinator(presets, sim_time, store, **kwargs)
+    host, port = coordinator.start()
+    processes = [multiprocessing.Process(target=_work, args=(host, port, f'local-{w}')) for w in range(workers)]
+    for p in processes: p.start()
+    coordinator.wait()
+    for p in processes: p.join()
+    coordinator.close()
+    return coordinator.status()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try: message = json.loads(line)
+            except ValueError: return
+            reply = self.server.coordinator.handle(message)
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+            self.wfile.flush()
+
+
+class _Connection:
+    '''
+    Persistent JSON lines connection to the coordinator, shared by the threads of a worker.
+    '''
+    def __init__(self, address: tuple, timeout: float=30.0):
+        self.address = address
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.socket = None
+        self.file = None
+
+    def call(self, message: dict):
+        with self.lock:
+            try:
+                if self.file is None:
+                    self.socket = socket.create_connection(self.address, self.timeout)
+                    self.file = self.socket.makefile('rwb')
+                self.file.write((json.dumps(message) + '\n').encode())
+                self.file.flush()
+                line = self.file.readline()
+                if not line: raise ConnectionError('Connection closed by the coordinator.')
+                return json.loads(line)
+            except OSError:
+                self.close()
+                raise
+
+    def close(self):
+        for f in (self.file, self.socket):
+            try:
+                if f is not None: f.close()
+            except OSError: pass
+        self.socket = self.file = None
+
+
+def _work(host: str, port: int, name: str=None):
+    Sweep_worker(host, port, name).run()
+
+def _to_json(reduced: dict):
+    '''
+    Converts a reduced dataset into JSON-serializable types.
+    '''
+    return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in reduced.items()}
+
+def _from_json(reduced: dict):
+    return {k: np.array(v, dtype=float) if k in SERIES_COLUMNS and v is not None else v for k, v in reduced.items()}
+
+
+if __name__ == '__main__':
+    # python -m swarmalator_model.distributed HOST PORT
+    Sweep_worker(sys.argv[1], int(sys.argv[2])).run()
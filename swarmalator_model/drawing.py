@@ -0,0 +1,183 @@
+import math
+import numpy as np
+import tkinter as tk
+from functools import lru_cache
+from swarmalator_model import helper_functions as hlp
+from swarmalator_model import render
+
+
+def draw_coordinate_system(canvas, plot_size: int, plot_type: str):
+    '''
+    Draws a coordinate system on a canvas.
+
+    Parameters
+    ----------
+    canvas : tk.Canvas
+        Canvas to draw on.
+    plot_size : int
+        Size of the canvas.
+    plot_type : {'positions', 'phases'}
+        Type of data to be displayed.
+    '''
+    areas = 8
+    canvas.delete('all')
+    
+    for i in range(1, areas):
+        x_x0 = y_y0 = 0.0
+        x_y0 = x_y1 = y_x0 = y_x1 = plot_size / areas * i
+        x_x1 = y_y1 = plot_size
+
+        if i == areas / 2.0:
+            canvas.create_line(x_x0, x_y0, x_x1, x_y1, width=2) # main x axis
+            canvas.create_line(y_x0, y_y0, y_x1, y_y1, width=2) # main y axis
+
+            for j in range(1, areas):
+                if plot_type == 'positions': t = j * 4.0 / areas - 2.0
+                else: t = round(j * 2.0 * math.pi / areas - math.pi, 2)
+                canvas.create_text(plot_size / areas * j + 15.0, plot_size / 2.0 + 15.0, text=str(t)) # x axis tick marks
+                if j != areas / 2.0: canvas.create_text(plot_size / 2.0 + 15.0, plot_size / areas * j + 15.0, text=str(-t)) # y axis tick marks
+            
+        else:
+            canvas.create_line(x_x0, x_y0, x_x1, x_y1, dash=(2, 2)) # helper x axis
+            canvas.create_line(y_x0, y_y0, y_x1, y_y1, dash=(2, 2)) # helper y axis
+    
+    if plot_type == 'positions':
+        canvas.create_text(plot_size - 15.0, plot_size / 2.0 - 15.0, text='X') # x axis labels
+        canvas.create_text(plot_size / 2 + 15.0, 15.0, text='Y') # x axis labels
+    else:
+        canvas.create_text(plot_size - 75.0, plot_size / 2.0 - 15.0, text='Polar Angle of Location') # x axis labels
+        canvas.create_text(plot_size / 2 + 30.0, 15.0, text='Phase') # x axis labels
+
+def draw_swarmalators(canvas, plot_size: int, plot_type: str, memory: np.ndarray, velocities: np.ndarray, global_phase: float):
+    '''
+    Draws swarmalators on a canvas.
+
+    Parameters
+    ----------
+    canvas : tk.Canvas
+        Canvas to draw on.
+    plot_size : int
+        Size of the canvas.
+    plot_type : {'positions', 'phases'}
+        Type of data to be displayed.
+    memory : np.ndarray
+        Positions and phases of shape (n, 3).
+    velocities : np.ndarray
+        Velocities of shape (n, 2). Swarmalators are drawn as dots without heading if `None`.
+    global_phase : float
+        Phase of the simulation clock added to the phases for coloring.
+    '''
+    canvas.delete("s")
+    if plot_type == 'positions': draw_positions(canvas, plot_size, memory, velocities, global_phase)
+    else: draw_phases(canvas, plot_size, memory)
+
+def draw_positions(canvas, plot_size: int, memory: np.ndarray, velocities: np.ndarray, global_phase: float):
+    '''
+    Draws swarmalators on a canvas based on their position.
+
+    Parameters
+    ----------
+    canvas : tk.Canvas
+        Canvas to draw on.
+    plot_size : int
+        Size of the canvas.
+    memory : np.ndarray
+        Positions and phases of shape (n, 3).
+    velocities : np.ndarray
+        Velocities of shape (n, 2). Swarmalators are drawn as dots without heading if `None`.
+    global_phase : float
+        Phase of the simulation clock added to the phases for coloring.
+    '''
+    size = plot_size / 120
+    phases = hlp.wrap_phase(global_phase + memory[:, 2])
+    for i in range(len(memory)):
+        color = hlp.phase_to_hex(phases[i])
+
+        x1 = plot_size * ((memory[i][0] + 2.0 ) / 4.0)
+        y1 = (plot_size * ((-memory[i][1] + 2.0 ) / 4.0))
+
+        # without a heading, e.g. if velocities were not logged, a dot is drawn instead of an arrow
+        norm = np.linalg.norm(velocities[i]) if velocities is not None else 0.0
+        if norm == 0.0:
+            canvas.create_oval(x1 - size / 2, y1 - size / 2, x1 + size / 2, y1 + size / 2, fill=color, outline=color, tags='s')
+            continue
+
+        diff_vec = velocities[i] / norm * size
+        x2 = x1 + diff_vec[0]
+        y2 = y1 - diff_vec[1]
+
+        canvas.create_line(
+            x1, y1, x2, y2, fill=color, tags='s',
+            arrow=tk.LAST, arrowshape=(8 * size / 5, 10 * size / 5, 3 * size / 5))
+
+def draw_phases(canvas, plot_size: int, memory: np.ndarray):
+    '''
+    Draws swarmalators on a canvas based on their phase.
+
+    Parameters
+    ----------
+    canvas : tk.Canvas
+        Canvas to draw on.
+    plot_size : int
+        Size of the canvas.
+    memory : np.ndarray
+        Positions and phases of shape (n, 3).
+    '''
+    size = plot_size / 150
+    for i in range(len(memory)):
+        a = math.atan(memory[i][1] / memory[i][0])
+        if memory[i][0] < 0 and memory[i][1] > 0: a += math.pi
+        elif memory[i][0] < 0 and memory[i][1] < 0: a -= math.pi
+
+        x1 = plot_size * ((a / math.pi + 1.0 ) / 2.0)
+        y1 = plot_size * ((-memory[i][2] / math.pi + 1.0 ) / 2.0)
+        x2 = x1 + size
+        y2 = y1 + size
+
+        canvas.create_oval(x1, y1, x2, y2, fill='black', tags='s')
+
+def draw_raster(canvas, plot_size: int, plot_type: str, memory: np.ndarray, velocities: np.ndarray, global_phase: float, photo: tk.PhotoImage=None):
+    '''
+    Draws swarmalators into an RGB buffer and shows it on a canvas as a single image. Unlike the other drawing functions,
+    the number of canvas items does not grow with the number of swarmalators.
+
+    Parameters
+    ----------
+    canvas : tk.Canvas
+        Canvas to draw on.
+    plot_size : int
+        Size of the canvas.
+    plot_type : {'positions', 'phases'}
+        Type of data to be displayed.
+    memory : np.ndarray
+        Positions and phases of shape (n, 3).
+    velocities : np.ndarray
+        Velocities of shape (n, 2). Swarmalators are drawn as dots without heading if `None`.
+    global_phase : float
+        Phase of the simulation clock added to the phases for coloring.
+    photo : tk.PhotoImage, optional
+        Image returned by the previous call, which is reused. default=`None`
+
+    Returns
+    ----------
+    photo : tk.PhotoImage
+        Image shown on the canvas. It has to be kept referenced as long as it is shown.
+    '''
+    image = _background(plot_size, plot_type).copy()
+    if plot_type == 'positions': render.rasterize_positions(image, memory[:, :2], memory[:, 2], velocities, global_phase)
+    else: render.rasterize_phases(image, memory[:, :2], memory[:, 2])
+    data = f'P6 {plot_size} {plot_size} 255 '.encode() + image.tobytes()
+
+    if photo is None: photo = tk.PhotoImage(master=canvas, width=plot_size, height=plot_size)
+    photo.configure(data=data, format='PPM')
+
+    # the coordinate system is drawn as canvas items, so the image is kept below them
+    # it is also tagged like the swarmalators of the other drawing functions, so it is removed with them
+    if not canvas.find_withtag('raster'):
+        canvas.create_image(0, 0, image=photo, anchor='nw', tags=('raster', 's'))
+        canvas.tag_lower('raster')
+    return photo
+
+@lru_cache(maxsize=2)
+def _background(plot_size: int, plot_type: str):
+    return render.background(plot_size, plot_type)
\ No newline at end of file
@@ -0,0 +1,243 @@
+import os
+import itertools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from swarmalator_model.core import Simulation_core
+from swarmalator_model import metrics
+
+
+AXES = ['j', 'k', 'cp', 'a']
+
+
+class Adaptive_sweep:
+    def __init__(self, j: list, k: list, cp: list=(0.1, ), a: list=(0.0, ),
+        pilot_n: int=20,
+        pilot_time: float=20.0,
+        n: int=100,
+        sim_time: float=100.0,
+        replicas: int=3,
+        levels: int=2,
+        time_tolerance: float=0.25,
+        speed_threshold: float=0.01,
+        memory_init: str='random',
+        time_step: float=0.1,
+        engine: str='swarm',
+        seed: int=None):
+        '''
+        Instantiates an Adaptive_sweep object that maps the patterns of a (J, K, cp, alpha) grid without simulating
+        every grid point. Cheap pilot runs with few swarmalators are made on a coarse subgrid, which is bisected only
+        between neighbouring points whose pattern or convergence time differ. Full runs with more swarmalators and
+        replicas are only made at points next to such boundaries.
+
+        Parameters
+        ----------
+        j : list
+            Values of J.
+        k : list
+            Values of K.
+        cp : list, optional
+            Values of the coupling probability. default=`(0.1, )`
+        a : list, optional
+            Values of alpha. default=`(0.0, )`
+        pilot_n : int, optional
+            Number of swarmalators of pilot runs. default=`20`
+        pilot_time : float, optional
+            Simulation time of pilot runs in s. default=`20.0`
+        n : int, optional
+            Number of swarmalators of full runs. default=`100`
+        sim_time : float, optional
+            Simulation time of full runs in s. default=`100.0`
+        replicas : int, optional
+            Number of full runs per boundary point. default=`3`
+        levels : int, optional
+            Number of bisection levels. The pilot subgrid uses every 2^levels-th value of each axis. default=`2`
+        time_tolerance : float, optional
+            Relative difference of convergence times above which two neighbouring points are refined. default=`0.25`
+        speed_threshold : float, optional
+            Average speed below which swarmalators are considered converged and static. default=`0.01`
+        memory_init : {'random', 'zeroes', 'gradual'}, optional
+            Method of swarmalator memory initialization. default=`random`
+        time_step : float, optional
+            Time step of an iteration in seconds. default=`0.1`
+        engine : {'agents', 'swarm'}, optional
+            Simulation engine. default=`swarm`
+        seed : int, optional
+            Seed used to derive the seeds of all runs. default=`None`
+        '''
+        self.axes = {'j': sorted(j), 'k': sorted(k), 'cp': sorted(cp), 'a': sorted(a)}
+        self.shape = tuple(len(v) for v in self.axes.values())
+        self.pilot = {'n': pilot_n, 'sim_time': pilot_time}
+        self.full = {'n': n, 'sim_time': sim_time}
+        self.replicas = replicas
+        self.levels = levels
+        self.time_tolerance = time_tolerance
+        self.speed_threshold = speed_threshold
+        self.memory_init = memory_init
+        self.time_step = time_step
+        self.engine = engine
+        self.rng = np.random.default_rng(seed)
+
+        self.pilots = {}
+        self.refined = {}
+
+    def run(self, workers: int=None):
+        '''
+        Runs the pilot and full simulations.
+
+        Parameters
+        ----------
+        workers : int, optional
+            Number of worker processes. Uses the number of CPUs if `None`. default=`None`
+
+        Returns
+        ----------
+        patterns : np.ndarray
+            Pattern of every grid point of shape (len(j), len(k), len(cp), len(a)).
+        '''
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            # pilot runs on the coarse subgrid
+            step = 2 ** self.levels
+            coarse = [sorted(set(range(0, size, step)) | {size - 1}) for size in self.shape]
+            self.__run_pilots(pool, list(itertools.product(*coarse)))
+
+            # bisect between neighbours that differ until neighbours are adjacent
+            while True:
+                new = {self.__midpoint(p, q) for p, q in self.__neighbours() if self.__differ(self.pilots[p], self.pilots[q])}
+                new -= set(self.pilots)
+                if not new: break
+                self.__run_pilots(pool, sorted(new))
+
+            # full runs next to boundaries
+            boundary = sorted({x for p, q in self.__neighbours() if self.__differ(self.pilots[p], self.pilots[q]) for x in (p, q)})
+            tasks = [(self.__parameters(i), self.full['n'], self.full['sim_time'], self.__seed()) for i in boundary for _ in range(self.replicas)]
+            results = list(pool.map(_simulate, tasks, itertools.repeat(self.speed_threshold)))
+            for r, i in enumerate(boundary):
+                self.refined[i] = self.__combine(results[r * self.replicas:(r + 1) * self.replicas])
+
+        return self.patterns()
+
+    def patterns(self):
+        '''
+        Returns the pattern of every grid point. Points without a full run use their pilot run, points without any
+        run use the nearest simulated point.
+
+        Returns
+        ----------
+        patterns : np.ndarray
+            Pattern of every grid point of shape (len(j), len(k), len(cp), len(a)).
+        '''
+        known = {**{i: r['pattern'] for i, r in self.pilots.items()}, **{i: r['pattern'] for i, r in self.refined.items()}}
+        points = np.array(list(known))
+        labels = np.array(list(known.values()), dtype=object)
+        grid = np.array(list(np.ndindex(*self.shape)))
+        nearest = np.argmin(np.abs(grid[:, None, :] - points[None, :, :]).sum(axis=-1), axis=1)
+        return labels[nearest].reshape(self.shape)
+
+    def report(self):
+        '''
+        Prints the simulated points and the number of simulations and pairwise interactions saved compared with
+        running the full simulations on every grid point.
+
+        Returns
+        ----------
+        report : dict
+            Numbers of runs and cost in pairwise interactions of the sweep and of the equivalent grid.
+        '''
+        pilot_cost = self.pilot['n'] ** 2 * round(self.pilot['sim_time'] / self.time_step)
+        full_cost = self.full['n'] ** 2 * round(self.full['sim_time'] / self.time_step)
+        grid_runs = int(np.prod(self.shape)) * self.replicas
+        report = {
+            'pilot_runs': len(self.pilots),
+            'full_runs': len(self.refined) * self.replicas,
+            'grid_runs': grid_runs,
+            'cost': len(self.pilots) * pilot_cost + len(self.refined) * self.replicas * full_cost,
+            'grid_cost': grid_runs * full_cost}
+        report['saved_runs'] = report['grid_runs'] - report['full_runs']
+        report['saved_cost'] = 1.0 - report['cost'] / report['grid_cost']
+
+        print(f'{"J":>6}{"K":>7}{"cp":>6}{"alpha":>7}  {"pattern":<22}{"conv. time":>11}{"runs":>6}')
+        for i in sorted(self.pilots):
+            r = self.refined.get(i, self.pilots[i])
+            p = self.__parameters(i)
+            print(f'{p["j"]:>6}{p["k"]:>7}{p["cp"]:>6}{p["a"]:>7}  {r["pattern"]:<22}{r["convergence_time"]:>11.1f}{r["runs"]:>6}')
+        print(f'{report["pilot_runs"]} pilot and {report["full_runs"]} full runs instead of {report["grid_runs"]} full runs on the grid, '
+              f'{report["saved_runs"]} full runs and {report["saved_cost"]:.0%} of pairwise interactions saved.')
+        return report
+
+    def __run_pilots(self, pool, points: list):
+        tasks = [(self.__parameters(i), self.pilot['n'], self.pilot['sim_time'], self.__seed()) for i in points]
+        for i, r in zip(points, pool.map(_simulate, tasks, itertools.repeat(self.speed_threshold))):
+            self.pilots[i] = self.__combine([r])
+
+    def __parameters(self, index: tuple):
+        parameters = {name: self.axes[name][i] for name, i in zip(AXES, index)}
+        parameters.update({'i': self.memory_init, 'dt': self.time_step, 'engine': self.engine})
+        return parameters
+
+    def __seed(self):
+        return int(self.rng.integers(2**31 - 1))
+
+    def __neighbours(self):
+        '''
+        Yields pairs of simulated points that are consecutive along one axis with all other indices equal.
+        '''
+        for axis in range(len(self.shape)):
+            lines = {}
+            for p in self.pilots: lines.setdefault(p[:axis] + p[axis + 1:], []).append(p)
+            for line in lines.values():
+                line.sort(key=lambda p: p[axis])
+                yield from zip(line[:-1], line[1:])
+
+    def __midpoint(self, p: tuple, q: tuple):
+        return tuple((a + b) // 2 for a, b in zip(p, q))
+
+    def __differ(self, r: dict, s: dict):
+        '''
+        Returns whether two neighbouring points differ in pattern or convergence time.
+        '''
+        if r['pattern'] != s['pattern']: return True
+        t, u = r['convergence_time'], s['convergence_time']
+        if np.isnan(t) or np.isnan(u): return np.isnan(t) != np.isnan(u)
+        return abs(t - u) > self.time_tolerance * max(t, u, 1.0)
+
+    def __combine(self, results: list):
+        '''
+        Combines replicas of a point by majority vote of the pattern and the mean of the other values.
+        '''
+        combined = {'pattern': Counter(r['pattern'] for r in results).most_common(1)[0][0], 'runs': len(results)}
+        for key in ['convergence_time', 's_plus', 's_minus', 'sync', 'speed']:
+            values = np.array([r[key] for r in results], dtype=float)
+            combined[key] = float(np.nanmean(values)) if not np.all(np.isnan(values)) else np.nan
+        return combined
+
+
+def _simulate(task: tuple, speed_threshold: float):
+    '''
+    Runs one headless simulation and reduces it to its pattern, order parameters and convergence time.
+    '''
+    parameters, n, sim_time, seed = task
+    core = Simulation_core(
+        num_swarmalators=n,
+        memory_init=parameters['i'],
+        time_step=parameters['dt'],
+        coupling_probability=parameters['cp'],
+        J=parameters['j'],
+        K=parameters['k'],
+        alpha=parameters['a'],
+        engine=parameters['engine'],
+        seed=seed)
+
+    speeds = []
+    while core.simulation_time < sim_time:
+        core.step()
+        speeds.append(np.mean(np.linalg.norm(core.velocities, axis=1)))
+    s_plus, s_minus, sync = metrics.order_parameters(core.memory[:, :2], core.memory[:, 2])
+    core.close()
+
+    result = {
+        'convergence_time': metrics.convergence_time(np.array(speeds), np.arange(1, len(speeds) + 1), speed_threshold),
+        's_plus': float(s_plus), 's_minus': float(s_minus), 'sync': float(sync), 'speed': float(speeds[-1])}
+    result['pattern'] = metrics.classify_pattern(result['s_plus'], result['s_minus'], result['sync'], result['speed'], speed_threshold)
+    return result
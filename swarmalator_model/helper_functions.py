@@ -2,7 +2,8 @@ import math
 import colorsys
 import pickle
 import os
-import matplotlib.pyplot as plt
+from statistics import NormalDist
+import numpy as np
 
 
 def phase_to_hex(phase: float):
@@ -24,6 +25,75 @@ def phase_to_hex(phase: float):
     c_int = tuple(int(t * 255) for t in c_rgb)
     return '#%02x%02x%02x' % c_int
 
+def phase_lut(size: int=256):
+    '''
+    Returns a lookup table of RGB colors for phase values, matching `phase_to_hex`.
+
+    Parameters
+    ----------
+    size : int, optional
+        Number of colors in the lookup table. default=`256`
+
+    Returns
+    ----------
+    lut : np.ndarray
+        Array of shape (size, 3) of uint8 RGB colors for phases evenly spaced in [-PI, PI).
+    '''
+    return np.array([tuple(int(t * 255) for t in colorsys.hsv_to_rgb(c / size, 1, 1)) for c in range(size)], dtype=np.uint8)
+
+def wrap_phase(phase):
+    '''
+    Wraps phase values into the interval [-PI, PI).
+
+    Parameters
+    ----------
+    phase : float or np.ndarray
+        Phase value or array of phase values.
+
+    Returns
+    ----------
+    phase : float or np.ndarray
+        Wrapped phase value or array of phase values.
+    '''
+    return np.mod(phase + math.pi, 2.0 * math.pi) - math.pi
+
+def clock_phase(iteration: int, time_step: float, frequency: float=0.5):
+    '''
+    Returns the phase of the simulation clock at an iteration, which is added to swarmalator phases for coloring.
+
+    Parameters
+    ----------
+    iteration : int
+        Iteration starting at 1.
+    time_step : float
+        Time step of an iteration in seconds.
+    frequency : float, optional
+        Frequency of the clock in Hz. default=`0.5`
+
+    Returns
+    ----------
+    phase : float
+        Phase of the simulation clock.
+    '''
+    return wrap_phase(2.0 * math.pi * time_step * frequency * (iteration - 1))
+
+def phase_to_phasor(phase):
+    '''
+    Converts phase values into unit phasors (cos, sin).
+
+    Parameters
+    ----------
+    phase : float or np.ndarray
+        Phase value or array of phase values of shape (n, ).
+
+    Returns
+    ----------
+    phasor : np.ndarray
+        Array of shape (2, ) or (n, 2) containing cosine and sine of the phases.
+    '''
+    phase = np.asarray(phase)
+    return np.stack((np.cos(phase), np.sin(phase)), axis=-1)
+
 def load_data(filename: str):
     '''
     Loads data from an .ssd file into a Dataset object.
@@ -40,10 +110,113 @@ def load_data(filename: str):
     '''  
     with open(filename, 'rb') as fp:
         dataset = pickle.load(fp)
+    dataset.filename = filename
     return dataset
 
 
-def plot_lines(data: dict, x_label: str, y_label: str, title: str, save: bool = False):
+def downsample(x, y, num_points: int, method: str='lttb', chunk_size: int=2**16):
+    '''
+    Reduces a series to a number of points for display while preserving its shape. Memory-mapped series are read in
+    chunks and never loaded completely.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        X values of shape (length, ).
+    y : np.ndarray
+        Y values of shape (length, ).
+    num_points : int
+        Maximum number of points returned.
+    method : {'lttb', 'minmax'}, optional
+        Downsampling method. default=`lttb`
+        `lttb`: Largest-Triangle-Three-Buckets, keeps the point of each bucket spanning the largest triangle with its neighbours.
+        `minmax`: keeps the minimum and maximum of each bucket, which preserves the envelope of noisy series.
+    chunk_size : int, optional
+        Maximum number of values read at once. default=`2**16`
+
+    Returns
+    ----------
+    x : np.ndarray
+        Downsampled x values.
+    y : np.ndarray
+        Downsampled y values.
+    '''
+    if isinstance(x, list): x = np.asarray(x)
+    if isinstance(y, list): y = np.asarray(y)
+    idx = downsample_indices(x, y, num_points, method, chunk_size)
+    return x[idx], y[idx]
+
+def downsample_indices(x, y, num_points: int, method: str='lttb', chunk_size: int=2**16):
+    '''
+    Returns the indices of the points kept by `downsample`.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        X values of shape (length, ).
+    y : np.ndarray
+        Y values of shape (length, ).
+    num_points : int
+        Maximum number of points.
+    method : {'lttb', 'minmax'}, optional
+        Downsampling method. default=`lttb`
+    chunk_size : int, optional
+        Maximum number of values read at once. default=`2**16`
+
+    Returns
+    ----------
+    indices : np.ndarray
+        Sorted indices of the kept points.
+    '''
+    n = len(y)
+    if num_points >= n or num_points < 3: return np.arange(n)
+    if method == 'minmax': return _minmax_indices(y, num_points // 2, chunk_size)
+    if method == 'lttb': return _lttb_indices(x, y, num_points)
+    raise ValueError(f'Unknown method {method}.')
+
+def ensemble_band(series, confidence: float=0.95, chunk_size: int=2**16):
+    '''
+    Computes the mean and the confidence interval of the mean over runs per iteration. Runs that are shorter or
+    contain `nan` are ignored where they have no values.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        Series of several runs of shape (runs, length), e.g. memory-mapped. It is read in chunks of iterations.
+    confidence : float, optional
+        Confidence level of the interval. default=`0.95`
+    chunk_size : int, optional
+        Maximum number of iterations read at once. default=`2**16`
+
+    Returns
+    ----------
+    mean : np.ndarray
+        Mean of shape (length, ).
+    low : np.ndarray
+        Lower bound of the interval of shape (length, ).
+    high : np.ndarray
+        Upper bound of the interval of shape (length, ).
+    '''
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    length = series.shape[1]
+    mean = np.full(length, np.nan)
+    half = np.full(length, np.nan)
+
+    for start in range(0, length, chunk_size):
+        window = slice(start, start + chunk_size)
+        block = np.asarray(series[:, window], dtype=np.float64)
+        counts = np.sum(~np.isnan(block), axis=0)
+        valid = counts > 0
+        sums = np.nansum(block, axis=0)
+        mean[window][valid] = sums[valid] / counts[valid]
+        squares = np.nansum((block - mean[window]) ** 2, axis=0)
+        spread = counts > 1
+        half[window][spread] = z * np.sqrt(squares[spread] / (counts[spread] - 1) / counts[spread])
+        half[window][valid & ~spread] = 0.0
+
+    return mean, mean - half, mean + half
+
+def plot_lines(data: dict, x_label: str, y_label: str, title: str, save: bool = False, max_points: int=None, method: str='lttb'):
     '''
     Creats a 2D plot with two lines.
 
@@ -59,7 +232,13 @@ def plot_lines(data: dict, x_label: str, y_label: str, title: str, save: bool =
         Plot title.
     save : bool, optional
         Whether to save to plot as .jpg. default=False
+    max_points : int, optional
+        Maximum number of points plotted per trace. All points are plotted if `None`. default=`None`
+    method : {'lttb', 'minmax'}, optional
+        Downsampling method, see `downsample`. default=`lttb`
     '''   
+    import matplotlib.pyplot as plt # imported on first use, so headless workers do not load matplotlib
+
     if save and not os.path.exists('plots\\'): os.makedirs('plots\\')
 
     plt.figure(figsize=(15, 10))
@@ -69,6 +248,7 @@ def plot_lines(data: dict, x_label: str, y_label: str, title: str, save: bool =
     for trace in data:
         x = data[trace][0]
         y = data[trace][1]
+        if max_points is not None: x, y = downsample(x, y, max_points, method)
         plt.plot(x, y, label=trace)
         filename += (('_' + trace) if filename != '' else trace)
 
@@ -78,4 +258,102 @@ def plot_lines(data: dict, x_label: str, y_label: str, title: str, save: bool =
     plt.grid(axis='y')
     plt.legend()
     if save: plt.savefig(f'plots\\{filename}.jpg')
-    else: plt.show()
\ No newline at end of file
+    else: plt.show()
+
+def plot_bands(data: dict, x_label: str, y_label: str, title: str, save: bool = False, confidence: float=0.95, max_points: int=2000):
+    '''
+    Creates a 2D plot of the mean of several runs per trace with a band of its confidence interval.
+
+    Parameters
+    ----------
+    data : dict
+        Dictionary of traces to be plotted of the form { tracename : [X, Y]}, where Y is of shape (runs, length).
+    x_label : str
+        X-axis label.
+    y_label : str
+        Y-axis label.
+    title : str
+        Plot title.
+    save : bool, optional
+        Whether to save to plot as .jpg. default=False
+    confidence : float, optional
+        Confidence level of the bands. default=`0.95`
+    max_points : int, optional
+        Maximum number of points plotted per trace. All points are plotted if `None`. default=`2000`
+    '''
+    import matplotlib.pyplot as plt
+
+    if save and not os.path.exists('plots\\'): os.makedirs('plots\\')
+
+    plt.figure(figsize=(15, 10))
+
+    filename = ''
+
+    for trace in data:
+        x = np.asarray(data[trace][0])
+        mean, low, high = ensemble_band(data[trace][1], confidence)
+        if max_points is not None:
+            idx = downsample_indices(x, mean, max_points)
+            x, mean, low, high = x[idx], mean[idx], low[idx], high[idx]
+        line, = plt.plot(x, mean, label=trace)
+        plt.fill_between(x, low, high, color=line.get_color(), alpha=0.25)
+        filename += (('_' + trace) if filename != '' else trace)
+
+    plt.xlabel(x_label)
+    plt.ylabel(y_label)
+    plt.title(title)
+    plt.grid(axis='y')
+    plt.legend()
+    if save: plt.savefig(f'plots\\{filename}_bands.jpg')
+    else: plt.show()
+
+def _lttb_indices(x, y, num_points: int):
+    '''
+    Selects points with Largest-Triangle-Three-Buckets. Buckets are processed in order, since each selection depends on
+    the previous one, but the points of a bucket are evaluated at once.
+    '''
+    n = len(y)
+    edges = np.linspace(1, n - 1, num_points - 1).astype(np.int64)
+    indices = np.empty(num_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    ax, ay = float(x[0]), float(y[0])
+    for b in range(num_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges): cx, cy = np.mean(x[hi:edges[b + 2]]), np.mean(y[hi:edges[b + 2]])
+        else: cx, cy = float(x[n - 1]), float(y[n - 1])
+
+        bx = np.asarray(x[lo:hi], dtype=np.float64)
+        by = np.asarray(y[lo:hi], dtype=np.float64)
+        areas = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        a = lo + int(np.argmax(areas))
+        indices[b + 1] = a
+        ax, ay = float(x[a]), float(y[a])
+    return indices
+
+def _minmax_indices(y, buckets: int, chunk_size: int):
+    '''
+    Selects the minimum and maximum of each bucket, processing as many buckets at once as fit into a chunk.
+    '''
+    n = len(y)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = int(np.max(np.diff(edges)))
+    per_chunk = max(1, chunk_size // width)
+    indices = []
+
+    for first in range(0, buckets, per_chunk):
+        starts = edges[first:min(first + per_chunk, buckets)]
+        ends = edges[first + 1:first + 1 + len(starts)]
+        lo, hi = starts[0], ends[-1]
+        block = np.asarray(y[lo:hi], dtype=np.float64)
+
+        # buckets differ in size by at most one, so they are padded to a matrix
+        positions = starts[:, None] - lo + np.arange(width)
+        inside = positions < (ends - lo)[:, None]
+        values = block[np.minimum(positions, hi - lo - 1)]
+        low = np.where(inside, values, np.inf).argmin(axis=1)
+        high = np.where(inside, values, -np.inf).argmax(axis=1)
+        indices.append(np.sort(np.stack([starts + low, starts + high], axis=1), axis=1).ravel())
+
+    return np.unique(np.concatenate(indices))
\ No newline at end of file
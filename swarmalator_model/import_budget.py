@@ -0,0 +1,81 @@
+import sys
+import json
+import subprocess
+
+
+# modules used by headless workers, which must import quickly and without GUI or plotting libraries
+HEADLESS_MODULES = [
+    'swarmalator_model',
+    'swarmalator_model.core',
+    'swarmalator_model.simulation_run',
+    'swarmalator_model.dataset',
+    'swarmalator_model.analysis',
+    'swarmalator_model.study',
+    'swarmalator_model.render',
+]
+FORBIDDEN_MODULES = ['tkinter', 'customtkinter', 'matplotlib', 'PIL']
+
+# import time in ms on top of NumPy, which every module needs anyway
+BUDGET_MS = 100.0
+
+
+def measure(module: str, repeats: int=5):
+    '''
+    Measures the import time of a module in fresh interpreters.
+
+    Parameters
+    ----------
+    module : str
+        Name of the module.
+    repeats : int, optional
+        Number of interpreters started. The fastest import is reported. default=`5`
+
+    Returns
+    ----------
+    import_time : float
+        Import time in ms, excluding NumPy.
+    forbidden : list
+        GUI or plotting modules that were imported.
+    '''
+    code = (
+        'import sys, time, json, numpy\n'
+        't = time.perf_counter()\n'
+        f'import {module}\n'
+        't = time.perf_counter() - t\n'
+        f'print(json.dumps([t * 1000.0, [m for m in {FORBIDDEN_MODULES} if m in sys.modules]]))')
+    times = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        import_time, forbidden = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(import_time)
+    return min(times), forbidden
+
+def check(modules: list=None, budget_ms: float=BUDGET_MS, repeats: int=5):
+    '''
+    Checks that modules import within the budget and without GUI or plotting libraries and prints the results.
+
+    Parameters
+    ----------
+    modules : list, optional
+        Names of the modules. default=`HEADLESS_MODULES`
+    budget_ms : float, optional
+        Maximum import time in ms, excluding NumPy. default=`BUDGET_MS`
+    repeats : int, optional
+        Number of interpreters started per module. default=`5`
+
+    Returns
+    ----------
+    failures : list
+        Names of the modules that failed the check.
+    '''
+    failures = []
+    for m in modules or HEADLESS_MODULES:
+        import_time, forbidden = measure(m, repeats)
+        ok = import_time <= budget_ms and not forbidden
+        if not ok: failures.append(m)
+        print(f'{m:<36}{import_time:>8.1f} ms  {"ok" if ok else "FAILED"}  {", ".join(forbidden)}')
+    return failures
+
+
+if __name__ == '__main__':
+    sys.exit(1 if check() else 0)
@@ -0,0 +1,92 @@
+import math
+import numpy as np
+
+
+class Log_policy:
+    def __init__(self, every: int=1, spacing: str='linear', per_decade: int=50, fields: list=None, agents: list=None):
+        '''
+        Instantiates a Log_policy object that decides which iterations, fields and swarmalators are logged.
+
+        Parameters
+        ----------
+        every : int, optional
+            Every n-th iteration is logged, if spacing is `linear`. default=`1`
+        spacing : {'linear', 'log'}, optional
+            Spacing of logged iterations. default=`linear`
+            `linear`: every n-th iteration.
+            `log`: logarithmically spaced iterations, dense at the beginning and sparse at the end.
+        per_decade : int, optional
+            Number of logged iterations per decade, if spacing is `log`. default=`50`
+        fields : list, optional
+            Fields to be logged. Any of `positions`, `phases`, `velocities` and `speeds`. default=`['positions', 'phases', 'velocities']`
+        agents : list, optional
+            Ids of swarmalators to be logged. All swarmalators are logged if `None`. default=`None`
+        '''
+        self.every = max(1, every)
+        self.spacing = spacing
+        self.per_decade = per_decade
+        self.fields = fields if fields is not None else ['positions', 'phases', 'velocities']
+        self.agents = np.array(agents) if agents is not None else None
+
+    def should_log(self, iteration: int):
+        '''
+        Returns whether an iteration is logged. Iterations start at 1.
+
+        Parameters
+        ----------
+        iteration : int
+            Iteration of the simulation.
+        '''
+        if self.spacing == 'log':
+            if iteration <= 1: return True
+            return math.floor(self.per_decade * math.log10(iteration)) > math.floor(self.per_decade * math.log10(iteration - 1))
+        return (iteration - 1) % self.every == 0
+
+    def record(self, memory: np.ndarray, velocities: np.ndarray):
+        '''
+        Extracts the logged fields of the logged swarmalators from the environment memory.
+
+        Parameters
+        ----------
+        memory : np.ndarray
+            Environment memory of positions and phases.
+        velocities : np.ndarray
+            Environment memory of velocities.
+
+        Returns
+        ----------
+        record : dict
+            Dictionary of the form { field : np.ndarray }
+        '''
+        if self.agents is not None:
+            memory = memory[self.agents]
+            velocities = velocities[self.agents]
+
+        record = {}
+        if 'positions' in self.fields: record['positions'] = memory[:, :2].copy()
+        if 'phases' in self.fields: record['phases'] = memory[:, 2].copy()
+        if 'velocities' in self.fields: record['velocities'] = velocities.copy()
+        if 'speeds' in self.fields: record['speeds'] = np.linalg.norm(velocities, axis=1)
+        return record
+
+    def schedule(self, iterations: list):
+        '''
+        Returns the sampling schedule to be stored with a Dataset.
+
+        Parameters
+        ----------
+        iterations : list
+            Logged iterations.
+
+        Returns
+        ----------
+        schedule : dict
+            Dictionary containing the logged iterations, fields and swarmalators.
+        '''
+        return {
+            'iterations': list(iterations),
+            'fields': list(self.fields),
+            'agents': self.agents.tolist() if self.agents is not None else None,
+            'spacing': self.spacing,
+            'every': self.every,
+            'per_decade': self.per_decade}
@@ -0,0 +1,268 @@
+import numpy as np
+from swarmalator_model import helper_functions as hlp
+
+
+# patterns swarmalators converge to depending on J and K
+PATTERNS = ['static sync', 'static async', 'static phase wave', 'splintered phase wave', 'active phase wave']
+
+# number of bins of the age histogram, bin k counts ages from 2^k - 1 to 2^(k+1) - 2 steps and the last bin all older ones
+AGE_BINS = 16
+
+
+def average_speed(speeds: np.ndarray):
+    '''
+    Computes the average speed of all swarmalators per iteration.
+
+    Parameters
+    ----------
+    speeds : np.ndarray
+        Speeds of shape (iterations, n).
+
+    Returns
+    ----------
+    average_speed : np.ndarray
+        Average speed of shape (iterations, ).
+    '''
+    return np.average(speeds, axis=1)
+
+def order_parameters(positions: np.ndarray, phases: np.ndarray):
+    '''
+    Computes the order parameters S+ and S- measuring the correlation of polar angle of location and phase, and the
+    phase synchronization R = |<exp(i theta)>| per iteration.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Positions of shape (iterations, n, 2).
+    phases : np.ndarray
+        Phases of shape (iterations, n).
+
+    Returns
+    ----------
+    s_plus : np.ndarray
+        Order parameter S+ of shape (iterations, ).
+    s_minus : np.ndarray
+        Order parameter S- of shape (iterations, ).
+    sync : np.ndarray
+        Phase synchronization R of shape (iterations, ).
+    '''
+    angles = np.arctan2(positions[..., 1], positions[..., 0])
+    s_plus = np.abs(np.mean(np.exp(1j * (angles + phases)), axis=-1))
+    s_minus = np.abs(np.mean(np.exp(1j * (angles - phases)), axis=-1))
+    sync = np.abs(np.mean(np.exp(1j * phases), axis=-1))
+    return s_plus, s_minus, sync
+
+def convergence_time(series: np.ndarray, iterations: np.ndarray, threshold: float):
+    '''
+    Computes the first iteration from which on a series stays below a threshold. Works on several series at once.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        Series of shape (iterations, ) or (runs, iterations).
+    iterations : np.ndarray
+        Iterations of the series of shape (iterations, ).
+    threshold : float
+        Threshold the series has to stay below.
+
+    Returns
+    ----------
+    convergence_time : float or np.ndarray
+        Iteration of convergence per series. `nan` if a series does not converge.
+    '''
+    series = np.asarray(series, dtype=float)
+    iterations = np.asarray(iterations, dtype=float)
+    if series.shape[-1] == 0: return np.full(series.shape[:-1], np.nan) if series.ndim > 1 else np.nan
+
+    # a series has converged at the first iteration from which all remaining values are below the threshold
+    stays = np.flip(np.logical_and.accumulate(np.flip(series < threshold, axis=-1), axis=-1), axis=-1)
+    times = np.where(stays[..., -1], iterations[np.argmax(stays, axis=-1)], np.nan)
+    return times if series.ndim > 1 else float(times)
+
+def classify_pattern(s_plus: float, s_minus: float, sync: float, speed: float, speed_threshold: float=0.01, high: float=0.9, low: float=0.1):
+    '''
+    Classifies the pattern of a converged swarm from its order parameters and average speed.
+
+    Parameters
+    ----------
+    s_plus : float
+        Order parameter S+.
+    s_minus : float
+        Order parameter S-.
+    sync : float
+        Phase synchronization R.
+    speed : float
+        Average speed of the swarmalators.
+    speed_threshold : float, optional
+        Average speed above which the swarm is considered active. default=`0.01`
+    high : float, optional
+        Value above which an order parameter is considered maximal. default=`0.9`
+    low : float, optional
+        Value below which an order parameter is considered vanishing. default=`0.1`
+
+    Returns
+    ----------
+    pattern : str
+        One of `PATTERNS`.
+    '''
+    s = max(s_plus, s_minus)
+    if sync > high: return 'static sync'
+    if speed > speed_threshold: return 'active phase wave'
+    if s > high: return 'static phase wave'
+    if s < low: return 'static async'
+    return 'splintered phase wave'
+
+def information_age(ages: np.ndarray, memory: np.ndarray, env_memory: np.ndarray, memory_budget: int=2**24):
+    '''
+    Computes how stale the information is that swarmalators act on. Compares the memory entries of all swarmalators
+    about all others with their true states and summarizes the number of steps since each entry was last updated.
+    Own memory entries are excluded. Rows are processed in tiles, so no array of shape (n, n) is allocated.
+
+    Parameters
+    ----------
+    ages : np.ndarray
+        Number of steps since each memory entry was last updated of shape (n, n).
+    memory : np.ndarray
+        Memories of all swarmalators of shape (n, n, 3).
+    env_memory : np.ndarray
+        True positions and phases of shape (n, 3).
+    memory_budget : int, optional
+        Maximum number of bytes used for temporary arrays. default=`2**24`
+
+    Returns
+    ----------
+    statistics : dict
+        Dictionary containing the mean and maximum age, the histogram of ages with `AGE_BINS` logarithmic bins, the
+        mean and maximum distance between remembered and true positions and the mean absolute phase error.
+    '''
+    n = len(ages)
+    pairs = max(n * (n - 1), 1)
+    histogram = np.zeros(AGE_BINS, dtype=np.int64)
+    age_sum = age_max = distance_sum = distance_max = phase_sum = 0.0
+
+    tile_rows = max(1, memory_budget // (32 * max(n, 1)))
+    for start in range(0, n, tile_rows):
+        stop = min(start + tile_rows, n)
+        own = (np.arange(stop - start), np.arange(start, stop))
+        age = ages[start:stop]
+        distance = np.linalg.norm(memory[start:stop, :, :2] - env_memory[None, :, :2], axis=2)
+        phase = np.abs(hlp.wrap_phase(memory[start:stop, :, 2] - env_memory[None, :, 2]))
+        distance[own] = 0.0
+        phase[own] = 0.0
+
+        # own entries are counted in an overflow bin that is dropped
+        bins = np.minimum(np.log2(age + 1.0).astype(np.int64), AGE_BINS - 1)
+        bins[own] = AGE_BINS
+        histogram += np.bincount(bins.ravel(), minlength=AGE_BINS + 1)[:AGE_BINS]
+
+        age_sum += age.sum() - age[own].sum()
+        age_max = max(age_max, float(np.where(bins < AGE_BINS, age, 0.0).max(initial=0.0)))
+        distance_sum += distance.sum()
+        distance_max = max(distance_max, float(distance.max(initial=0.0)))
+        phase_sum += phase.sum()
+
+    return {
+        'mean_age': float(age_sum / pairs), 'max_age': age_max, 'histogram': histogram,
+        'mean_position_error': float(distance_sum / pairs), 'max_position_error': distance_max, 'mean_phase_error': float(phase_sum / pairs)}
+
+def summarize(dataset, speed_threshold: float=0.01):
+    '''
+    Computes summary statistics of a Dataset object.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object to be summarized.
+    speed_threshold : float, optional
+        Average speed below which the swarmalators are considered converged. default=`0.01`
+
+    Returns
+    ----------
+    summary : dict
+        Dictionary of summary statistics. Statistics of fields that were not logged are `None`.
+    '''
+    summary = {'final_speed': None, 'mean_speed': None, 'convergence_time': None, 's_plus': None, 's_minus': None, 'sync': None}
+    iterations = dataset.get_iterations()
+    if len(iterations) == 0: return summary
+
+    # virtual datasets are summarized from their stored series without regenerating the trajectories
+    stored = getattr(dataset, 'reduced', None)
+    if stored is not None:
+        if stored['avg_speed'] is not None:
+            summary['final_speed'] = float(stored['avg_speed'][-1])
+            summary['mean_speed'] = float(np.mean(stored['avg_speed']))
+            summary['convergence_time'] = convergence_time(stored['avg_speed'], iterations, speed_threshold)
+        for key in ['s_plus', 's_minus', 'sync']:
+            if stored[key] is not None: summary[key] = float(stored[key][-1])
+        return summary
+
+    if dataset.velocities is not None or getattr(dataset, 'speeds', None) is not None:
+        speed = average_speed(dataset.get_speeds())
+        summary['final_speed'] = float(speed[-1])
+        summary['mean_speed'] = float(np.mean(speed))
+        summary['convergence_time'] = convergence_time(speed, iterations, speed_threshold)
+
+    if dataset.positions is not None and dataset.phases is not None:
+        s_plus, s_minus, sync = order_parameters(np.array(dataset.positions[-1]), np.array(dataset.phases[-1]))
+        summary['s_plus'] = float(s_plus)
+        summary['s_minus'] = float(s_minus)
+        summary['sync'] = float(sync)
+
+    return summary
+
+def reduce_dataset(dataset, speed_threshold: float=0.01, cache=None):
+    '''
+    Reduces a Dataset object to per-iteration series and summary statistics.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object to be reduced.
+    speed_threshold : float, optional
+        Average speed below which the swarmalators are considered converged. default=`0.01`
+    cache : Series_cache, optional
+        Cache used to look up and store the series. default=`None`
+
+    Returns
+    ----------
+    reduced : dict
+        Dictionary containing the parameters, logged iterations, series of average speed and order parameters
+        (`None` if not logged) and summary statistics.
+    '''
+    reduced = {
+        'identifier': dataset.identifier,
+        'parameters': dataset.parameters,
+        'iterations': dataset.get_iterations(),
+        'avg_speed': None, 's_plus': None, 's_minus': None, 'sync': None}
+
+    stored = getattr(dataset, 'reduced', None)
+    if stored is not None:
+        reduced.update({key: stored[key] for key in ['avg_speed', 's_plus', 's_minus', 'sync']})
+        reduced['summary'] = summarize(dataset, speed_threshold)
+        return reduced
+
+    get = cache.get if cache is not None else lambda d, name: SERIES[name][0](d)
+    if dataset.velocities is not None or getattr(dataset, 'speeds', None) is not None:
+        reduced['avg_speed'] = get(dataset, 'avg_speed')
+    if dataset.positions is not None and dataset.phases is not None:
+        reduced['s_plus'], reduced['s_minus'], reduced['sync'] = get(dataset, 'order_parameters')
+
+    reduced['summary'] = summarize(dataset, speed_threshold)
+    return reduced
+
+def _iterations(dataset):
+    return dataset.get_iterations()
+
+def _avg_speed(dataset):
+    return average_speed(dataset.get_speeds())
+
+def _order_parameters(dataset):
+    return np.stack(order_parameters(np.array(dataset.positions), np.array(dataset.phases)))
+
+# derived series that can be cached, of the form { name : (function, version) }
+# the version has to be increased whenever the computation of a series changes
+SERIES = {
+    'iterations': (_iterations, 1),
+    'avg_speed': (_avg_speed, 1),
+    'order_parameters': (_order_parameters, 1),
+}
@@ -0,0 +1,238 @@
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+# scalar metrics published with every state
+METRICS = ['iteration', 'simulation_time', 'avg_speed', 'sync']
+HEADER_SIZE = 6 # latest slot, number of swarmalators, number of slots, number of published states, owner pid, owner token
+
+# names of the shared memory blocks created by this process
+_published = set()
+
+
+class Monitor_publisher:
+    def __init__(self, name: str, num_swarmalators: int, slots: int=4, every: int=1):
+        '''
+        Instantiates a Monitor_publisher object that publishes the latest environment memory, velocities and a few
+        metrics of a running simulation into a named shared memory ring buffer. Each slot is guarded by a sequence
+        counter (seqlock), so readers can attach and detach at any time without ever blocking the simulation.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory block. A block of the same name left behind by a crashed run is unlinked and
+            created again, readers still attached to it keep seeing its last state until they attach again. If the
+            publisher of an existing block is still running, a FileExistsError is raised.
+        num_swarmalators : int
+            Number of swarmalators in the simulation.
+        slots : int, optional
+            Number of slots of the ring buffer. default=`4`
+        every : int, optional
+            Only every n-th iteration is published. default=`1`
+        '''
+        self.name = name
+        self.every = every
+        if name in _published: raise ValueError(f'Shared memory block {name} is already published by this process.')
+        try: self.shm = shared_memory.SharedMemory(name=name, create=True, size=_size(num_swarmalators, slots))
+        except FileExistsError:
+            owner = _owner(name)
+            if owner is not None and _alive(owner[0]): raise FileExistsError(f'Shared memory block {name} is published by running process {owner[0]}.')
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_size(num_swarmalators, slots))
+        _published.add(name)
+        self.owner = (os.getpid(), int.from_bytes(os.urandom(7), 'little'))
+        self.header, self.sequences, self.data = _views(self.shm, num_swarmalators, slots)
+        self.header[:] = [-1, num_swarmalators, slots, 0, *self.owner]
+        self.sequences[:] = 0
+        self.num_swarmalators = num_swarmalators
+        self.slots = slots
+
+    def publish(self, iteration: int, simulation_time: float, memory: np.ndarray, velocities: np.ndarray):
+        '''
+        Writes a state into the next slot of the ring buffer.
+
+        Parameters
+        ----------
+        iteration : int
+            Iteration of the state.
+        simulation_time : float
+            Simulation time of the state in s.
+        memory : np.ndarray
+            Environment memory of shape (n, 3).
+        velocities : np.ndarray
+            Environment velocities of shape (n, 2).
+        '''
+        if self.shm is None or iteration % self.every != 0: return
+        n = self.num_swarmalators
+        slot = (int(self.header[0]) + 1) % self.slots
+        avg_speed = np.mean(np.linalg.norm(velocities, axis=1))
+        sync = np.abs(np.mean(np.exp(1j * memory[:, 2])))
+
+        # an odd sequence number marks the slot as being written
+        self.sequences[slot] += 1
+        row = self.data[slot]
+        row[:3 * n] = memory.ravel()
+        row[3 * n:5 * n] = velocities.ravel()
+        row[5 * n:] = [iteration, simulation_time, avg_speed, sync]
+        self.sequences[slot] += 1
+
+        self.header[0] = slot
+        self.header[3] += 1
+
+    def close(self):
+        '''
+        Releases the shared memory block. Attached readers keep their mapping until they detach. The block is only
+        unlinked if it was not replaced by another publisher in the meantime.
+        '''
+        if self.shm is None: return
+        owned = _owner(self.name) == self.owner
+        self.header = self.sequences = self.data = None
+        self.shm.close()
+        if owned: self.shm.unlink()
+        else: _untrack(self.shm)
+        self.shm = None
+        _published.discard(self.name)
+
+
+class Monitor_reader:
+    def __init__(self, name: str):
+        '''
+        Instantiates a Monitor_reader object attached to the shared memory ring buffer of a Monitor_publisher.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory block.
+        '''
+        self.shm = _attach(name)
+        header = np.ndarray((HEADER_SIZE, ), dtype=np.int64, buffer=self.shm.buf)
+        self.num_swarmalators = int(header[1])
+        self.slots = int(header[2])
+        self.header, self.sequences, self.data = _views(self.shm, self.num_swarmalators, self.slots)
+
+    def read(self, retries: int=100):
+        '''
+        Reads the latest consistent state without blocking the publisher. A slot that changes while being copied is
+        read again.
+
+        Parameters
+        ----------
+        retries : int, optional
+            Maximum number of attempts. default=`100`
+
+        Returns
+        ----------
+        state : dict
+            Dictionary containing the memory, velocities and metrics. `None` if nothing has been published yet.
+        '''
+        n = self.num_swarmalators
+        for _ in range(retries):
+            slot = int(self.header[0])
+            if slot < 0: return None
+            before = int(self.sequences[slot])
+            if before % 2 == 1: continue
+            row = self.data[slot].copy()
+            if int(self.sequences[slot]) != before: continue
+
+            state = {'memory': row[:3 * n].reshape((n, 3)), 'velocities': row[3 * n:5 * n].reshape((n, 2))}
+            state.update(zip(METRICS, row[5 * n:].tolist()))
+            state['iteration'] = int(state['iteration'])
+            state['published'] = int(self.header[3])
+            return state
+        return None
+
+    def wait(self, timeout: float=10.0, interval: float=0.05):
+        '''
+        Waits until a state has been published and returns it.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time to wait in s. default=`10.0`
+        interval : float, optional
+            Time between attempts in s. default=`0.05`
+
+        Returns
+        ----------
+        state : dict
+            Latest state. `None` if nothing was published in time.
+        '''
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            state = self.read()
+            if state is not None: return state
+            time.sleep(interval)
+        return None
+
+    def close(self):
+        '''
+        Detaches from the shared memory block.
+        '''
+        if self.shm is None: return
+        self.header = self.sequences = self.data = None
+        self.shm.close()
+        self.shm = None
+
+
+def _size(num_swarmalators: int, slots: int):
+    return 8 * (HEADER_SIZE + slots + slots * (5 * num_swarmalators + len(METRICS)))
+
+def _views(shm: shared_memory.SharedMemory, num_swarmalators: int, slots: int):
+    '''
+    Creates the header, sequence and data views of a shared memory block.
+    '''
+    header = np.ndarray((HEADER_SIZE, ), dtype=np.int64, buffer=shm.buf)
+    sequences = np.ndarray((slots, ), dtype=np.int64, buffer=shm.buf, offset=8 * HEADER_SIZE)
+    data = np.ndarray((slots, 5 * num_swarmalators + len(METRICS)), dtype=np.float64, buffer=shm.buf, offset=8 * (HEADER_SIZE + slots))
+    return header, sequences, data
+
+def _attach(name: str):
+    '''
+    Attaches to an existing shared memory block without letting the resource tracker of this process remove it on exit.
+    '''
+    try: return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: pass # track is only available from Python 3.13 on
+
+    shm = shared_memory.SharedMemory(name=name)
+    if name in _published: return shm # the block is tracked by its publisher in this process
+    _untrack(shm)
+    return shm
+
+def _untrack(shm: shared_memory.SharedMemory):
+    '''
+    Stops the resource tracker of this process from removing a shared memory block on exit.
+    '''
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception: pass
+
+def _owner(name: str):
+    '''
+    Returns the pid and token of the publisher of a shared memory block, `None` if the block does not exist or was
+    not created by a publisher.
+    '''
+    try: shm = _attach(name)
+    except FileNotFoundError: return None
+    try:
+        if shm.size < 8 * HEADER_SIZE: return None
+        header = np.ndarray((HEADER_SIZE, ), dtype=np.int64, buffer=shm.buf)
+        owner = (int(header[4]), int(header[5]))
+        del header
+        return owner
+    finally: shm.close()
+
+def _alive(pid: int):
+    '''
+    Returns whether a process is running. On Windows, blocks are removed with their last handle, so the publisher of
+    an existing block is always assumed to be running.
+    '''
+    if os.name == 'nt' or pid <= 0: return os.name == 'nt'
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: pass
+    return True
@@ -0,0 +1,189 @@
+import math
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+import numpy as np
+from swarmalator_model.swarm import Swarm, state_shapes, initial_arrays
+
+
+# time in s between two checks whether the workers are still alive while waiting for a step
+POLL_INTERVAL = 0.1
+
+
+class Parallel_swarm:
+    def __init__(self, num_swarmalators: int, memory_init: str, num_workers: int, use_phasors: bool=False, memory_budget: int=2**24, seed: int=None, arrays: dict=None,
+        communication: str='probabilistic', messages: int=1, sampling: str='uniform', track_age: bool=False, timeout: float=120.0):
+        '''
+        Instantiates a vectorized population of swarmalators that is stepped by multiple worker processes. The state
+        arrays of the swarm live in shared memory and each worker scans, thinks and moves its own block of swarmalators.
+        Steps are synchronized with semaphores, so all swarmalators yell after all blocks have moved.
+
+        Parameters
+        ----------
+        num_swarmalators : int
+            Number of swarmalators in the simulation.
+        memory_init : {'random', 'zeroes', 'gradual'}
+            Method of swarmalator memory initialization.
+        num_workers : int
+            Number of worker processes.
+        use_phasors : bool, optional
+            If true, phases in memory are additionally kept as unit phasors (cos, sin). default=`False`
+        memory_budget : int, optional
+            Maximum number of bytes used for temporary arrays of the pairwise kernel per worker. default=`2**24`
+        seed : int, optional
+            Seed of the random number generators. default=`None`
+        arrays : dict, optional
+            Initial state arrays as returned by `Swarm.state_arrays`, which are copied to shared memory. default=`None`
+        communication : {'probabilistic', 'budget'}, optional
+            Communication model, see `Swarm`. default=`probabilistic`
+        messages : int, optional
+            Number of messages a swarmalator receives per step in the `budget` model. default=`1`
+        sampling : {'uniform', 'proximity', 'age'}, optional
+            How senders are chosen in the `budget` model. default=`uniform`
+        track_age : bool, optional
+            If true, the number of steps since each memory entry was last updated is tracked, see `Swarm`. default=`False`
+        timeout : float, optional
+            Time in s to wait for the workers at each synchronization point. If a worker fails, dies or does not respond
+            in time, `step` raises a BrokenBarrierError. default=`120.0`
+        '''
+        self.num_swarmalators = num_swarmalators
+        self.memory_init = memory_init
+        self.num_workers = max(1, min(num_workers, num_swarmalators))
+        self.use_phasors = use_phasors
+        self.memory_budget = memory_budget
+        self.timeout = timeout
+
+        # allocate the state in shared memory and initialize it in place
+        communication = {'communication': communication, 'messages': messages, 'sampling': sampling}
+        ages = track_age or communication['communication'] == 'budget' and sampling == 'age'
+        self.shms = {}
+        shared = {}
+        for name, shape in state_shapes(num_swarmalators, use_phasors, ages).items():
+            shm = shared_memory.SharedMemory(create=True, size=max(8 * math.prod(shape), 1))
+            shared[name] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            self.shms[name] = shm
+        if arrays is None: initial_arrays(num_swarmalators, memory_init, np.random.default_rng(seed), use_phasors, shared)
+        else:
+            for name, array in shared.items(): array[:] = arrays[name] if name in arrays else 0.0
+        arrays = shared
+        self.swarm = Swarm(num_swarmalators, memory_init, use_phasors, memory_budget, arrays=arrays, **communication)
+        self.env_memory = self.swarm.env_memory
+        self.env_velocities = self.swarm.env_velocities
+
+        # step parameters: command (0: stop, 1: scan, think and move, 2: yell), delta_t, J, K, coupling_probability, alpha
+        # each worker waits for its own start semaphore, so a fast worker cannot take the turn of a slow one
+        self.control = mp.Array('d', 6, lock=False)
+        self.starts = [mp.Semaphore(0) for _ in range(self.num_workers)]
+        self.done = mp.Semaphore(0)
+        self.failed = mp.Event()
+
+        layout = {name: (shm.name, arrays[name].shape) for name, shm in self.shms.items()}
+        bounds = np.linspace(0, num_swarmalators, self.num_workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(self.num_workers)
+        self.workers = []
+        for w in range(self.num_workers):
+            p = mp.Process(
+                target=_worker,
+                args=(layout, slice(int(bounds[w]), int(bounds[w + 1])), num_swarmalators, memory_init, use_phasors, memory_budget, seeds[w], communication,
+                      self.control, self.starts[w], self.done, self.failed),
+                daemon=True)
+            p.start()
+            self.workers.append(p)
+
+    def step(self, delta_t: float, J: float, K: float, coupling_probability: float, alpha: float, profiler=None):
+        '''
+        Makes all swarmalators sync and swarm.
+
+        Parameters
+        ----------
+        delta_t : float
+            Time step of an iteration in seconds.
+        J : float
+            Phase attraction strength.
+        K : float
+            Phase coupling strength.
+        coupling_probability : float
+            Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration.
+        alpha : float
+            Momentum factor. Must be between 0 and 1.
+        profiler : Profiler, optional
+            Profiler used to measure the time until all blocks moved and yelled. default=`None`
+        '''
+        self.control[:] = [1.0, delta_t, J, K, coupling_probability, alpha]
+        if profiler is not None: profiler.start('scan+think+move')
+        self.__run() # all blocks moved
+        if profiler is not None:
+            profiler.stop('scan+think+move')
+            profiler.start('yell')
+        self.control[0] = 2.0
+        self.__run() # all blocks yelled
+        if profiler is not None: profiler.stop('yell')
+
+    def __run(self):
+        '''
+        Lets all workers execute the current command and waits until they are done. Raises a BrokenBarrierError if a
+        worker failed, died or did not respond in time.
+        '''
+        if self.failed.is_set(): raise BrokenBarrierError('A worker of the parallel swarm failed.')
+        for start in self.starts: start.release()
+        deadline = time.monotonic() + self.timeout
+        for _ in self.workers:
+            while not self.done.acquire(timeout=POLL_INTERVAL):
+                if self.failed.is_set() or not all(p.is_alive() for p in self.workers):
+                    self.failed.set()
+                    raise BrokenBarrierError('A worker of the parallel swarm failed.')
+                if time.monotonic() > deadline:
+                    self.failed.set()
+                    raise BrokenBarrierError(f'A worker of the parallel swarm did not respond within {self.timeout}s.')
+
+    def close(self):
+        '''
+        Stops the worker processes and releases the shared memory.
+        '''
+        if not self.workers: return
+        self.control[0] = 0.0
+        for start in self.starts: start.release()
+        for p in self.workers:
+            p.join(self.timeout)
+            if p.is_alive():
+                # stuck in a step that failed elsewhere or not responding at all
+                p.kill()
+                p.join()
+        self.workers = []
+
+        self.swarm = self.env_memory = self.env_velocities = None
+        for shm in self.shms.values():
+            shm.close()
+            shm.unlink()
+        self.shms = {}
+
+
+def _worker(layout: dict, rows: slice, num_swarmalators: int, memory_init: str, use_phasors: bool, memory_budget: int, seed: np.random.SeedSequence, communication: dict,
+    control, start, done, failed):
+    '''
+    Steps a block of swarmalators of a shared swarm until the stop command is received.
+    '''
+    shms = {}
+    try:
+        for name, (shm_name, _) in layout.items(): shms[name] = shared_memory.SharedMemory(name=shm_name)
+        arrays = {name: np.ndarray(shape, dtype=np.float64, buffer=shms[name].buf) for name, (_, shape) in layout.items()}
+        swarm = Swarm(num_swarmalators, memory_init, use_phasors, memory_budget, seed, arrays, **communication)
+
+        while True:
+            start.acquire()
+            command, delta_t, J, K, coupling_probability, alpha = control[:]
+            if command == 0.0: break
+            if command == 1.0:
+                swarm.scan(coupling_probability, rows)
+                swarm.think(J, K, alpha, rows)
+                swarm.move(delta_t, rows)
+            else: swarm.yell(rows)
+            done.release()
+    except Exception:
+        # the parent stops waiting for the step instead of blocking forever
+        failed.set()
+        raise
+    finally:
+        swarm = arrays = None
+        for shm in shms.values(): shm.close()
@@ -0,0 +1,167 @@
+import csv
+import json
+import time
+from collections import deque
+import numpy as np
+
+
+class Profiler:
+    def __init__(self, sample_every: int=1, window: int=1000, max_events: int=100000):
+        '''
+        Instantiates a Profiler object that measures the time spent in the phases of simulation steps.
+        Time spent in a phase is accumulated over a step, e.g. over all swarmalators of the agent-based engine.
+
+        Parameters
+        ----------
+        sample_every : int, optional
+            Only every n-th step is measured. default=`1`
+        window : int, optional
+            Number of most recent samples per phase used for statistics. default=`1000`
+        max_events : int, optional
+            Maximum number of events kept for the timeline export. default=`100000`
+        '''
+        self.sample_every = max(1, sample_every)
+        self.window = window
+        self.events = deque(maxlen=max_events)
+        self.samples = {}
+        self.active = False
+        self.iteration = 0
+        self.__step_start = 0
+        self.__step_phases = {}
+        self.__running = {}
+
+    def start_step(self, iteration: int):
+        '''
+        Starts measuring a step, if it is sampled.
+
+        Parameters
+        ----------
+        iteration : int
+            Iteration of the step.
+        '''
+        self.iteration = iteration
+        self.active = iteration % self.sample_every == 0
+        if not self.active: return
+        self.__step_phases = {}
+        self.__step_start = time.perf_counter_ns()
+
+    def end_step(self):
+        '''
+        Ends measuring a step and records the accumulated time of each phase.
+        '''
+        if not self.active: return
+        end = time.perf_counter_ns()
+        self.__record('step', self.__step_start, end - self.__step_start)
+        for name, (first_start, duration) in self.__step_phases.items(): self.__record(name, first_start, duration)
+        self.active = False
+
+    def start(self, name: str):
+        '''
+        Starts the timer of a phase.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+        '''
+        if self.active: self.__running[name] = time.perf_counter_ns()
+
+    def stop(self, name: str):
+        '''
+        Stops the timer of a phase and adds the elapsed time to the current step.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+        '''
+        if not self.active: return
+        end = time.perf_counter_ns()
+        start = self.__running.pop(name)
+        first_start, duration = self.__step_phases.get(name, (start, 0))
+        self.__step_phases[name] = (first_start, duration + end - start)
+
+    def __record(self, name: str, start: int, duration: int):
+        '''
+        Stores a sample of a phase.
+        '''
+        if name not in self.samples: self.samples[name] = deque(maxlen=self.window)
+        self.samples[name].append(duration)
+        self.events.append((name, self.iteration, start, duration))
+
+    def stats(self):
+        '''
+        Computes statistics of the most recent samples of each phase.
+
+        Returns
+        ----------
+        stats : dict
+            Dictionary of the form { phase : { 'count' : int, 'mean' : float, 'p50' : float, 'p99' : float } } with times in ms.
+        '''
+        stats = {}
+        for name, samples in self.samples.items():
+            s = np.array(samples) / 1e6
+            p50, p99 = np.percentile(s, [50, 99])
+            stats[name] = {'count': len(s), 'mean': float(np.mean(s)), 'p50': float(p50), 'p99': float(p99)}
+        return stats
+
+    def summary(self):
+        '''
+        Returns a text table of the statistics of each phase.
+
+        Returns
+        ----------
+        summary : str
+            Statistics of each phase in ms.
+        '''
+        lines = [f'{"phase":<8}{"mean":>9}{"p50":>9}{"p99":>9}']
+        for name, s in self.stats().items():
+            lines.append(f'{name:<8}{s["mean"]:>9.3f}{s["p50"]:>9.3f}{s["p99"]:>9.3f}')
+        return '\n'.join(lines)
+
+    def export_csv(self, filename: str):
+        '''
+        Exports the timeline of recorded events to a CSV-file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the CSV-file.
+        '''
+        with open(filename, 'w', newline='') as fp:
+            writer = csv.writer(fp)
+            writer.writerow(['phase', 'iteration', 'start_ns', 'duration_ns'])
+            writer.writerows(self.events)
+
+    def export_json(self, filename: str):
+        '''
+        Exports the timeline of recorded events and the statistics to a JSON-file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the JSON-file.
+        '''
+        events = [{'phase': e[0], 'iteration': e[1], 'start_ns': e[2], 'duration_ns': e[3]} for e in self.events]
+        with open(filename, 'w') as fp: json.dump({'stats': self.stats(), 'events': events}, fp)
+
+    def export_chrome_trace(self, filename: str):
+        '''
+        Exports the timeline of recorded events to a Chrome trace-event file that can be opened in chrome://tracing or Perfetto.
+        Each phase is shown as its own thread, since phase times are accumulated over a step.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the JSON-file.
+        '''
+        threads = {}
+        trace = []
+        for name, iteration, start, duration in self.events:
+            if name not in threads:
+                threads[name] = len(threads)
+                trace.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': threads[name], 'args': {'name': name}})
+            trace.append({
+                'name': name, 'ph': 'X', 'pid': 0, 'tid': threads[name],
+                'ts': start / 1e3, 'dur': duration / 1e3, 'args': {'iteration': iteration}})
+        with open(filename, 'w') as fp: json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, fp)
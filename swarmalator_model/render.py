@@ -0,0 +1,302 @@
+import os
+import math
+import zlib
+import pickle
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from swarmalator_model import helper_functions as hlp
+
+
+LUT = hlp.phase_lut()
+
+
+def background(size: int, plot_type: str='positions'):
+    '''
+    Rasterizes the coordinate system of a plot.
+
+    Parameters
+    ----------
+    size : int
+        Width and height of the image in pixels.
+    plot_type : {'positions', 'phases'}, optional
+        Type of plot. default=`positions`
+
+    Returns
+    ----------
+    image : np.ndarray
+        RGB image of shape (size, size, 3).
+    '''
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    areas = 8
+    for i in range(1, areas):
+        c = int(size / areas * i)
+        if i == areas / 2:
+            image[c - 1:c + 1, :] = 0 # main x axis
+            image[:, c - 1:c + 1] = 0 # main y axis
+        else:
+            image[c, ::4] = 160 # helper x axis
+            image[::4, c] = 160 # helper y axis
+    return image
+
+def rasterize_positions(image: np.ndarray, positions: np.ndarray, phases: np.ndarray, velocities: np.ndarray, global_phase: float=0.0):
+    '''
+    Draws swarmalators as arrows colored by their phase into an image, like the positions view of the simulation.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        RGB image of shape (size, size, 3) to draw into.
+    positions : np.ndarray
+        Positions of shape (n, 2).
+    phases : np.ndarray
+        Phases of shape (n, ).
+    velocities : np.ndarray
+        Velocities of shape (n, 2). If `None`, swarmalators are drawn as dots.
+    global_phase : float, optional
+        Phase of the simulation clock added to the phases for coloring. default=`0.0`
+    '''
+    size = image.shape[0]
+    length = max(size / 120 * 1.6, 2.0)
+    x = size * ((positions[:, 0] + 2.0) / 4.0)
+    y = size * ((-positions[:, 1] + 2.0) / 4.0)
+    p = hlp.wrap_phase(global_phase + phases)
+    colors = LUT[((p + math.pi) / (2.0 * math.pi) * len(LUT)).astype(int) % len(LUT)]
+
+    if velocities is None:
+        splat(image, x, y, colors, radius=1)
+        return
+
+    # unit direction of each arrow, swarmalators without velocity point to the right
+    norms = np.linalg.norm(velocities, axis=1)
+    direction = np.divide(velocities, norms[:, None], out=np.tile([1.0, 0.0], (len(velocities), 1)), where=norms[:, None] > 0)
+    dx = direction[:, 0] * length
+    dy = -direction[:, 1] * length
+
+    # shaft sampled at pixel steps and two head strokes rotated by +-150 degrees
+    t = np.linspace(0.0, 1.0, int(length) + 2)
+    px = [x[:, None] + dx[:, None] * t]
+    py = [y[:, None] + dy[:, None] * t]
+    for angle in (5.0 * math.pi / 6.0, -5.0 * math.pi / 6.0):
+        c, s = math.cos(angle), math.sin(angle)
+        hx = (dx * c - dy * s) * 0.4
+        hy = (dx * s + dy * c) * 0.4
+        px.append(x[:, None] + dx[:, None] + hx[:, None] * t)
+        py.append(y[:, None] + dy[:, None] + hy[:, None] * t)
+
+    n = len(t)
+    splat(image, np.concatenate(px, axis=1).ravel(), np.concatenate(py, axis=1).ravel(), np.repeat(colors, 3 * n, axis=0))
+
+def rasterize_phases(image: np.ndarray, positions: np.ndarray, phases: np.ndarray):
+    '''
+    Draws swarmalators as dots at their polar angle of location and phase into an image, like the phases view of the simulation.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        RGB image of shape (size, size, 3) to draw into.
+    positions : np.ndarray
+        Positions of shape (n, 2).
+    phases : np.ndarray
+        Phases of shape (n, ).
+    '''
+    size = image.shape[0]
+    angles = np.arctan2(positions[:, 1], positions[:, 0])
+    x = size * ((angles / math.pi + 1.0) / 2.0)
+    y = size * ((-phases / math.pi + 1.0) / 2.0)
+    splat(image, x, y, np.zeros((len(x), 3), dtype=np.uint8), radius=1)
+
+def splat(image: np.ndarray, x: np.ndarray, y: np.ndarray, colors: np.ndarray, radius: int=0):
+    '''
+    Sets the pixels at the given coordinates to the given colors. Points outside the image are skipped.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        RGB image of shape (height, width, 3).
+    x : np.ndarray
+        X coordinates in pixels of shape (m, ).
+    y : np.ndarray
+        Y coordinates in pixels of shape (m, ).
+    colors : np.ndarray
+        RGB colors of shape (m, 3).
+    radius : int, optional
+        Points are drawn as squares of (2 * radius + 1) pixels. default=`0`
+    '''
+    xi = np.round(x).astype(np.int64)
+    yi = np.round(y).astype(np.int64)
+    for ox in range(-radius, radius + 1):
+        for oy in range(-radius, radius + 1):
+            xs = xi + ox
+            ys = yi + oy
+            inside = (xs >= 0) & (xs < image.shape[1]) & (ys >= 0) & (ys < image.shape[0])
+            image[ys[inside], xs[inside]] = colors[inside]
+
+def render_frame(dataset, index: int, size: int=500, plot_type: str='positions', base: np.ndarray=None):
+    '''
+    Renders one logged iteration of a dataset.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object with logged positions and phases.
+    index : int
+        Index of the logged iteration.
+    size : int, optional
+        Width and height of the image in pixels. default=`500`
+    plot_type : {'positions', 'phases'}, optional
+        Type of plot. default=`positions`
+    base : np.ndarray, optional
+        Pre-rendered background. default=`None`
+
+    Returns
+    ----------
+    image : np.ndarray
+        RGB image of shape (size, size, 3).
+    '''
+    image = (base if base is not None else background(size, plot_type)).copy()
+    positions = np.asarray(dataset.positions[index])
+    phases = np.asarray(dataset.phases[index])
+    if plot_type == 'positions':
+        velocities = np.asarray(dataset.velocities[index]) if dataset.velocities is not None else None
+        iteration = dataset.get_iterations()[index]
+        global_phase = hlp.clock_phase(iteration, dataset.parameters['dt'])
+        rasterize_positions(image, positions, phases, velocities, global_phase)
+    else:
+        rasterize_phases(image, positions, phases)
+    return image
+
+def iter_frames(dataset, frames: range=None, size: int=500, plot_type: str='positions', workers: int=1, batch: int=16):
+    '''
+    Renders logged iterations of a dataset and yields the images in order. Batches of frames are rendered in a
+    process pool with a bounded number of batches in flight, so frames are streamed rather than held in memory.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object. Must have been saved to or loaded from a file to be rendered in parallel.
+    frames : range, optional
+        Indices of logged iterations to be rendered. All if `None`. default=`None`
+    size : int, optional
+        Width and height of the images in pixels. default=`500`
+    plot_type : {'positions', 'phases'}, optional
+        Type of plot. default=`positions`
+    workers : int, optional
+        Number of worker processes. default=`1`
+    batch : int, optional
+        Number of frames rendered per task. default=`16`
+
+    Yields
+    ----------
+    image : np.ndarray
+        RGB image of shape (size, size, 3).
+    '''
+    if frames is None: frames = range(len(dataset.positions))
+    filename = getattr(dataset, 'filename', None)
+
+    if workers <= 1 or filename is None:
+        base = background(size, plot_type)
+        for f in frames: yield render_frame(dataset, f, size, plot_type, base)
+        return
+
+    batches = [frames[b:b + batch] for b in range(0, len(frames), batch)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(filename,)) as pool:
+        pending = deque()
+        for b in batches:
+            pending.append(pool.submit(_render_batch, b, size, plot_type))
+            if len(pending) >= 2 * workers:
+                for image in pending.popleft().result(): yield image
+        while pending:
+            for image in pending.popleft().result(): yield image
+
+def render_frames(dataset, directory: str, frames: range=None, size: int=500, plot_type: str='positions', workers: int=1):
+    '''
+    Renders logged iterations of a dataset to PNG files.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object.
+    directory : str
+        Directory the frames are written to.
+    frames : range, optional
+        Indices of logged iterations to be rendered. All if `None`. default=`None`
+    size : int, optional
+        Width and height of the images in pixels. default=`500`
+    plot_type : {'positions', 'phases'}, optional
+        Type of plot. default=`positions`
+    workers : int, optional
+        Number of worker processes. default=`1`
+    '''
+    if frames is None: frames = range(len(dataset.positions))
+    if not os.path.exists(directory): os.makedirs(directory)
+    for f, image in zip(frames, iter_frames(dataset, frames, size, plot_type, workers)):
+        write_png(os.path.join(directory, f'{f:06d}.png'), image)
+
+def render_animation(dataset, filename: str, frames: range=None, size: int=500, plot_type: str='positions', workers: int=1, fps: int=20):
+    '''
+    Renders logged iterations of a dataset to an animated GIF file. Requires Pillow, which is installed with matplotlib.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Dataset object.
+    filename : str
+        Name of the GIF file.
+    frames : range, optional
+        Indices of logged iterations to be rendered. All if `None`. default=`None`
+    size : int, optional
+        Width and height of the images in pixels. default=`500`
+    plot_type : {'positions', 'phases'}, optional
+        Type of plot. default=`positions`
+    workers : int, optional
+        Number of worker processes. default=`1`
+    fps : int, optional
+        Frames per second. default=`20`
+    '''
+    from PIL import Image
+
+    images = (Image.fromarray(image) for image in iter_frames(dataset, frames, size, plot_type, workers))
+    first = next(images)
+    first.save(filename, save_all=True, append_images=images, duration=int(1000 / fps), loop=0)
+
+def write_png(filename: str, image: np.ndarray):
+    '''
+    Writes an RGB image to a PNG file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the PNG file.
+    image : np.ndarray
+        RGB image of shape (height, width, 3) and type uint8.
+    '''
+    height, width, _ = image.shape
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1).tobytes()
+
+    def chunk(tag: bytes, data: bytes):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(filename, 'wb') as fp:
+        fp.write(b'\x89PNG\r\n\x1a\n')
+        fp.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        fp.write(chunk(b'IDAT', zlib.compress(raw, 6)))
+        fp.write(chunk(b'IEND', b''))
+
+
+_worker_dataset = None
+
+def _init_worker(filename: str):
+    '''
+    Loads the dataset once per worker process.
+    '''
+    global _worker_dataset
+    with open(filename, 'rb') as fp: _worker_dataset = pickle.load(fp)
+
+def _render_batch(frames: range, size: int, plot_type: str):
+    '''
+    Renders a batch of frames of the dataset of the worker process.
+    '''
+    base = background(size, plot_type)
+    return [render_frame(_worker_dataset, f, size, plot_type, base) for f in frames]
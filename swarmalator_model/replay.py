@@ -0,0 +1,314 @@
+import os
+import pickle
+import threading
+import numpy as np
+import tkinter as tk
+import customtkinter as ctk
+from swarmalator_model import helper_functions as hlp
+from swarmalator_model import drawing
+from swarmalator_model.monitor import Monitor_reader
+
+
+class Frame_source:
+    def __init__(self, source):
+        '''
+        Instantiates a Frame_source object giving random access to the logged iterations of a run without loading it
+        completely. Reading a frame costs the same regardless of its position in the run.
+
+        Parameters
+        ----------
+        source : str or Dataset
+            Directory written by `Dataset.export_arrays`, whose arrays are memory-mapped, or a Dataset object.
+            Compressed datasets only decode the chunk containing a frame.
+        '''
+        if isinstance(source, str):
+            self.memory = np.load(os.path.join(source, 'memory.npy'), mmap_mode='r')
+            path = os.path.join(source, 'velocities.npy')
+            self.velocities = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+            self.iterations = np.load(os.path.join(source, 'iterations.npy'))
+            with open(os.path.join(source, 'parameters.pkl'), 'rb') as fp: self.parameters = pickle.load(fp)
+            self.positions = self.phases = None
+        else:
+            if source.positions is None or source.phases is None:
+                raise ValueError('Positions and phases are required.')
+            self.memory = None
+            self.positions = source.positions
+            self.phases = source.phases
+            self.velocities = source.velocities
+            self.iterations = source.get_iterations()
+            self.parameters = source.parameters
+
+    def __len__(self):
+        return len(self.iterations)
+
+    def frame(self, index: int):
+        '''
+        Reads one logged iteration.
+
+        Parameters
+        ----------
+        index : int
+            Index of the logged iteration.
+
+        Returns
+        ----------
+        memory : np.ndarray
+            Positions and phases of shape (n, 3).
+        velocities : np.ndarray
+            Velocities of shape (n, 2). `None` if velocities were not logged.
+        iteration : int
+            Iteration of the frame.
+        '''
+        if self.memory is not None: memory = np.array(self.memory[index])
+        else: memory = np.column_stack([np.asarray(self.positions[index]), np.asarray(self.phases[index])])
+        velocities = np.array(self.velocities[index]) if self.velocities is not None else None
+        return memory, velocities, int(self.iterations[index])
+
+
+class Prefetch_buffer:
+    def __init__(self, source: Frame_source, size: int=8):
+        '''
+        Instantiates a Prefetch_buffer object that reads the frames following the current position in a background
+        thread, so playback does not wait for disk reads. Only `size` frames are held in memory.
+
+        Parameters
+        ----------
+        source : Frame_source
+            Source of the frames.
+        size : int, optional
+            Number of frames read ahead. default=`8`
+        '''
+        self.source = source
+        self.size = size
+        self.frames = {}
+        self.position = 0
+        self.step = 1
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self.__fill, daemon=True)
+        self.thread.start()
+
+    def get(self, index: int, step: int=1):
+        '''
+        Returns a frame and moves the read-ahead window behind it. Frames that are not buffered (e.g. after seeking) are read directly.
+
+        Parameters
+        ----------
+        index : int
+            Index of the logged iteration.
+        step : int, optional
+            Number of frames playback advances per tick. default=`1`
+
+        Returns
+        ----------
+        frame : tuple
+            Memory, velocities and iteration of the frame.
+        '''
+        with self.lock:
+            frame = self.frames.get(index)
+            self.position = index
+            self.step = max(step, 1)
+            wanted = self.__wanted()
+            self.frames = {i: f for i, f in self.frames.items() if i in wanted}
+        if frame is None: frame = self.source.frame(index)
+        self.wake.set()
+        return frame
+
+    def close(self):
+        '''
+        Stops the background thread.
+        '''
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+
+    def __wanted(self):
+        return set(range(self.position + self.step, min(self.position + self.step * (self.size + 1), len(self.source)), self.step))
+
+    def __fill(self):
+        while self.running:
+            with self.lock: missing = sorted(self.__wanted() - set(self.frames))
+            if not missing:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            frame = self.source.frame(missing[0])
+            with self.lock:
+                if missing[0] in self.__wanted(): self.frames[missing[0]] = frame
+
+
+class Replay:
+    def __init__(self, source, plot_size: int=750, plot_type: str='positions', prefetch: int=8):
+        '''
+        Instantiates a viewer that plays back a saved run with play/pause, single steps, adjustable speed and seeking.
+        Frames are read lazily, so memory usage does not depend on the length of the run.
+
+        Parameters
+        ----------
+        source : str or Dataset
+            Directory written by `Dataset.export_arrays` or a Dataset object.
+        plot_size : int, optional
+            Size of the tkinter canvas. default=`750`
+        plot_type : {'positions', 'phases'}, optional
+            Type of data to be displayed. default=`positions`
+        prefetch : int, optional
+            Number of frames read ahead during playback. default=`8`
+        '''
+        self.source = Frame_source(source)
+        self.buffer = Prefetch_buffer(self.source, prefetch)
+        self.plot_size = plot_size
+        self.time_step = self.source.parameters['dt']
+        self.index = 0
+        self.playing = False
+
+        self.__init_canvas(plot_type)
+
+    def run(self):
+        '''
+        Starts the main loop.
+        '''
+        self.__draw_coordinate_system()
+        self.__show(0)
+        self.window.mainloop()
+        self.buffer.close()
+
+    def __init_canvas(self, plot_type: str):
+        '''
+        Initializes the canvas object and all control elements.
+        '''
+        self.window = ctk.CTk()
+        self.window.title('Swarmalators Replay')
+        self.window.configure(bg='white')
+
+        self.canvas = ctk.CTkCanvas(master=self.window, width=self.plot_size, height=self.plot_size, bg='white')
+        self.canvas.grid(row=0, column=0, columnspan=5)
+
+        # Seek slider
+        last = max(len(self.source) - 1, 1)
+        self.slider_seek = ctk.CTkSlider(self.window, from_=0, to=last, number_of_steps=last, width=self.plot_size, command=lambda v: self.__show(int(v)))
+        self.slider_seek.set(0)
+        self.slider_seek.grid(row=1, column=0, columnspan=5)
+
+        # Buttons
+        ctk.CTkButton(self.window, text='<', width=40, command=lambda: self.__show(self.index - 1)).grid(row=2, column=0)
+        self.btn_play = ctk.CTkButton(self.window, text='Play', command=self.__toggle)
+        self.btn_play.grid(row=2, column=1)
+        ctk.CTkButton(self.window, text='>', width=40, command=lambda: self.__show(self.index + 1)).grid(row=2, column=2)
+
+        # Speed slider
+        ctk.CTkLabel(self.window, text='Speed').grid(row=2, column=3, sticky=tk.E)
+        self.slider_speed = ctk.CTkSlider(self.window, from_=-3, to=3, number_of_steps=6, command=lambda v: self.lbl_speed.configure(text=f'{2 ** int(v):g}x'))
+        self.slider_speed.set(0)
+        self.slider_speed.grid(row=2, column=4)
+        self.lbl_speed = ctk.CTkLabel(self.window, text='1x')
+        self.lbl_speed.grid(row=3, column=4)
+
+        # Plot type
+        self.var_plot_type = tk.StringVar(self.window, plot_type)
+        ctk.CTkRadioButton(self.window, text='positions', variable=self.var_plot_type, value='positions', command=self.__redraw).grid(row=3, column=1)
+        ctk.CTkRadioButton(self.window, text='phases', variable=self.var_plot_type, value='phases', command=self.__redraw).grid(row=3, column=2)
+
+        # Label Iteration
+        self.lbl_iteration = ctk.CTkLabel(self.window, text='Iteration 1')
+        self.lbl_iteration.grid(row=3, column=0, sticky='w')
+
+    def __toggle(self):
+        '''
+        Starts or pauses the playback.
+        '''
+        self.playing = not self.playing
+        self.btn_play.configure(text='Pause' if self.playing else 'Play')
+        if self.playing: self.__play()
+
+    def __play(self):
+        '''
+        Shows the next frame and schedules the one after. Speeds above 1x skip frames, speeds below 1x wait longer.
+        '''
+        if not self.playing: return
+        speed = 2 ** int(self.slider_speed.get())
+        step = max(int(speed), 1)
+        if self.index + step >= len(self.source):
+            self.__toggle()
+            return
+        self.__show(self.index + step, step)
+        self.slider_seek.set(self.index)
+        self.canvas.after(max(int(self.time_step * 1000.0 / min(speed, 1.0)), 1), self.__play)
+
+    def __show(self, index: int, step: int=1):
+        '''
+        Draws a logged iteration.
+        '''
+        self.index = min(max(index, 0), len(self.source) - 1)
+        memory, velocities, iteration = self.buffer.get(self.index, step)
+        drawing.draw_swarmalators(self.canvas, self.plot_size, self.var_plot_type.get(), memory, velocities, hlp.clock_phase(iteration, self.time_step))
+        self.lbl_iteration.configure(text=f'Iteration {iteration}')
+
+    def __redraw(self):
+        self.__draw_coordinate_system()
+        self.__show(self.index)
+
+    def __draw_coordinate_system(self):
+        drawing.draw_coordinate_system(self.canvas, self.plot_size, self.var_plot_type.get())
+
+
+class Monitor_view:
+    def __init__(self, name: str, plot_size: int=750, plot_type: str='positions', interval: int=100):
+        '''
+        Instantiates a viewer that attaches to the monitor of a running simulation and shows its latest state. The
+        simulation is never blocked or slowed down by the viewer, which can be closed at any time.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory block the simulation publishes to.
+        plot_size : int, optional
+            Size of the tkinter canvas. default=`750`
+        plot_type : {'positions', 'phases'}, optional
+            Type of data to be displayed. default=`positions`
+        interval : int, optional
+            Time between two reads in ms. default=`100`
+        '''
+        self.reader = Monitor_reader(name)
+        self.plot_size = plot_size
+        self.interval = interval
+        self.iteration = None
+
+        self.window = ctk.CTk()
+        self.window.title(f'Swarmalators Monitor {name}')
+        self.window.configure(bg='white')
+
+        self.canvas = ctk.CTkCanvas(master=self.window, width=self.plot_size, height=self.plot_size, bg='white')
+        self.canvas.grid(row=0, column=0, columnspan=3)
+
+        self.var_plot_type = tk.StringVar(self.window, plot_type)
+        ctk.CTkRadioButton(self.window, text='positions', variable=self.var_plot_type, value='positions', command=self.__draw_coordinate_system).grid(row=1, column=1)
+        ctk.CTkRadioButton(self.window, text='phases', variable=self.var_plot_type, value='phases', command=self.__draw_coordinate_system).grid(row=1, column=2)
+
+        self.lbl_metrics = ctk.CTkLabel(self.window, text='Waiting for data')
+        self.lbl_metrics.grid(row=1, column=0, sticky='w')
+
+    def run(self):
+        '''
+        Starts the main loop. The viewer detaches when the window is closed.
+        '''
+        self.__draw_coordinate_system()
+        self.__poll()
+        self.window.mainloop()
+        self.reader.close()
+
+    def __poll(self):
+        '''
+        Reads the latest state and draws it if it is new.
+        '''
+        state = self.reader.read()
+        if state is not None and state['iteration'] != self.iteration:
+            self.iteration = state['iteration']
+            global_phase = hlp.clock_phase(state['iteration'], state['simulation_time'] / state['iteration'])
+            drawing.draw_swarmalators(self.canvas, self.plot_size, self.var_plot_type.get(), state['memory'], state['velocities'], global_phase)
+            self.lbl_metrics.configure(text=f'Iteration {state["iteration"]}   Average speed {state["avg_speed"]:.4f}   Sync {state["sync"]:.3f}')
+        self.canvas.after(self.interval, self.__poll)
+
+    def __draw_coordinate_system(self):
+        self.iteration = None
+        drawing.draw_coordinate_system(self.canvas, self.plot_size, self.var_plot_type.get())
@@ -1,12 +1,12 @@
 import time
-import math
-import numpy as np
 import tkinter as tk
 import customtkinter as ctk
-from swarmalator_model.swarmalator import Swarmalator
-from swarmalator_model.dataset import Dataset
+from swarmalator_model.core import Simulation_core
 from swarmalator_model.preset import Preset
+from swarmalator_model.profiling import Profiler
+from swarmalator_model.log_policy import Log_policy
 from swarmalator_model import helper_functions as hlp
+from swarmalator_model import drawing
 
 
 class Simulation:
@@ -20,7 +20,22 @@ class Simulation:
         plot_type: str='positions',
         alpha: float=0,
         max_simulation_time: float=0,
-        auto: bool=False):
+        auto: bool=False,
+        use_phasors: bool=False,
+        engine: str='agents',
+        memory_budget: int=2**24,
+        num_workers: int=1,
+        profiling: bool=False,
+        profile_sample_every: int=1,
+        compression: dict=None,
+        log_policy: Log_policy=None,
+        seed: int=None,
+        renderer: str='items',
+        initial_state=None,
+        initial_index: int=-1,
+        communication: str='probabilistic',
+        messages: int=1,
+        sampling: str='uniform'):
         '''
         Instantiates the environment for a swarmalator-simulation.
 
@@ -53,6 +68,40 @@ class Simulation:
             Time in s after which the simulation is stopped automatically. The simulation does not stop, if it is `0`. default=`0`
         auto : bool, optional
             If true, the simulation is automatically started and stopped. default=`0`
+        use_phasors : bool, optional
+            If true, swarmalators keep phases as unit phasors to avoid per-pair trigonometry. default=`False`
+        engine : {'agents', 'swarm'}, optional
+            Simulation engine. default=`agents`
+            `agents`: swarmalator objects that scan, think, move and yell one after another.
+            `swarm`: vectorized population in which all swarmalators step simultaneously using a tiled pairwise kernel.
+        memory_budget : int, optional
+            Maximum number of bytes used for temporary arrays of the `swarm` engine. default=`2**24`
+        num_workers : int, optional
+            Number of worker processes that step blocks of swarmalators of the `swarm` engine in shared memory. default=`1`
+        profiling : bool, optional
+            Measures the time spent in each phase of a step. The statistics can be shown as an overlay and exported using the `profiler` attribute. default=`False`
+        profile_sample_every : int, optional
+            Only every n-th step is profiled. default=`1`
+        compression : dict, optional
+            Keyword arguments of `Dataset.compress` used to compress saved trajectories, e.g. `{'error_bound': 1e-4}`. If `None`, trajectories are saved uncompressed. default=`None`
+        log_policy : Log_policy, optional
+            Policy deciding which iterations, fields and swarmalators are logged. If `None`, positions, phases and velocities of all swarmalators are logged every iteration. default=`None`
+        seed : int, optional
+            Seed of the random number generators used to initialize and run the swarmalators. default=`None`
+        renderer : {'items', 'raster'}, optional
+            Method of drawing the swarmalators. default=`items`
+            `items`: one canvas item per swarmalator.
+            `raster`: all swarmalators are drawn into an image that is shown as a single canvas item, which stays fast for thousands of swarmalators.
+        initial_state : Dataset, np.ndarray or dict, optional
+            State the simulation starts from, see `Simulation_core`. The number of swarmalators is taken from the state. default=`None`
+        initial_index : int, optional
+            Index of the logged iteration used if `initial_state` is a Dataset. default=`-1`
+        communication : {'probabilistic', 'budget'}, optional
+            Communication model, see `Simulation_core`. In the `budget` model the coupling probability is not used. default=`probabilistic`
+        messages : int, optional
+            Number of messages a swarmalator receives per step in the `budget` model. default=`1`
+        sampling : {'uniform', 'proximity', 'age'}, optional
+            How senders are chosen in the `budget` model. default=`uniform`
 
         '''
         self.plot_size = plot_size
@@ -60,15 +109,22 @@ class Simulation:
         self.alpha = alpha
         self.max_simulation_time = max_simulation_time
         self.auto = auto
-
-        self.memory_log = []
-        self.velocity_log = []
-        self.list_of_swarmalators = []
-
-        self.iteration = 1
-        self.simulaton_time = 0
+        self.use_phasors = use_phasors
+        self.engine = engine
+        self.memory_budget = memory_budget
+        self.num_workers = num_workers
+        self.profiler = Profiler(profile_sample_every) if profiling else None
+        self.compression = compression
+        self.log_policy = log_policy if log_policy is not None else Log_policy()
+        self.seed = seed
+        self.renderer = renderer
+        self.initial_state = initial_state
+        self.initial_index = initial_index
+        self.communication = {'communication': communication, 'messages': messages, 'sampling': sampling}
+        self.photo = None
+
+        self.core = None
         self.comp_time = 0
-        self.global_phase = 0
         self.paused = False
         self.stopped = True
 
@@ -87,33 +143,41 @@ class Simulation:
         '''
         Makes each swarmalator perform one step of syncing and moving.
         '''
-        if self.simulaton_time < self.max_simulation_time or self.max_simulation_time == 0.0:
+        if self.core.simulation_time < self.max_simulation_time or self.max_simulation_time == 0.0:
             wait_time = int(self.time_step * 1000.0)
             self.simulation_type = str(self.var_plot_type.get()) # read simulation type input to make live-switching possible
 
             if not self.stopped:
                 if not self.paused:
-                    start = time.time()
+                    start = time.perf_counter()
+
+                    # only pass the profiler on for sampled steps
+                    profiler = None
+                    if self.profiler is not None:
+                        self.profiler.start_step(self.core.iteration)
+                        if self.profiler.active: profiler = self.profiler
 
-                    # update swarmalators
-                    for s in self.list_of_swarmalators: s.run(self.memory, self.velocities, self.time_step, self.J, self.K, self.coupling_probability, self.alpha)
+                    # update swarmalators and log
+                    self.core.step(profiler)
+
+                    if profiler is not None: profiler.start('draw')
                     self.__draw_swarmalators()
+                    if profiler is not None: profiler.stop('draw')
 
                     # log time
-                    end = time.time()
+                    end = time.perf_counter()
                     self.comp_time = int((end - start) * 1000)
                     dt = int(self.time_step * 1000)
                     wait_time = int(max(dt - self.comp_time, 1))
-                    self.simulaton_time += self.time_step
 
                     # write data to labels
+                    if profiler is not None: profiler.start('labels')
                     self.__update_labels()
+                    if profiler is not None: profiler.stop('labels')
 
-                    # logging
-                    if self.logging: self.__log()
-
-                    self.iteration += 1
-                    self.__tick(frequency=0.5)
+                    if profiler is not None:
+                        profiler.end_step()
+                        if self.var_overlay.get(): self.__draw_overlay()
 
                 self.canvas.after(wait_time, self.__step)
         else:
@@ -121,25 +185,6 @@ class Simulation:
 
     #endregion
 
-    #region Other
-    def __log(self):
-        '''
-        Stores the current memory and velocity to seperate lists each iteration for later analysis.
-        '''
-        self.memory_log.append(self.memory.copy())
-        self.velocity_log.append(self.velocities.copy())
-    
-    def __tick(self, frequency):
-        '''
-        Updates the simulation clock.
-        '''
-        p = self.global_phase + (2 * math.pi * self.time_step * frequency)
-        if p > math.pi: p -= 2 * math.pi
-        if p < -math.pi: p += 2 * math.pi
-        self.global_phase = p
-
-    #endregion
-
     #region Initialization
     def __init_canvas(self, num_swarmalators: int, memory_init: str, time_step: float, coupling_probability: float, J: float, K: float, alpha: float, plot_type: str):
         '''
@@ -179,6 +224,7 @@ class Simulation:
         self.sim.configure(bg='white')
         
         self.sim.title('Swarmalators')
+        self.sim.protocol('WM_DELETE_WINDOW', self.__close_window)
 
         self.sim.columnconfigure(0, weight=5)
         self.sim.columnconfigure(4, weight=5)
@@ -196,7 +242,7 @@ class Simulation:
         # Entry Number of Swarmalators
         ctk.CTkLabel(self.sim, text='Number of swarmalators').grid(row=1, column=7, sticky=tk.W)
 
-        self.slider_num_swarmalators = ctk.CTkSlider(self.sim, from_=50, to=500, number_of_steps=45, command=lambda v: self.lbl_num_swarmalators.configure(text=str(int(v))))
+        self.slider_num_swarmalators = ctk.CTkSlider(self.sim, from_=50, to=10000, number_of_steps=995, command=lambda v: self.lbl_num_swarmalators.configure(text=str(int(v))))
         self.slider_num_swarmalators.set(num_swarmalators)
         self.slider_num_swarmalators.grid(row=1, column=8)
 
@@ -246,6 +292,12 @@ class Simulation:
         self.entry_alpha.insert(0, str(alpha))
         self.entry_alpha.grid(row=9, column=8)
 
+        # Checkbox Profiling Overlay
+        self.var_overlay = tk.BooleanVar(self.sim, False)
+        chk_overlay = ctk.CTkCheckBox(self.sim, text='Profiling overlay', variable=self.var_overlay, command=lambda: self.canvas.delete('overlay'))
+        chk_overlay.grid(row=10, column=8)
+        if self.profiler is None: chk_overlay.configure(state=tk.DISABLED)
+
         # Entry Plot Type
         ctk.CTkLabel(self.sim, text='Plot type').grid(row=11, column=7, sticky='w')
 
@@ -300,26 +352,6 @@ class Simulation:
 
         self.__read_inputs()
 
-    def __init_positions_phases(self):
-        '''
-        Initializes the environment memory with swarmalator positons, phases and velocities.
-        '''
-        self.memory = np.zeros((self.num_swarmalators, 3))
-        self.velocities = np.zeros((self.num_swarmalators, 2))
-
-        for i, s in enumerate(self.list_of_swarmalators):
-            self.memory[i] = s.memory[i]
-            self.velocities[i] = s.velocity
-
-    def __init_swarmalators(self):
-        '''
-        Adds new swarmalator objects to the envionment.
-        '''
-        self.list_of_swarmalators.clear()
-        for n in range(self.num_swarmalators):
-            s = Swarmalator(n, self.num_swarmalators, self.memory_init)
-            self.list_of_swarmalators.append(s)
-
     #endregion
 
     #region Updating
@@ -342,8 +374,8 @@ class Simulation:
             return False
 
     def __update_labels(self):
-        self.lbl_iteration.configure(text=f'Iteration {self.iteration}')
-        self.lbl_sim_time.configure(text=f'Simulation Time {round(self.simulaton_time, 1)} s')
+        self.lbl_iteration.configure(text=f'Iteration {self.core.iteration - 1}')
+        self.lbl_sim_time.configure(text=f'Simulation Time {round(self.core.simulation_time, 1)} s')
         self.lbl_comp_time.configure(text=f'Last Step Computation Time {round(self.comp_time, 0)} ms')
 
     #endregion
@@ -356,10 +388,6 @@ class Simulation:
         if not self.__read_inputs(): return
         self.paused = False
         self.stopped = False
-        self.iteration = 1
-        self.simulaton_time = 0
-        self.memory_log.clear()
-        self.velocity_log.clear()
 
         if not self.auto: 
             self.btn_pause.configure(state=tk.NORMAL)
@@ -370,8 +398,11 @@ class Simulation:
 
         self.__draw_coordinate_system()
         self.canvas.update()
-        self.__init_swarmalators()
-        self.__init_positions_phases()
+        if self.core is not None: self.core.close()
+        self.core = Simulation_core(
+            self.num_swarmalators, self.memory_init, self.time_step, self.coupling_probability, self.J, self.K, self.alpha,
+            self.logging, self.use_phasors, self.engine, self.memory_budget, self.num_workers, self.compression, self.log_policy, self.seed,
+            self.initial_state, self.initial_index, **self.communication)
         self.__step()
 
     def __stop_simulation(self):
@@ -384,8 +415,17 @@ class Simulation:
         self.btn_stop.configure(state=tk.DISABLED)
         if self.auto:
             self.__save_data()
+            self.core.close()
             self.sim.destroy()
 
+    def __close_window(self):
+        '''
+        Releases the worker processes and shared memory of the simulation and closes the window.
+        '''
+        self.stopped = True
+        if self.core is not None: self.core.close()
+        self.sim.destroy()
+
     def __pause_simulation(self):
         '''
         Pauses the simulation if one is currently running. Otherwise resumes current simulation.
@@ -400,18 +440,7 @@ class Simulation:
         '''
         Saves logged information to a Dataset object.
         '''
-        parameters = {
-            'n' : self.num_swarmalators,
-            'i' : self.memory_init,
-            'dt' : self.time_step,
-            'cp' : self.coupling_probability,
-            'j' : self.J,
-            'k' : self.K,
-            'a' : self.alpha
-        }
-        
-        data = [self.memory_log, self.velocity_log, round(self.simulaton_time, 2), parameters]
-        Dataset(data).save_to_file()
+        self.core.save_data()
 
     def __save_preset(self):
         self.__read_inputs()
@@ -435,81 +464,23 @@ class Simulation:
         '''
         Draws a coordinate system on the canvas.
         '''
-        areas = 8
-        self.canvas.delete('all')
         self.simulation_type = str(self.var_plot_type.get())
-        
-        for i in range(1, areas):
-            x_x0 = y_y0 = 0.0
-            x_y0 = x_y1 = y_x0 = y_x1 = self.plot_size / areas * i
-            x_x1 = y_y1 = self.plot_size
-
-            if i == areas / 2.0:
-                self.canvas.create_line(x_x0, x_y0, x_x1, x_y1, width=2) # main x axis
-                self.canvas.create_line(y_x0, y_y0, y_x1, y_y1, width=2) # main y axis
-
-                for j in range(1, areas):
-                    if self.simulation_type == 'positions': t = j * 4.0 / areas - 2.0
-                    else: t = round(j * 2.0 * math.pi / areas - math.pi, 2)
-                    self.canvas.create_text(self.plot_size / areas * j + 15.0, self.plot_size / 2.0 + 15.0, text=str(t)) # x axis tick marks
-                    if j != areas / 2.0: self.canvas.create_text(self.plot_size / 2.0 + 15.0, self.plot_size / areas * j + 15.0, text=str(-t)) # y axis tick marks
-                
-            else:
-                self.canvas.create_line(x_x0, x_y0, x_x1, x_y1, dash=(2, 2)) # helper x axis
-                self.canvas.create_line(y_x0, y_y0, y_x1, y_y1, dash=(2, 2)) # helper y axis
-        
-        if self.simulation_type == 'positions':
-            self.canvas.create_text(self.plot_size - 15.0, self.plot_size / 2.0 - 15.0, text='X') # x axis labels
-            self.canvas.create_text(self.plot_size / 2 + 15.0, 15.0, text='Y') # x axis labels
-        else:
-            self.canvas.create_text(self.plot_size - 75.0, self.plot_size / 2.0 - 15.0, text='Polar Angle of Location') # x axis labels
-            self.canvas.create_text(self.plot_size / 2 + 30.0, 15.0, text='Phase') # x axis labels
-
-    def __draw_swarmalators(self):
-        '''
-        Draws swarmalators on the canvas.
-        '''
-        self.canvas.delete("s")
-        if self.simulation_type == 'positions': self.__draw_positions()
-        else: self.__draw_phases()
+        drawing.draw_coordinate_system(self.canvas, self.plot_size, self.simulation_type)
 
-    def __draw_positions(self):
+    def __draw_overlay(self):
         '''
-        Draws swarmalators on the canvas based on their position.
+        Draws the profiling statistics on the canvas.
         '''
-        size = self.plot_size / 120
-        for i in range(self.num_swarmalators):
-            p = self.global_phase + self.memory[i][2]
-            if p > math.pi: p -= 2 * math.pi
-            if p < -math.pi: p += 2 * math.pi
-            color = hlp.phase_to_hex(p)
-
-            x1 = self.plot_size * ((self.memory[i][0] + 2.0 ) / 4.0)
-            y1 = (self.plot_size * ((-self.memory[i][1] + 2.0 ) / 4.0))
-
-            diff_vec = self.velocities[i] / np.linalg.norm(self.velocities[i]) * size
-            x2 = x1 + diff_vec[0]
-            y2 = y1 - diff_vec[1]
+        self.canvas.delete('overlay')
+        self.canvas.create_text(10.0, 10.0, text=self.profiler.summary(), anchor='nw', font=('Courier', 10), tags='overlay')
 
-            self.canvas.create_line(
-                x1, y1, x2, y2, fill=color, tags='s',
-                arrow=tk.LAST, arrowshape=(8 * size / 5, 10 * size / 5, 3 * size / 5))
-
-    def __draw_phases(self):
+    def __draw_swarmalators(self):
         '''
-        Draws swarmalators on the canvas based on their phase.
+        Draws swarmalators on the canvas.
         '''
-        size = self.plot_size / 150
-        for i in range(self.num_swarmalators):
-            a = math.atan(self.memory[i][1] / self.memory[i][0])
-            if self.memory[i][0] < 0 and self.memory[i][1] > 0: a += math.pi
-            elif self.memory[i][0] < 0 and self.memory[i][1] < 0: a -= math.pi
-
-            x1 = self.plot_size * ((a / math.pi + 1.0 ) / 2.0)
-            y1 = self.plot_size * ((-self.memory[i][2] / math.pi + 1.0 ) / 2.0)
-            x2 = x1 + size
-            y2 = y1 + size
-
-            self.canvas.create_oval(x1, y1, x2, y2, fill='black', tags='s')
+        global_phase = hlp.clock_phase(self.core.iteration - 1, self.time_step) # simulation clock of the last step
+        if self.renderer == 'raster':
+            self.photo = drawing.draw_raster(self.canvas, self.plot_size, self.simulation_type, self.core.memory, self.core.velocities, global_phase, self.photo)
+        else: drawing.draw_swarmalators(self.canvas, self.plot_size, self.simulation_type, self.core.memory, self.core.velocities, global_phase)
     
     #endregion
\ No newline at end of file
@@ -1,7 +1,7 @@
-from swarmalator_model.simulation import Simulation
+from swarmalator_model.core import Simulation_core
 
 class Simulation_run:
-    def __init__(self, presets: list, sim_time: int):
+    def __init__(self, presets: list, sim_time: int, gui: bool=False, store=None, telemetry=None, track_age: bool=False):
         '''
         Instantiates a simulation run object.
 
@@ -11,31 +11,80 @@ class Simulation_run:
             List of preset objects.
         sim_time : int
             Time in s a simulation should run for.
+        gui : bool, optional
+            If true, each simulation is shown in a window. Otherwise simulations run headless without importing tkinter. default=`False`
+        store : Results_store or str, optional
+            Results store or its directory that headless runs are appended to after being saved. default=`None`
+        telemetry : Telemetry, optional
+            Telemetry object the progress of the runs is reported to. Headless runs also report their phase timings. default=`None`
+        track_age : bool, optional
+            If true, headless runs store age of information statistics with their datasets, see `Simulation_core`. default=`False`
         '''
         self.presets = presets
         self.sim_time = sim_time
+        self.gui = gui
+        self.store = store
+        self.telemetry = telemetry
+        self.track_age = track_age
 
     def start(self):
         '''
         Starts a simulation run.
         '''
+        if self.telemetry is not None: self.telemetry.enqueue(len(self.presets))
         for i, p in enumerate(self.presets):
             sim = None
             parameters = {}
             parameters = p.dict
 
-            sim = Simulation(
-                plot_size=750,
-                logging=True,
-                num_swarmalators=parameters['n'],
-                memory_init=parameters['i'],
-                coupling_probability=parameters['cp'],
-                J=parameters['j'],
-                K=parameters['k'],
-                alpha=parameters['a'],
-                max_simulation_time=self.sim_time,
-                auto=True)
-            sim.run_simulation()
+            if self.gui:
+                from swarmalator_model.simulation import Simulation # the GUI is only imported when used
+
+                sim = Simulation(
+                    plot_size=750,
+                    logging=True,
+                    num_swarmalators=parameters['n'],
+                    memory_init=parameters['i'],
+                    time_step=parameters['dt'],
+                    coupling_probability=parameters['cp'],
+                    J=parameters['j'],
+                    K=parameters['k'],
+                    alpha=parameters['a'],
+                    max_simulation_time=self.sim_time,
+                    auto=True,
+                    seed=parameters.get('seed'))
+                if self.telemetry is not None: self.telemetry.start(f'run-{i + 1}', self.sim_time)
+                sim.run_simulation()
+                if self.telemetry is not None: self.telemetry.finish(f'run-{i + 1}')
+            else:
+                sim = Simulation_core(
+                    num_swarmalators=parameters['n'],
+                    memory_init=parameters['i'],
+                    time_step=parameters['dt'],
+                    coupling_probability=parameters['cp'],
+                    J=parameters['j'],
+                    K=parameters['k'],
+                    alpha=parameters['a'],
+                    logging=True,
+                    seed=parameters.get('seed'),
+                    telemetry=self.telemetry,
+                    run_id=f'run-{i + 1}',
+                    track_age=self.track_age)
+                sim.run(self.sim_time, self.__profiler())
+                dataset = sim.save_data()
+                sim.close()
+                if self.store is not None: self.__store().append([dataset])
 
             print(f'Run {i + 1} completed successfully.')
         print(f'All runs completed.')
+
+    def __profiler(self):
+        if self.telemetry is None: return None
+        from swarmalator_model.profiling import Profiler
+        return Profiler(sample_every=10, window=100)
+
+    def __store(self):
+        if isinstance(self.store, str):
+            from swarmalator_model.store import Results_store
+            self.store = Results_store(self.store)
+        return self.store
@@ -0,0 +1,323 @@
+import os
+import json
+import uuid
+import numpy as np
+from swarmalator_model import metrics
+from swarmalator_model.catalog import PARAMETER_COLUMNS, SUMMARY_COLUMNS, _tokenize, _number
+
+
+# columns with one value per run, text columns are stored as strings and all others as floats (`nan` if missing)
+SCALAR_COLUMNS = ['identifier', *PARAMETER_COLUMNS, *SUMMARY_COLUMNS]
+TEXT_COLUMNS = ['identifier', 'i']
+
+# columns with one value per logged iteration, stored as the concatenation of all runs of a part
+SERIES_COLUMNS = ['iterations', 'avg_speed', 's_plus', 's_minus', 'sync']
+
+# stored series columns of the form { column : series }, series named like a summary statistic get a `_series` suffix
+STORED_SERIES = {(c + '_series' if c in SCALAR_COLUMNS else c): c for c in SERIES_COLUMNS}
+
+
+class Results_store:
+    def __init__(self, directory: str='sim_data/store', partition_by: list=('cp', 'a')):
+        '''
+        Instantiates a Results_store object, a columnar store consolidating the parameters, summary statistics and
+        reduced series (average speed, order parameters) of many runs. Runs are partitioned into directories of the
+        form `cp=0.1/a=0.0` and every column of a part is a separate .npy file, so queries skip partitions and parts
+        whose parameters do not match and only read the requested columns.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory of the store. default=`sim_data/store`
+        partition_by : list, optional
+            Parameter columns the runs are partitioned by. default=`('cp', 'a')`
+        '''
+        for c in partition_by:
+            if c not in PARAMETER_COLUMNS: raise ValueError(f'Unknown parameter column {c}.')
+        self.directory = directory
+        self.partition_by = list(partition_by)
+        if not os.path.exists(directory): os.makedirs(directory)
+
+        # partitioning is fixed once the store contains runs
+        path = os.path.join(directory, 'store.json')
+        if os.path.exists(path):
+            with open(path) as fp: self.partition_by = json.load(fp)['partition_by']
+        else:
+            with open(path, 'w') as fp: json.dump({'partition_by': self.partition_by}, fp)
+
+    def append(self, sources, catalog=None, workers: int=None, speed_threshold: float=0.01):
+        '''
+        Reduces runs and appends them to the store. Runs that are already stored are skipped.
+
+        Parameters
+        ----------
+        sources : list or str
+            List of Dataset objects, reduced datasets as returned by `metrics.reduce_dataset`, .ssd filenames or
+            Dataset_handle objects, or a query expression for the catalog.
+        catalog : Catalog, optional
+            Catalog used to resolve a query expression. default=`None`
+        workers : int, optional
+            Number of worker processes used to reduce files. Uses the number of CPUs if `None`. default=`None`
+        speed_threshold : float, optional
+            Average speed below which the swarmalators are considered converged. default=`0.01`
+
+        Returns
+        ----------
+        appended : int
+            Number of runs appended.
+        '''
+        if isinstance(sources, str):
+            if catalog is None: raise ValueError('A catalog is required for queries.')
+            sources = catalog.query(sources)
+
+        known = set(self.query(columns=['identifier'])['identifier'].tolist())
+        reduced = []
+        files = []
+        for s in sources:
+            if isinstance(s, dict): reduced.append(s)
+            elif hasattr(s, 'get_iterations'): reduced.append(metrics.reduce_dataset(s, speed_threshold))
+            elif (s.identifier if hasattr(s, 'identifier') else os.path.splitext(os.path.basename(s))[0]) not in known: files.append(s)
+
+        if files:
+            from swarmalator_model.analysis import Analysis # files are reduced concurrently
+            analysis = Analysis()
+            analysis.add_series(files, workers=workers)
+            reduced.extend(analysis.series.values())
+
+        partitions = {}
+        for r in reduced:
+            if r['identifier'] in known: continue
+            known.add(r['identifier'])
+            key = tuple(_partition_value(r['parameters'].get(c)) for c in self.partition_by)
+            partitions.setdefault(key, []).append(r)
+
+        for key, runs in partitions.items(): self.__write_part(key, runs)
+        return sum(len(runs) for runs in partitions.values())
+
+    def query(self, expression: str=None, columns: list=None):
+        '''
+        Reads columns of the runs matching a filter expression. Partitions and parts whose parameter ranges cannot
+        match are skipped without being read, and of the remaining parts only the columns used by the expression
+        and the requested columns are read. Series are memory-mapped and only the rows of matching runs are copied.
+
+        Parameters
+        ----------
+        expression : str, optional
+            Filter expression as used by `Catalog.query`, e.g. `cp == 0.1 and a in (0, 0.5)`. All runs are returned
+            if `None`. default=`None`
+        columns : list, optional
+            Scalar or series columns to be read. The series of the order parameters are named `s_plus_series`,
+            `s_minus_series` and `sync_series`. All columns if `None`. default=`None`
+
+        Returns
+        ----------
+        result : dict
+            Dictionary of the form { column : values }. Scalar columns are arrays with one value per run, series
+            columns are lists with one array per run.
+        '''
+        tree = _parse(expression) if expression else None
+        columns = list(columns) if columns is not None else SCALAR_COLUMNS + list(STORED_SERIES)
+        for c in columns:
+            if c not in SCALAR_COLUMNS and c not in STORED_SERIES: raise ValueError(f'Unknown column {c}.')
+        needed = sorted(_columns(tree)) if tree is not None else []
+
+        result = {c: [] for c in columns}
+        for part in self.__parts(tree):
+            loaded = {c: np.load(os.path.join(part, c + '.npy')) for c in needed}
+            mask = _mask(tree, loaded) if tree is not None else None
+            rows = np.flatnonzero(mask) if mask is not None else None
+            if rows is not None and len(rows) == 0: continue
+
+            offsets = None
+            for c in columns:
+                if c in SCALAR_COLUMNS:
+                    values = loaded[c] if c in loaded else np.load(os.path.join(part, c + '.npy'))
+                    result[c].append(values if rows is None else values[rows])
+                    continue
+                if offsets is None: offsets = np.load(os.path.join(part, 'offsets.npy'))
+                values = np.load(os.path.join(part, c + '.npy'), mmap_mode='r')
+                for r in (rows if rows is not None else range(len(offsets) - 1)):
+                    result[c].append(np.array(values[offsets[r]:offsets[r + 1]]))
+
+        for c in columns:
+            if c not in SCALAR_COLUMNS: continue
+            if result[c]: result[c] = np.concatenate(result[c])
+            else: result[c] = np.array([], dtype=str if c in TEXT_COLUMNS else float)
+        return result
+
+    def __len__(self):
+        return len(self.query(columns=['identifier'])['identifier'])
+
+    def __parts(self, tree):
+        '''
+        Yields the directories of the parts that may contain matching runs.
+        '''
+        def walk(directory: str, level: int, bounds: dict):
+            if level == len(self.partition_by):
+                for p in sorted(os.listdir(directory)):
+                    path = os.path.join(directory, p)
+                    meta = os.path.join(path, 'meta.json')
+                    if not os.path.exists(meta): continue # part that is still being written
+                    with open(meta) as fp: stats = json.load(fp)['stats']
+                    part_bounds = {**bounds, **{c: tuple(v) for c, v in stats.items()}}
+                    if tree is None or _maybe(tree, part_bounds): yield path
+                return
+
+            column = self.partition_by[level]
+            for d in sorted(os.listdir(directory)):
+                name, _, value = d.partition('=')
+                if name != column: continue
+                value = _partition_value(_number(value) if value not in ('', 'None') and column not in TEXT_COLUMNS else value)
+                child = {**bounds, column: (value, value)}
+                if tree is None or _maybe(tree, child): yield from walk(os.path.join(directory, d), level + 1, child)
+
+        yield from walk(self.directory, 0, {})
+
+    def __write_part(self, key: tuple, runs: list):
+        '''
+        Writes runs as a new part of a partition. The meta file is written last, so incomplete parts are never read.
+        '''
+        directory = os.path.join(self.directory, *[f'{c}={v}' for c, v in zip(self.partition_by, key)], f'part-{uuid.uuid4().hex[:12]}')
+        os.makedirs(directory)
+
+        stats = {}
+        for c in SCALAR_COLUMNS:
+            if c == 'identifier': values = [r['identifier'] for r in runs]
+            elif c in PARAMETER_COLUMNS: values = [r['parameters'].get(c) for r in runs]
+            else: values = [r['summary'].get(c) for r in runs]
+
+            if c in TEXT_COLUMNS: array = np.array([str(v) for v in values])
+            else:
+                array = np.array([np.nan if v is None else v for v in values], dtype=float)
+                if not np.all(np.isnan(array)): stats[c] = [float(np.nanmin(array)), float(np.nanmax(array))]
+            np.save(os.path.join(directory, c + '.npy'), array)
+
+        lengths = [len(r['iterations']) for r in runs]
+        np.save(os.path.join(directory, 'offsets.npy'), np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+        for c, key in STORED_SERIES.items():
+            series = [np.full(n, np.nan) if r.get(key) is None else np.asarray(r[key], dtype=float) for r, n in zip(runs, lengths)]
+            np.save(os.path.join(directory, c + '.npy'), np.concatenate(series) if series else np.zeros(0))
+
+        with open(os.path.join(directory, 'meta.json'), 'w') as fp: json.dump({'rows': len(runs), 'stats': stats}, fp)
+
+
+def _partition_value(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+def _parse(expression: str):
+    '''
+    Parses a filter expression into a tree of tuples of the form ('and', [...]), ('or', [...]), ('not', node),
+    (operator, column, value) or ('in', column, values).
+    '''
+    tokens = _tokenize(expression)
+    position = 0
+
+    def peek():
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def take(expected: str=None):
+        nonlocal position
+        if position >= len(tokens) or (expected is not None and tokens[position].lower() != expected):
+            raise ValueError(f'Invalid expression: {expression}')
+        position += 1
+        return tokens[position - 1]
+
+    def value():
+        t = take()
+        if t[0] in '"\'': return t[1:-1]
+        try: return _number(t)
+        except ValueError: raise ValueError(f'Invalid expression: {expression}')
+
+    def values():
+        take('(')
+        result = [value()]
+        while peek() == ',':
+            take(',')
+            result.append(value())
+        take(')')
+        return result
+
+    def disjunction():
+        nodes = [conjunction()]
+        while peek() == 'or':
+            take()
+            nodes.append(conjunction())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def conjunction():
+        nodes = [negation()]
+        while peek() == 'and':
+            take()
+            nodes.append(negation())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def negation():
+        if peek() == 'not':
+            take()
+            return ('not', negation())
+        if peek() == '(':
+            take('(')
+            node = disjunction()
+            take(')')
+            return node
+
+        column = take()
+        if column not in SCALAR_COLUMNS: raise ValueError(f'Unknown column {column}.')
+        if peek() == 'not':
+            take()
+            take('in')
+            return ('not', ('in', column, values()))
+        if peek() == 'in':
+            take()
+            return ('in', column, values())
+        operator = take()
+        if operator not in ('==', '!=', '<', '<=', '>', '>='): raise ValueError(f'Invalid expression: {expression}')
+        return (operator, column, value())
+
+    tree = disjunction()
+    if position != len(tokens): raise ValueError(f'Invalid expression: {expression}')
+    return tree
+
+def _columns(tree: tuple):
+    '''
+    Returns the columns used by an expression tree.
+    '''
+    if tree[0] in ('and', 'or'): return set().union(*[_columns(t) for t in tree[1]])
+    if tree[0] == 'not': return _columns(tree[1])
+    return {tree[1]}
+
+def _mask(tree: tuple, columns: dict):
+    '''
+    Evaluates an expression tree on columns. Comparisons with missing values are false.
+    '''
+    if tree[0] == 'and': return np.logical_and.reduce([_mask(t, columns) for t in tree[1]])
+    if tree[0] == 'or': return np.logical_or.reduce([_mask(t, columns) for t in tree[1]])
+    if tree[0] == 'not': return ~_mask(tree[1], columns)
+
+    operator, column, value = tree
+    values = columns[column]
+    if operator == 'in': return np.isin(values, [v for v in value if isinstance(v, str) == (column in TEXT_COLUMNS)])
+    if (column in TEXT_COLUMNS) != isinstance(value, str): return np.full(len(values), operator == '!=')
+    return {'==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}[operator](values, value)
+
+def _maybe(tree: tuple, bounds: dict):
+    '''
+    Returns whether an expression tree can be true for values within the given ranges of the form { column : (min, max) }.
+    Columns without a known range and negations may always be true.
+    '''
+    if tree[0] == 'and': return all(_maybe(t, bounds) for t in tree[1])
+    if tree[0] == 'or': return any(_maybe(t, bounds) for t in tree[1])
+    if tree[0] == 'not': return True
+
+    operator, column, value = tree
+    if column not in bounds: return True
+    low, high = bounds[column]
+    try:
+        if operator == 'in': return any(low <= v <= high for v in value)
+        if operator == '==': return low <= value <= high
+        if operator == '!=': return not (low == high == value)
+        if operator == '<': return low < value
+        if operator == '<=': return low <= value
+        if operator == '>': return high > value
+        return high >= value
+    except TypeError: return operator == '!=' # text compared with a number
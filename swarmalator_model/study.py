@@ -0,0 +1,138 @@
+import numpy as np
+from swarmalator_model.analysis import Analysis
+from swarmalator_model import metrics
+
+
+class Convergence_study:
+    def __init__(self, catalog, expression: str=None, threshold: float=0.01, num_bootstrap: int=2000, confidence: float=0.95, statistic: str='mean', seed: int=None):
+        '''
+        Instantiates a Convergence_study object that compares convergence times of runs grouped by J, K and coupling
+        probability across values of alpha. Runs that do not converge are censored at their last logged iteration
+        instead of being dropped, so slowly converging settings are not reported as faster than they are. Times of
+        groups with censored runs are lower bounds of the true statistic.
+
+        Parameters
+        ----------
+        catalog : Catalog
+            Catalog of the runs.
+        expression : str, optional
+            Query expression selecting the runs. All runs are used if `None`. default=`None`
+        threshold : float, optional
+            Average speed below which the swarmalators are considered converged. default=`0.01`
+        num_bootstrap : int, optional
+            Number of bootstrap resamples. default=`2000`
+        confidence : float, optional
+            Confidence level of the bootstrap intervals. default=`0.95`
+        statistic : {'mean', 'median'}, optional
+            Statistic of the convergence times. default=`mean`
+        seed : int, optional
+            Seed of the random number generator used for resampling. default=`None`
+        '''
+        self.catalog = catalog
+        self.expression = expression
+        self.threshold = threshold
+        self.num_bootstrap = num_bootstrap
+        self.confidence = confidence
+        self.statistic = np.nanmedian if statistic == 'median' else np.nanmean
+        self.rng = np.random.default_rng(seed)
+        self.results = []
+
+    def run(self, workers: int=None):
+        '''
+        Loads the average speed of all selected runs in parallel, computes their convergence times and bootstraps
+        confidence intervals of the convergence time and of the speed-up versus alpha = 0.
+
+        Parameters
+        ----------
+        workers : int, optional
+            Number of worker processes used to load the runs. default=`None`
+
+        Returns
+        ----------
+        results : list
+            List of dictionaries, one per (J, K, cp, alpha) group. `converged` is the fraction of converged runs and
+            `censored` the number of runs whose convergence time was censored at their last logged iteration.
+        '''
+        handles = self.catalog.query(self.expression)
+        analysis = Analysis()
+        analysis.add_series(handles, workers=workers)
+        times, converged = self.__convergence_times([analysis.series[h.identifier] for h in handles])
+
+        # group runs by (J, K, cp) and alpha
+        groups = {}
+        for h, t, c in zip(handles, times, converged):
+            p = h.parameters
+            groups.setdefault((p['j'], p['k'], p['cp']), {}).setdefault(p['a'], []).append((t, c))
+
+        self.results = []
+        for (j, k, cp), by_alpha in sorted(groups.items()):
+            baseline = np.array([t for t, _ in by_alpha[0]]) if 0 in by_alpha else None
+            baseline_resampled = self.__resample(baseline) if baseline is not None else None
+            for a, runs in sorted(by_alpha.items()):
+                t = np.array([t for t, _ in runs])
+                c = np.array([c for _, c in runs])
+                resampled = self.__resample(t)
+                row = {
+                    'j': j, 'k': k, 'cp': cp, 'a': a, 'runs': len(t),
+                    'converged': float(np.mean(c)),
+                    'censored': int(np.sum(~c & ~np.isnan(t))),
+                    'time': float(self.statistic(t)) if not np.all(np.isnan(t)) else np.nan}
+                row['time_low'], row['time_high'] = self.__interval(resampled)
+                if baseline is not None and not np.isnan(row['time']) and not np.all(np.isnan(baseline)):
+                    row['speedup'] = float(self.statistic(baseline) / row['time'])
+                    row['speedup_low'], row['speedup_high'] = self.__interval(baseline_resampled / resampled)
+                else:
+                    row['speedup'] = row['speedup_low'] = row['speedup_high'] = np.nan
+                self.results.append(row)
+        return self.results
+
+    def __convergence_times(self, series: list):
+        '''
+        Computes the convergence times of all runs, vectorized over runs with the same logged iterations. Runs that
+        did not converge are censored at their last logged iteration, runs without average speed are `nan`.
+        '''
+        times = np.full(len(series), np.nan)
+        converged = np.zeros(len(series), dtype=bool)
+        by_schedule = {}
+        for r, s in enumerate(series):
+            if s['avg_speed'] is None or len(s['iterations']) == 0: continue
+            by_schedule.setdefault(s['iterations'].tobytes(), []).append(r)
+        for runs in by_schedule.values():
+            speeds = np.stack([series[r]['avg_speed'] for r in runs])
+            iterations = series[runs[0]]['iterations']
+            t = metrics.convergence_time(speeds, iterations, self.threshold)
+            converged[runs] = ~np.isnan(t)
+            times[runs] = np.where(np.isnan(t), iterations[-1], t)
+        return times, converged
+
+    def __resample(self, times: np.ndarray):
+        '''
+        Computes the statistic of bootstrap resamples of convergence times in one vectorized operation.
+        '''
+        idx = self.rng.integers(0, len(times), (self.num_bootstrap, len(times)))
+        resampled = times[idx]
+        stats = np.full(self.num_bootstrap, np.nan)
+        valid = ~np.all(np.isnan(resampled), axis=1)
+        stats[valid] = self.statistic(resampled[valid], axis=1)
+        return stats
+
+    def __interval(self, resampled: np.ndarray):
+        '''
+        Returns the percentile interval of bootstrap statistics.
+        '''
+        if np.all(np.isnan(resampled)): return np.nan, np.nan
+        q = (1.0 - self.confidence) / 2.0 * 100.0
+        low, high = np.nanpercentile(resampled, [q, 100.0 - q])
+        return float(low), float(high)
+
+    def summary(self):
+        '''
+        Prints the results of the study as a table.
+        '''
+        print(f'{"J":>6}{"K":>7}{"cp":>6}{"alpha":>7}{"runs":>6}{"conv.":>7}{"cens.":>7}{"time":>9}{"CI":>20}{"speed-up":>10}{"CI":>16}')
+        for r in self.results:
+            time_ci = f'[{r["time_low"]:.1f}, {r["time_high"]:.1f}]'
+            speedup_ci = f'[{r["speedup_low"]:.2f}, {r["speedup_high"]:.2f}]'
+            print(
+                f'{r["j"]:>6}{r["k"]:>7}{r["cp"]:>6}{r["a"]:>7}{r["runs"]:>6}{r["converged"]:>7.2f}{r["censored"]:>7}'
+                f'{r["time"]:>9.1f}{time_ci:>20}{r["speedup"]:>10.2f}{speedup_ci:>16}')
@@ -0,0 +1,569 @@
+import math
+import numpy as np
+from swarmalator_model import helper_functions as hlp
+
+
+# candidates drawn per message when senders are sampled by proximity or age
+CANDIDATES_PER_MESSAGE = 4
+
+
+class Swarm:
+    def __init__(self, num_swarmalators: int, memory_init: str, use_phasors: bool=False, memory_budget: int=2**24, seed: int=None, arrays: dict=None,
+        communication: str='probabilistic', messages: int=1, sampling: str='uniform', multirate: int=1, quiescence_threshold: float=1e-3,
+        track_age: bool=False):
+        '''
+        Instantiates a vectorized population of swarmalators. The memories of all swarmalators are stored in one array
+        of shape (n, n, 3), where row i is the memory of swarmalator i. Unlike the agent-based simulation, all swarmalators
+        scan, think and move based on the same environment memory and yell afterwards.
+
+        Parameters
+        ----------
+        num_swarmalators : int
+            Number of swarmalators in the simulation.
+        memory_init : {'random', 'zeroes', 'gradual'}
+            Method of swarmalator memory initialization.
+            `random`: random positions and phases.
+            `zeroes`: initialize positions and phases as 0.
+            `gradual`: initialize empty memory and learn positions and phases gradually.
+        use_phasors : bool, optional
+            If true, phases in memory are additionally kept as unit phasors (cos, sin). default=`False`
+        memory_budget : int, optional
+            Maximum number of bytes used for temporary arrays of the pairwise kernel. default=`2**24`
+        seed : int, optional
+            Seed of the random number generator. default=`None`
+        arrays : dict, optional
+            Existing state arrays as returned by `state_arrays` to be used instead of initializing new ones. default=`None`
+        communication : {'probabilistic', 'budget'}, optional
+            Communication model. default=`probabilistic`
+            `probabilistic`: each swarmalator receives the state of every other swarmalator with the coupling probability.
+            `budget`: each swarmalator receives at most `messages` states per step, which costs O(n * messages) instead of O(n^2).
+        messages : int, optional
+            Number of messages a swarmalator receives per step in the `budget` model. default=`1`
+        sampling : {'uniform', 'proximity', 'age'}, optional
+            How senders are chosen in the `budget` model. default=`uniform`
+            `uniform`: senders are sampled uniformly.
+            `proximity`: senders closest to the receiver according to its memory are preferred.
+            `age`: senders whose memory entries have not been updated for the longest time are preferred.
+        multirate : int, optional
+            If greater than 1, quiescent swarmalators only think and move every `multirate` steps with a correspondingly
+            scaled time step. A swarmalator becomes quiescent once its speed and phase change stayed below
+            `quiescence_threshold` for `multirate` updates, and is updated every step again as soon as an update
+            of its memory or its own velocity or phase change exceeds the threshold. default=`1`
+        quiescence_threshold : float, optional
+            Speed and phase change below which a swarmalator is considered quiescent. default=`1e-3`
+        track_age : bool, optional
+            If true, the number of steps since each memory entry was last updated is kept in `ages` of shape (n, n),
+            e.g. to measure the age of information with `metrics.information_age`. default=`False`
+        '''
+        self.num_swarmalators = num_swarmalators
+        self.memory_init = memory_init
+        self.use_phasors = use_phasors
+        self.memory_budget = memory_budget
+        self.communication = communication
+        self.messages = messages
+        self.sampling = sampling
+        self.multirate = multirate
+        self.quiescence_threshold = quiescence_threshold
+        self.rng = np.random.default_rng(seed)
+        self.ages = None
+        self.schedule = None
+        self.updates = 0
+        if arrays is not None:
+            for name, array in arrays.items(): setattr(self, name, array)
+        else:
+            for name, array in initial_arrays(num_swarmalators, memory_init, self.rng, use_phasors).items(): setattr(self, name, array)
+
+        # number of steps since each memory entry was last updated
+        if (track_age or self.communication == 'budget' and self.sampling == 'age') and self.ages is None: self.ages = np.zeros((num_swarmalators, num_swarmalators))
+
+        # update period, number of consecutive quiescent updates and steps since the last update of each swarmalator
+        if self.multirate > 1 and self.schedule is None:
+            self.schedule = np.zeros((num_swarmalators, 3), dtype=np.int64)
+            self.schedule[:, 0] = 1
+        self.incoming = np.zeros(num_swarmalators) if self.multirate > 1 else None
+
+    def state_arrays(self):
+        '''
+        Returns the arrays that make up the state of the swarm.
+
+        Returns
+        ----------
+        arrays : dict
+            Dictionary of the form { name : array }
+        '''
+        names = ['memory', 'velocities', 'phase_changes', 'env_memory', 'env_velocities']
+        if self.use_phasors: names.append('phasors')
+        if self.ages is not None: names.append('ages')
+        if self.schedule is not None: names.append('schedule')
+        return {name: getattr(self, name) for name in names}
+
+    def step(self, delta_t: float, J: float, K: float, coupling_probability: float, alpha: float, profiler=None):
+        '''
+        Makes all swarmalators sync and swarm.
+
+        Parameters
+        ----------
+        delta_t : float
+            Time step of an iteration in seconds.
+        J : float
+            Phase attraction strength. For J > 0 swarmalators with similar phases attract each other. For J < 0 opposite phased swarmalators are attracted.
+        K : float
+            Phase coupling strength. For K > 0 swarmalators try to minimize their phase difference. For K < 0 the difference is maximized.
+        coupling_probability : float
+            Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration.
+        alpha : float
+            Momentum factor. Must be between 0 and 1.
+        profiler : Profiler, optional
+            Profiler used to measure the time spent in each phase. default=`None`
+        '''
+        if self.schedule is not None:
+            self.__step_multirate(delta_t, J, K, coupling_probability, alpha, profiler)
+            return
+
+        self.updates += self.num_swarmalators
+        rows = slice(0, self.num_swarmalators)
+        if profiler is None:
+            self.scan(coupling_probability, rows)
+            self.think(J, K, alpha, rows)
+            self.move(delta_t, rows)
+            self.yell(rows)
+            return
+
+        profiler.start('scan')
+        self.scan(coupling_probability, rows)
+        profiler.stop('scan')
+        profiler.start('think')
+        self.think(J, K, alpha, rows)
+        profiler.stop('think')
+        profiler.start('move')
+        self.move(delta_t, rows)
+        profiler.stop('move')
+        profiler.start('yell')
+        self.yell(rows)
+        profiler.stop('yell')
+
+    def __step_multirate(self, delta_t: float, J: float, K: float, coupling_probability: float, alpha: float, profiler=None):
+        '''
+        Makes all swarmalators scan and only the swarmalators that are due think, move and yell.
+        '''
+        rows = slice(0, self.num_swarmalators)
+        if profiler is not None: profiler.start('scan')
+        self.scan(coupling_probability, rows)
+        if profiler is not None: profiler.stop('scan')
+
+        periods, calm, elapsed = self.schedule.T
+        elapsed += 1
+
+        # quiescent swarmalators whose memory changed by more than they would move in a period are promoted
+        promoted = (periods > 1) & (self.incoming > self.quiescence_threshold * delta_t * periods)
+        periods[promoted] = 1
+        calm[promoted] = 0
+
+        due = np.flatnonzero(elapsed >= periods)
+        self.updates += len(due)
+        if profiler is not None: profiler.start('think')
+        self.think(J, K, alpha, due)
+        if profiler is not None: profiler.stop('think')
+        if profiler is not None: profiler.start('move')
+        self.move(delta_t * elapsed[due], due)
+        if profiler is not None: profiler.stop('move')
+        if profiler is not None: profiler.start('yell')
+        self.yell(due)
+        if profiler is not None: profiler.stop('yell')
+        elapsed[due] = 0
+
+        # swarmalators whose forces stay small are demoted, the others are updated every step
+        quiet = (np.linalg.norm(self.velocities[due], axis=1) < self.quiescence_threshold) & (np.abs(self.phase_changes[due]) < self.quiescence_threshold)
+        calm[due] = np.where(quiet, calm[due] + 1, 0)
+        periods[due] = np.where(calm[due] >= self.multirate, self.multirate, 1)
+
+    def scan(self, coupling_probability: float, rows: slice):
+        '''
+        A block of swarmalators synchronizes their memories with the environment memory using a coupling probability
+        or a message budget.
+
+        Parameters
+        ----------
+        coupling_probability : float
+            Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration.
+            Not used in the `budget` model.
+        rows : slice
+            Block of swarmalators to be updated.
+        '''
+        if self.ages is not None: self.ages[rows] += 1.0
+        if self.incoming is not None: self.incoming[rows] = 0.0
+
+        if self.communication == 'budget':
+            receivers = np.arange(rows.start, rows.stop)
+            senders = sample_senders(self.memory[rows], receivers, self.messages, self.sampling, self.rng, self.ages[rows] if self.ages is not None else None)
+            if self.incoming is not None and senders.shape[1] > 0: self.incoming[rows] = incoming_change(self.memory[receivers[:, None], senders], self.env_memory[senders])
+            self.memory[receivers[:, None], senders] = self.env_memory[senders]
+            if self.use_phasors: self.phasors[receivers[:, None], senders] = hlp.phase_to_phasor(self.env_memory[senders, 2])
+            if self.ages is not None: self.ages[receivers[:, None], senders] = 0.0
+        else:
+            if self.use_phasors: env_phasors = hlp.phase_to_phasor(self.env_memory[:, 2])
+
+            for r in self.__row_tiles(rows):
+                received = self.rng.random((r.stop - r.start, self.num_swarmalators)) < coupling_probability
+                received[np.arange(r.stop - r.start), np.arange(r.start, r.stop)] = False
+                if self.incoming is not None: self.incoming[r] = incoming_change(self.memory[r], self.env_memory[None], received)
+                np.copyto(self.memory[r], self.env_memory, where=received[:, :, None])
+                if self.use_phasors: np.copyto(self.phasors[r], env_phasors, where=received[:, :, None])
+                if self.ages is not None: self.ages[r][received] = 0.0
+
+        # the own memory entry is always up to date
+        if self.ages is not None: self.ages[np.arange(rows.start, rows.stop), np.arange(rows.start, rows.stop)] = 0.0
+
+    def think(self, J: float, K: float, alpha: float, rows: slice):
+        '''
+        A block of swarmalators computes their velocities and phase changes based on their memories.
+
+        Parameters
+        ----------
+        J : float
+            Phase attraction strength. For J > 0 swarmalators with similar phases attract each other. For J < 0 opposite phased swarmalators are attracted.
+        K : float
+            Phase coupling strength. For K > 0 swarmalators try to minimize their phase difference. For K < 0 the difference is maximized.
+        alpha : float
+            Momentum factor. Must be between 0 and 1.
+        rows : slice or np.ndarray
+            Block or indices of swarmalators to be updated.
+        '''
+        velocity_sums, phase_change_sums, counts = pairwise_sums(
+            self.memory, rows, J,
+            phasors=self.phasors if self.use_phasors else None,
+            skip_unknown=self.memory_init == 'gradual',
+            memory_budget=self.memory_budget)
+
+        # swarmalators without any known neighbours keep their velocity and phase change
+        known = counts > 0
+        idx = _indices(rows)[known]
+        n = counts[known]
+        self.velocities[idx] = velocity_sums[known] / n[:, None] + alpha * self.velocities[idx]
+        self.phase_changes[idx] = phase_change_sums[known] * K / n + alpha * self.phase_changes[idx]
+
+    def move(self, delta_t: float, rows: slice):
+        '''
+        A block of swarmalators uses their current velocities and phase changes to move.
+
+        Parameters
+        ----------
+        delta_t : float or np.ndarray
+            Time step of an iteration in seconds, or time steps of the swarmalators.
+        rows : slice or np.ndarray
+            Block or indices of swarmalators to be updated.
+        '''
+        idx = _indices(rows)
+        delta_t = np.reshape(delta_t, (-1, 1))
+        self.memory[idx, idx, :2] += self.velocities[rows] * delta_t
+        self.memory[idx, idx, 2] = hlp.wrap_phase(self.memory[idx, idx, 2] + self.phase_changes[rows] * delta_t[:, 0])
+        if self.use_phasors: self.phasors[idx, idx] = hlp.phase_to_phasor(self.memory[idx, idx, 2])
+
+    def yell(self, rows: slice):
+        '''
+        A block of swarmalators communicates their current positions, phases and velocities to the environment.
+
+        Parameters
+        ----------
+        rows : slice or np.ndarray
+            Block or indices of swarmalators to be updated.
+        '''
+        idx = _indices(rows)
+        self.env_memory[rows] = self.memory[idx, idx]
+        self.env_velocities[rows] = self.velocities[rows]
+
+    def __row_tiles(self, rows: slice):
+        '''
+        Splits a block of swarmalators into tiles of rows that fit into the memory budget.
+        '''
+        tile_rows = max(1, self.memory_budget // (16 * self.num_swarmalators))
+        for start in range(rows.start, rows.stop, tile_rows):
+            yield slice(start, min(start + tile_rows, rows.stop))
+
+
+def sample_senders(memory: np.ndarray, receivers: np.ndarray, messages: int, sampling: str, rng: np.random.Generator, ages: np.ndarray=None):
+    '''
+    Samples the senders of the messages received by swarmalators in the message budget model. Senders are drawn with
+    replacement, so a swarmalator receives at most `messages` distinct states. For proximity and age sampling,
+    `CANDIDATES_PER_MESSAGE` candidates per message are drawn uniformly and the best ones are kept, so the cost stays
+    O(m * messages) instead of weighting all n swarmalators.
+
+    Parameters
+    ----------
+    memory : np.ndarray
+        Memories of the receiving swarmalators of shape (m, n, 3).
+    receivers : np.ndarray
+        Indices of the receiving swarmalators of shape (m, ).
+    messages : int
+        Number of messages per receiver.
+    sampling : {'uniform', 'proximity', 'age'}
+        How senders are chosen.
+    rng : np.random.Generator
+        Random number generator.
+    ages : np.ndarray, optional
+        Number of steps since the memory entries of the receivers were updated of shape (m, n). Required for `age` sampling. default=`None`
+
+    Returns
+    ----------
+    senders : np.ndarray
+        Indices of the senders of shape (m, messages).
+    '''
+    m, n = memory.shape[:2]
+    if n < 2: return np.empty((m, 0), dtype=np.int64)
+
+    # draw from the other n - 1 swarmalators by skipping the receiver itself
+    num_candidates = messages if sampling == 'uniform' else messages * CANDIDATES_PER_MESSAGE
+    candidates = rng.integers(0, n - 1, (m, num_candidates))
+    candidates += candidates >= receivers[:, None]
+    if sampling == 'uniform': return candidates
+
+    rows = np.arange(m)[:, None]
+    if sampling == 'proximity':
+        own = memory[np.arange(m), receivers, :2]
+        scores = np.sum((memory[rows, candidates, :2] - own[:, None, :]) ** 2, axis=-1)
+    elif sampling == 'age': scores = -ages[rows, candidates]
+    else: raise ValueError(f'Unknown sampling {sampling}.')
+
+    best = np.argpartition(scores, messages - 1, axis=1)[:, :messages]
+    return np.take_along_axis(candidates, best, axis=1)
+
+def incoming_change(memory: np.ndarray, received: np.ndarray, where: np.ndarray=None):
+    '''
+    Computes how much memory entries change when they are overwritten by received states, as the largest absolute
+    change of a coordinate or of the wrapped phase per receiving swarmalator.
+
+    Parameters
+    ----------
+    memory : np.ndarray
+        Current memory entries of shape (m, k, 3).
+    received : np.ndarray
+        Received states of shape (m, k, 3) or broadcastable to it.
+    where : np.ndarray, optional
+        Mask of the entries that are overwritten of shape (m, k). All entries if `None`. default=`None`
+
+    Returns
+    ----------
+    change : np.ndarray
+        Largest change per receiving swarmalator of shape (m, ).
+    '''
+    change = np.zeros(memory.shape[:2])
+    for c in range(3):
+        delta = received[..., c] - memory[..., c]
+        if c == 2: delta = hlp.wrap_phase(delta)
+        np.maximum(change, np.abs(delta), out=change)
+    if where is not None: change *= where
+    return change.max(axis=1, initial=0.0)
+
+def state_shapes(num_swarmalators: int, use_phasors: bool=False, ages: bool=False):
+    '''
+    Returns the shapes of the state arrays of a swarm without multi-rate stepping, e.g. to allocate them in shared memory.
+
+    Parameters
+    ----------
+    num_swarmalators : int
+        Number of swarmalators in the simulation.
+    use_phasors : bool, optional
+        If true, the shape of the phasors is added. default=`False`
+    ages : bool, optional
+        If true, the shape of the ages of memory entries is added. default=`False`
+
+    Returns
+    ----------
+    shapes : dict
+        Dictionary of the form { name : shape } with the names used by `Swarm.state_arrays`.
+    '''
+    n = num_swarmalators
+    shapes = {'memory': (n, n, 3), 'velocities': (n, 2), 'phase_changes': (n, ), 'env_memory': (n, 3), 'env_velocities': (n, 2)}
+    if use_phasors: shapes['phasors'] = (n, n, 2)
+    if ages: shapes['ages'] = (n, n)
+    return shapes
+
+def initial_arrays(num_swarmalators: int, memory_init: str, rng: np.random.Generator, use_phasors: bool=False, out: dict=None):
+    '''
+    Initializes the memories, velocities and the environment memory of all swarmalators in bulk.
+
+    Parameters
+    ----------
+    num_swarmalators : int
+        Number of swarmalators in the simulation.
+    memory_init : {'random', 'zeroes', 'gradual'}
+        Method of swarmalator memory initialization.
+    rng : np.random.Generator
+        Random number generator.
+    use_phasors : bool, optional
+        If true, phasors of the memories are added. default=`False`
+    out : dict, optional
+        Preallocated arrays of the shapes returned by `state_shapes` that are initialized in place instead of
+        allocating new ones, e.g. arrays in shared memory. default=`None`
+
+    Returns
+    ----------
+    arrays : dict
+        State arrays as returned by `Swarm.state_arrays`.
+    '''
+    n = num_swarmalators
+    idx = np.arange(n)
+    if memory_init not in ['zeroes', 'gradual', 'random']: raise ValueError(f'Unknown memory initialization {memory_init}.')
+    memory = out['memory'] if out is not None else np.empty((n, n, 3))
+
+    if memory_init == 'zeroes' or memory_init == 'gradual':
+        memory.fill(0.0)
+        memory[idx, idx, :2] = rng.random((n, 2)) * 2.0 - 1.0
+        memory[idx, idx, 2] = rng.random(n) * 2.0 * math.pi - math.pi
+
+    else:
+        # scaled in place, so no temporary copy of the memories is needed
+        rng.random(out=memory)
+        memory[:, :, :2] *= 2.0
+        memory[:, :, :2] -= 1.0
+        memory[:, :, 2] *= 2.0
+        memory[:, :, 2] *= math.pi
+        memory[:, :, 2] -= math.pi
+
+    velocities = rng.random((n, 2)) * 2.0 - 1.0
+    return _arrays(memory, velocities, use_phasors, out)
+
+def arrays_from_state(memory: np.ndarray, velocities: np.ndarray=None, rng: np.random.Generator=None, use_phasors: bool=False):
+    '''
+    Creates the state arrays of a swarm starting from a given state, e.g. an iteration of a stored run.
+
+    Parameters
+    ----------
+    memory : np.ndarray
+        Positions and phases of shape (n, 3), which all swarmalators start with in their memory, or memories of
+        all swarmalators of shape (n, n, 3).
+    velocities : np.ndarray, optional
+        Velocities of shape (n, 2). Random velocities are used if `None`. default=`None`
+    rng : np.random.Generator, optional
+        Random number generator used for missing velocities. default=`None`
+    use_phasors : bool, optional
+        If true, phasors of the memories are added. default=`False`
+
+    Returns
+    ----------
+    arrays : dict
+        State arrays as returned by `Swarm.state_arrays`.
+    '''
+    memory = np.asarray(memory, dtype=np.float64)
+    n = memory.shape[0]
+    if memory.shape not in [(n, 3), (n, n, 3)]: raise ValueError(f'Invalid state of shape {memory.shape}.')
+    if memory.ndim == 2: memory = np.broadcast_to(memory, (n, n, 3))
+    memory = memory.copy()
+
+    if velocities is None:
+        rng = rng if rng is not None else np.random.default_rng()
+        velocities = rng.random((n, 2)) * 2.0 - 1.0
+    velocities = np.array(velocities, dtype=np.float64)
+    if velocities.shape != (n, 2): raise ValueError(f'Invalid velocities of shape {velocities.shape}.')
+    return _arrays(memory, velocities, use_phasors)
+
+def _indices(rows):
+    return np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+
+def _arrays(memory: np.ndarray, velocities: np.ndarray, use_phasors: bool, out: dict=None):
+    idx = np.arange(len(memory))
+    if out is not None:
+        # the memories are already in place and phasors are computed row by row to avoid temporary copies
+        out['velocities'][:] = velocities
+        out['phase_changes'][:] = 0.0
+        out['env_memory'][:] = memory[idx, idx]
+        out['env_velocities'][:] = velocities
+        if use_phasors:
+            for i in idx: out['phasors'][i] = hlp.phase_to_phasor(memory[i, :, 2])
+        if 'ages' in out: out['ages'][:] = 0.0
+        return out
+
+    arrays = {
+        'memory': memory,
+        'velocities': velocities,
+        'phase_changes': np.zeros(len(memory)),
+        'env_memory': memory[idx, idx].copy(),
+        'env_velocities': velocities.copy()}
+    if use_phasors: arrays['phasors'] = hlp.phase_to_phasor(memory[:, :, 2])
+    return arrays
+
+def pairwise_sums(memory: np.ndarray, rows: slice, J: float, phasors: np.ndarray=None, skip_unknown: bool=False, memory_budget: int=2**24):
+    '''
+    Computes the sums of the pairwise velocity and phase change summands for a block of swarmalators. The pairs are
+    processed in tiles so that no temporary array exceeds the memory budget and partial sums are accumulated in place.
+
+    Parameters
+    ----------
+    memory : np.ndarray
+        Memories of all swarmalators of shape (n, n, 3).
+    rows : slice or np.ndarray
+        Block or indices of swarmalators to compute the sums for.
+    J : float
+        Phase attraction strength.
+    phasors : np.ndarray, optional
+        Phasors of all memorized phases of shape (n, n, 2). If given, no trigonometric functions are evaluated. default=`None`
+    skip_unknown : bool, optional
+        Whether to skip memory entries that contain only zeros. default=`False`
+    memory_budget : int, optional
+        Maximum number of bytes used for temporary arrays. default=`2**24`
+
+    Returns
+    ----------
+    velocity_sums : np.ndarray
+        Sums of the velocity summands of shape (m, 2).
+    phase_change_sums : np.ndarray
+        Sums of the phase change summands of shape (m, ).
+    counts : np.ndarray
+        Number of summands per swarmalator of shape (m, ).
+    '''
+    n = memory.shape[1]
+    indices = _indices(rows)
+    m = len(indices)
+    velocity_sums = np.zeros((m, 2))
+    phase_change_sums = np.zeros(m)
+    counts = np.zeros(m, dtype=np.int64)
+
+    # about 10 float64 temporaries are created per pair
+    pairs = max(1, memory_budget // 80)
+    tile_cols = min(n, pairs)
+    tile_rows = max(1, pairs // tile_cols)
+
+    for t0 in range(0, m, tile_rows):
+        out = slice(t0, min(t0 + tile_rows, m))
+        own_idx = indices[out]
+        block = slice(own_idx[0], own_idx[-1] + 1) if isinstance(rows, slice) else own_idx # blocks are views, indices copy
+        own = memory[own_idx, own_idx]
+        if phasors is not None: own_pha = phasors[own_idx, own_idx]
+
+        for c0 in range(0, n, tile_cols):
+            c1 = min(c0 + tile_cols, n)
+            tile = memory[block, c0:c1]
+
+            # exclude the swarmalators themselves and unknown entries
+            valid = own_idx[:, None] != np.arange(c0, c1)[None, :]
+            if skip_unknown: valid &= np.any(tile != 0, axis=2)
+
+            # compute all x_j - x_i and 1 / |x_j - x_i|
+            dx = tile[:, :, 0] - own[:, None, 0]
+            dy = tile[:, :, 1] - own[:, None, 1]
+            inv_norms = np.zeros(dx.shape)
+            np.divide(1.0, np.hypot(dx, dy), out=inv_norms, where=valid)
+
+            # compute all cos(theta_j - theta_i) and sin(theta_j - theta_i)
+            if phasors is not None:
+                pha = phasors[block, c0:c1]
+                cos_delta_pha = pha[:, :, 0] * own_pha[:, None, 0] + pha[:, :, 1] * own_pha[:, None, 1]
+                sin_delta_pha = pha[:, :, 1] * own_pha[:, None, 0] - pha[:, :, 0] * own_pha[:, None, 1]
+            else:
+                delta_pha = tile[:, :, 2] - own[:, None, 2]
+                cos_delta_pha = np.cos(delta_pha)
+                sin_delta_pha = np.sin(delta_pha)
+
+            # weights of x_j - x_i in the velocity summands
+            weights = cos_delta_pha
+            weights *= J
+            weights += 1.0
+            weights -= inv_norms
+            weights *= inv_norms
+
+            velocity_sums[out, 0] += np.einsum('ij,ij->i', dx, weights)
+            velocity_sums[out, 1] += np.einsum('ij,ij->i', dy, weights)
+            phase_change_sums[out] += np.einsum('ij,ij->i', sin_delta_pha, inv_norms)
+            counts[out] += np.count_nonzero(valid, axis=1)
+
+    return velocity_sums, phase_change_sums, counts
@@ -1,10 +1,13 @@
 import random as rnd
 import math
 import numpy as np
+from swarmalator_model import helper_functions as hlp
+from swarmalator_model.swarm import sample_senders, incoming_change
 
 
 class Swarmalator:
-    def __init__(self, id: int, num_swarmalators: int, memory_init: str):
+    def __init__(self, id: int, num_swarmalators: int, memory_init: str, use_phasors: bool=False, memory: np.ndarray=None, velocity: np.ndarray=None, ages: np.ndarray=None,
+        communication: str='probabilistic', messages: int=1, sampling: str='uniform', multirate: int=1, quiescence_threshold: float=1e-3, seed: np.random.SeedSequence=None):
         '''
         Instanciates a swarmalator object and initializes their memory.
 
@@ -19,13 +22,54 @@ class Swarmalator:
             `random`: random positions and phases.
             `zeroes`: initialize positions and phases as 0.
             `gradual`: initialize empty memory and learn positions and phases gradually.
+        use_phasors : bool, optional
+            If true, phases in memory are additionally kept as unit phasors (cos, sin), so that pairwise phase differences are computed without trigonometric functions. default=`False`
+        memory : np.ndarray, optional
+            Preallocated memory of shape (num_swarmalators, 3) used instead of initializing it, e.g. a row of a population created in bulk. default=`None`
+        velocity : np.ndarray, optional
+            Initial velocity of shape (2, ). Random if `None`. default=`None`
+        ages : np.ndarray, optional
+            Preallocated array of shape (num_swarmalators, ) in which the number of steps since each memory entry was last updated is tracked, e.g. a row of a population created in bulk. default=`None`
+        communication : {'probabilistic', 'budget'}, optional
+            Communication model, see `Swarm`. default=`probabilistic`
+        messages : int, optional
+            Number of messages the swarmalator receives per step in the `budget` model. default=`1`
+        sampling : {'uniform', 'proximity', 'age'}, optional
+            How senders are chosen in the `budget` model. default=`uniform`
+        multirate : int, optional
+            If greater than 1, the swarmalator only thinks and moves every `multirate` steps while it is quiescent, see `Swarm`. default=`1`
+        quiescence_threshold : float, optional
+            Speed and phase change below which the swarmalator is considered quiescent. default=`1e-3`
+        seed : np.random.SeedSequence, optional
+            Seed of the random number generators of the swarmalator, e.g. spawned from the seed of the simulation. Fresh entropy is used if `None`. default=`None`
         '''
         self.id = id
         self.num_swarmalators = num_swarmalators
-        self.velocity = np.random.rand(2) * 2.0 - 1.0
+        # each swarmalator draws from its own generators, so that seeding does not touch the global random state
+        seed = seed if seed is not None else np.random.SeedSequence()
+        self.rng = np.random.default_rng(seed)
+        self.random = rnd.Random(int(seed.generate_state(1)[0]))
+        self.velocity = velocity if velocity is not None else self.rng.random(2) * 2.0 - 1.0
         self.phase_change = 0
         self.memory_init = memory_init
-        self.__init_memory()
+        self.use_phasors = use_phasors
+        if memory is not None: self.memory = memory
+        else: self.__init_memory()
+        if self.use_phasors: self.phasors = hlp.phase_to_phasor(self.memory[:, 2])
+
+        self.communication = communication
+        self.messages = messages
+        self.sampling = sampling
+        self.ages = ages
+        if self.communication == 'budget' and sampling == 'age' and self.ages is None: self.ages = np.zeros(num_swarmalators)
+
+        self.multirate = multirate
+        self.quiescence_threshold = quiescence_threshold
+        self.period = 1 # number of steps between two updates
+        self.calm = 0 # number of consecutive quiescent updates
+        self.elapsed = 0 # number of steps since the last update
+        self.incoming = 0.0 # largest change of the memory in the last scan
+        self.updates = 0
     
     def __init_memory(self):
         '''
@@ -35,18 +79,18 @@ class Swarmalator:
             # initialize memories with zeros
             self.memory = np.zeros((self.num_swarmalators, 3)) #position-phase-array
             # initialize own position and phase randomly
-            self.memory[self.id][0] = rnd.random() * 2.0 - 1.0
-            self.memory[self.id][1] = rnd.random() * 2.0 - 1.0
-            self.memory[self.id][2] = rnd.uniform(-math.pi, math.pi)
+            self.memory[self.id][0] = self.random.random() * 2.0 - 1.0
+            self.memory[self.id][1] = self.random.random() * 2.0 - 1.0
+            self.memory[self.id][2] = self.random.uniform(-math.pi, math.pi)
             
         elif self.memory_init == 'random':
             # initialize memorywith random values
-            memory_positions = np.random.rand(self.num_swarmalators, 2) * 2.0 - 1.0 #position-array
-            memory_phases = np.random.rand(self.num_swarmalators) * 2.0 * math.pi - math.pi #phase-vector
+            memory_positions = self.rng.random((self.num_swarmalators, 2)) * 2.0 - 1.0 #position-array
+            memory_phases = self.rng.random(self.num_swarmalators) * 2.0 * math.pi - math.pi #phase-vector
             memory_phases = memory_phases.reshape((self.num_swarmalators, 1))
             self.memory = np.concatenate((memory_positions, memory_phases), axis=1)
 
-    def run(self, env_memory: np.ndarray, env_velocities: np.ndarray, delta_t: float, J: float, K: float, coupling_probability: float, alpha: float):
+    def run(self, env_memory: np.ndarray, env_velocities: np.ndarray, delta_t: float, J: float, K: float, coupling_probability: float, alpha: float, profiler=None):
         '''
         Makes the swarmalator sync and swarm.
 
@@ -66,11 +110,65 @@ class Swarmalator:
             Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration.
         alpha : float
             Momentum factor. Must be between 0 and 1.
+        profiler : Profiler, optional
+            Profiler used to measure the time spent in each phase. default=`None`
         '''
+        if profiler is None:
+            self.__scan(env_memory, coupling_probability)
+            if self.multirate > 1:
+                delta_t = self.__schedule(delta_t)
+                if delta_t is None: return
+            self.updates += 1
+            self.__think(J, K, alpha)
+            self.__move(delta_t)
+            self.__yell(env_memory, env_velocities)
+            if self.multirate > 1: self.__settle()
+            return
+
+        profiler.start('scan')
         self.__scan(env_memory, coupling_probability)
+        profiler.stop('scan')
+        if self.multirate > 1:
+            delta_t = self.__schedule(delta_t)
+            if delta_t is None: return
+        self.updates += 1
+        profiler.start('think')
         self.__think(J, K, alpha)
+        profiler.stop('think')
+        profiler.start('move')
         self.__move(delta_t)
+        profiler.stop('move')
+        profiler.start('yell')
         self.__yell(env_memory, env_velocities)
+        profiler.stop('yell')
+        if self.multirate > 1: self.__settle()
+
+    def __schedule(self, delta_t: float):
+        '''
+        Decides whether the swarmalator is updated in this step. A quiescent swarmalator whose memory changed by more
+        than it would move in a period is updated every step again.
+
+        Returns
+        ----------
+        delta_t : float
+            Time step scaled by the number of steps since the last update. `None` if the swarmalator is not due.
+        '''
+        self.elapsed += 1
+        if self.period > 1 and self.incoming > self.quiescence_threshold * delta_t * self.period:
+            self.period = 1
+            self.calm = 0
+        if self.elapsed < self.period: return None
+        delta_t *= self.elapsed
+        self.elapsed = 0
+        return delta_t
+
+    def __settle(self):
+        '''
+        Updates the period of the swarmalator. It becomes quiescent once its forces stayed small for `multirate` updates.
+        '''
+        quiet = np.linalg.norm(self.velocity) < self.quiescence_threshold and abs(self.phase_change) < self.quiescence_threshold
+        self.calm = self.calm + 1 if quiet else 0
+        self.period = self.multirate if self.calm >= self.multirate else 1
 
     def __scan(self, env_memory: np.ndarray, coupling_probability: float):
         '''
@@ -82,12 +180,35 @@ class Swarmalator:
             Environment memory used to synchronize the swarmalator memory.
         coupling_probability : float
             Probability that a swarmalator successfully receives information about another swarmalators position and phase per iteration.
+            Not used in the `budget` model.
         '''
+        if self.communication == 'budget':
+            ages = self.ages[None] if self.ages is not None else None
+            updated = sample_senders(self.memory[None], np.array([self.id]), self.messages, self.sampling, self.rng, ages)[0]
+            if self.multirate > 1: self.incoming = incoming_change(self.memory[updated][None], env_memory[updated][None])[0]
+            self.memory[updated] = env_memory[updated]
+            if self.ages is not None:
+                self.ages += 1.0
+                self.ages[updated] = 0.0
+                self.ages[self.id] = 0.0
+            if self.use_phasors: self.phasors[updated] = hlp.phase_to_phasor(self.memory[updated, 2])
+            return
+
+        updated = []
         for i in range(self.num_swarmalators):
             if i == self.id: continue
-            r = rnd.random()
+            r = self.random.random()
             if r <= coupling_probability:
-                self.memory[i] = env_memory[i]
+                updated.append(i)
+        if self.multirate > 1: self.incoming = incoming_change(self.memory[updated][None], env_memory[updated][None])[0]
+        self.memory[updated] = env_memory[updated]
+        if self.ages is not None:
+            self.ages += 1.0
+            self.ages[updated] = 0.0
+            self.ages[self.id] = 0.0
+
+        # recompute phasors of updated memory entries only
+        if self.use_phasors and updated: self.phasors[updated] = hlp.phase_to_phasor(self.memory[updated, 2])
 
     def __think(self, J: float, K: float, alpha: float):
         '''
@@ -104,28 +225,40 @@ class Swarmalator:
         '''
         temp_mem = self.memory.copy()
         temp_mem = np.delete(temp_mem, self.id, axis=0)
-        if self.memory_init == 'gradual': temp_mem = temp_mem[~np.all(temp_mem == 0, axis=1)]
+        if self.use_phasors: temp_pha = np.delete(self.phasors, self.id, axis=0)
+        if self.memory_init == 'gradual':
+            known = ~np.all(temp_mem == 0, axis=1)
+            temp_mem = temp_mem[known]
+            if self.use_phasors: temp_pha = temp_pha[known]
         n = len(temp_mem)
         if n == 0: return
 
         # compute all x_j - x_i
         delta_pos = temp_mem[:, :2] - self.memory[self.id][:2]
 
-        # compute all theta_j - theta_i
-        delta_pha = temp_mem[:, 2] - self.memory[self.id][2]
-        delta_pha = delta_pha.reshape((n, 1))
-
         # comute all |x_j - x_i|
         norms = np.linalg.norm(delta_pos, axis=1).reshape((n, 1))
 
+        if self.use_phasors:
+            # compute all cos(theta_j - theta_i) and sin(theta_j - theta_i) from phasors
+            c_i, s_i = self.phasors[self.id]
+            cos_delta_pha = (temp_pha[:, 0] * c_i + temp_pha[:, 1] * s_i).reshape((n, 1))
+            sin_delta_pha = (temp_pha[:, 1] * c_i - temp_pha[:, 0] * s_i).reshape((n, 1))
+        else:
+            # compute all theta_j - theta_i
+            delta_pha = temp_mem[:, 2] - self.memory[self.id][2]
+            delta_pha = delta_pha.reshape((n, 1))
+            cos_delta_pha = np.cos(delta_pha)
+            sin_delta_pha = np.sin(delta_pha)
+
         # compute all x_i' summands
-        velocity_vals = delta_pos / norms * ((1.0 + J * np.cos(delta_pha)) - 1.0 / norms)
+        velocity_vals = delta_pos / norms * ((1.0 + J * cos_delta_pha) - 1.0 / norms)
 
         # compute all theta_i' summands
-        phase_change_vals = np.sin(delta_pha) / norms
+        phase_change_vals = sin_delta_pha / norms
 
         self.velocity = np.sum(velocity_vals, axis=0) / n + alpha * self.velocity
-        self.phase_change = np.sum(phase_change_vals, axis=0) * K / n + alpha * self.phase_change
+        self.phase_change = np.sum(phase_change_vals) * K / n + alpha * self.phase_change
 
     def __move(self, delta_t: float):
         '''
@@ -138,10 +271,9 @@ class Swarmalator:
         '''
         self.memory[self.id][:2] = self.memory[self.id][:2] + self.velocity * delta_t # compute and set new position
 
-        p = self.memory[self.id][2] + self.phase_change * delta_t
-        if p > math.pi: p -= 2 * math.pi
-        if p < -math.pi: p += 2 * math.pi
+        p = hlp.wrap_phase(self.memory[self.id][2] + self.phase_change * delta_t)
         self.memory[self.id][2] = p # compute and set new phase
+        if self.use_phasors: self.phasors[self.id] = hlp.phase_to_phasor(self.memory[self.id][2])
     
     def __yell(self, env_memory: np.ndarray, env_velocities: np.ndarray):
         '''
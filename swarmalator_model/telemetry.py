@@ -0,0 +1,308 @@
+import os
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# minimum time in s between two measurements of the step rate of a run
+RATE_INTERVAL = 1.0
+
+# gauges of the Prometheus endpoint of the form { name : help }
+GAUGES = {
+    'active_runs': 'Number of running simulations.',
+    'queued_runs': 'Number of simulations waiting to be run.',
+    'completed_runs': 'Number of finished simulations.',
+    'failed_runs': 'Number of simulations that were lost or failed.',
+    'memory_bytes': 'Resident memory of the process.',
+    'eta_seconds': 'Estimated time until all simulations are finished.'}
+RUN_GAUGES = {
+    'iteration': 'Iterations completed by a simulation.',
+    'simulation_time_seconds': 'Simulated time of a simulation.',
+    'steps_per_second': 'Iterations per second of a simulation.',
+    'eta_seconds': 'Estimated time until a simulation is finished.',
+    'memory_bytes': 'Resident memory of the process running a simulation.'}
+
+
+class Telemetry:
+    def __init__(self):
+        '''
+        Instantiates a Telemetry object that collects the progress of running and queued simulations. The data can
+        be polled in-process with `snapshot` or served over HTTP as JSON and Prometheus metrics with `serve`.
+        Simulation_core, Simulation_run and Coordinator report to it if it is passed to them.
+        '''
+        self.runs = {}
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.durations = []
+        self.lock = threading.Lock()
+        self.server = None
+
+    def enqueue(self, count: int=1):
+        '''
+        Adds simulations to the number of queued simulations.
+
+        Parameters
+        ----------
+        count : int, optional
+            Number of simulations. default=`1`
+        '''
+        with self.lock: self.queued += count
+
+    def start(self, run_id: str, sim_time: float=None, profiler=None):
+        '''
+        Marks a simulation as running.
+
+        Parameters
+        ----------
+        run_id : str
+            Name of the simulation.
+        sim_time : float, optional
+            Simulation time the simulation runs for, used to estimate the remaining time. default=`None`
+        profiler : Profiler, optional
+            Profiler of the simulation whose phase timings are reported. default=`None`
+        '''
+        with self.lock:
+            if self.queued > 0: self.queued -= 1
+            self.__register(run_id, sim_time, profiler)
+
+    def update(self, run_id: str, iteration: int, simulation_time: float, sim_time: float=None, phases: dict=None, memory: int=None):
+        '''
+        Reports the progress of a running simulation. Unknown simulations are registered as running without changing
+        the number of queued simulations.
+
+        Parameters
+        ----------
+        run_id : str
+            Name of the simulation.
+        iteration : int
+            Number of completed iterations.
+        simulation_time : float
+            Simulated time in s.
+        sim_time : float, optional
+            Simulation time the simulation runs for. default=`None`
+        phases : dict, optional
+            Mean time per step of each phase in ms, if the simulation is not profiled by a local profiler. default=`None`
+        memory : int, optional
+            Resident memory in bytes of the process running the simulation, if it runs in another process. default=`None`
+        '''
+        now = time.monotonic()
+        with self.lock:
+            if run_id not in self.runs: self.__register(run_id, sim_time)
+            run = self.runs[run_id]
+            run['iteration'] = iteration
+            run['simulation_time'] = simulation_time
+            if sim_time is not None: run['sim_time'] = sim_time
+            if phases is not None: run['phases'] = phases
+            if memory is not None: run['memory'] = memory
+
+            # the step rate is measured over intervals, so updates every step stay cheap
+            mark_time, mark_iteration = run['mark']
+            if now - mark_time >= RATE_INTERVAL or run['steps_per_s'] is None and iteration > mark_iteration and now > mark_time:
+                run['steps_per_s'] = (iteration - mark_iteration) / (now - mark_time)
+                run['mark'] = (now, iteration)
+
+    def __register(self, run_id: str, sim_time: float=None, profiler=None):
+        now = time.monotonic()
+        self.runs[run_id] = {
+            'iteration': 0, 'simulation_time': 0.0, 'sim_time': sim_time, 'steps_per_s': None, 'eta': None,
+            'memory': None, 'phases': {}, 'started': now, 'mark': (now, 0), 'profiler': profiler}
+
+    def requeue(self, run_id: str):
+        '''
+        Moves a running simulation back to the queue, e.g. after its worker was lost.
+
+        Parameters
+        ----------
+        run_id : str
+            Name of the simulation.
+        '''
+        with self.lock:
+            self.runs.pop(run_id, None)
+            self.queued += 1
+
+    def finish(self, run_id: str, completed: bool=True):
+        '''
+        Marks a simulation as finished.
+
+        Parameters
+        ----------
+        run_id : str
+            Name of the simulation.
+        completed : bool, optional
+            Whether the simulation completed or was lost or failed. default=`True`
+        '''
+        with self.lock:
+            run = self.runs.pop(run_id, None)
+            if not completed:
+                self.failed += 1
+                return
+            self.completed += 1
+            if run is not None: self.durations.append(time.monotonic() - run['started'])
+
+    def snapshot(self):
+        '''
+        Returns the current state of all simulations.
+
+        Returns
+        ----------
+        snapshot : dict
+            Dictionary containing the numbers of active, queued, completed and failed simulations, the memory of this
+            process in bytes, the estimated remaining time in s and the progress of each running simulation.
+        '''
+        with self.lock:
+            runs = {}
+            for run_id, run in self.runs.items():
+                entry = {k: run[k] for k in ['iteration', 'simulation_time', 'sim_time', 'steps_per_s', 'memory']}
+                entry['phases'] = phase_means(run['profiler']) if run['profiler'] is not None else dict(run['phases'])
+                entry['elapsed'] = time.monotonic() - run['started']
+                entry['eta'] = _eta(entry)
+                runs[run_id] = entry
+
+            # queued simulations are assumed to take as long as the finished ones on the free slots
+            etas = [r['eta'] for r in runs.values() if r['eta'] is not None]
+            mean_duration = sum(self.durations) / len(self.durations) if self.durations else None
+            eta = max(etas, default=0.0)
+            if self.queued > 0: eta = eta + self.queued * mean_duration / max(len(runs), 1) if mean_duration is not None else None
+
+            return {
+                'active': len(runs), 'queued': self.queued, 'completed': self.completed, 'failed': self.failed,
+                'memory': memory_usage(), 'eta': eta, 'runs': runs}
+
+    def prometheus(self):
+        '''
+        Returns the current state in the Prometheus text exposition format.
+
+        Returns
+        ----------
+        text : str
+            Metrics prefixed with `swarmalators_`.
+        '''
+        snapshot = self.snapshot()
+        values = {
+            'active_runs': snapshot['active'], 'queued_runs': snapshot['queued'], 'completed_runs': snapshot['completed'],
+            'failed_runs': snapshot['failed'], 'memory_bytes': snapshot['memory'], 'eta_seconds': snapshot['eta']}
+
+        lines = []
+        for name, text in GAUGES.items():
+            if values[name] is None: continue
+            lines += [f'# HELP swarmalators_{name} {text}', f'# TYPE swarmalators_{name} gauge', f'swarmalators_{name} {values[name]}']
+
+        keys = {'iteration': 'iteration', 'simulation_time_seconds': 'simulation_time', 'steps_per_second': 'steps_per_s', 'eta_seconds': 'eta', 'memory_bytes': 'memory'}
+        for name, text in RUN_GAUGES.items():
+            samples = [(run_id, r[keys[name]]) for run_id, r in snapshot['runs'].items() if r[keys[name]] is not None]
+            if not samples: continue
+            lines += [f'# HELP swarmalators_run_{name} {text}', f'# TYPE swarmalators_run_{name} gauge']
+            lines += [f'swarmalators_run_{name}{{run="{_label(run_id)}"}} {value}' for run_id, value in samples]
+
+        phases = [(run_id, phase, mean) for run_id, r in snapshot['runs'].items() for phase, mean in r['phases'].items()]
+        if phases:
+            lines += ['# HELP swarmalators_run_phase_seconds Mean time per step spent in a phase.', '# TYPE swarmalators_run_phase_seconds gauge']
+            lines += [f'swarmalators_run_phase_seconds{{run="{_label(run_id)}",phase="{_label(phase)}"}} {mean / 1000.0}' for run_id, phase, mean in phases]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, host: str='127.0.0.1', port: int=0):
+        '''
+        Serves the metrics over HTTP in a background thread. `/metrics` returns Prometheus metrics, `/` and
+        `/metrics.json` return the snapshot as JSON.
+
+        Parameters
+        ----------
+        host : str, optional
+            Address to listen on. default=`127.0.0.1`
+        port : int, optional
+            Port to listen on. A free port is chosen if `0`. default=`0`
+
+        Returns
+        ----------
+        address : tuple
+            Host and port the endpoint listens on.
+        '''
+        if self.server is not None: return self.server.server_address
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.telemetry = self
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.2}, daemon=True).start()
+        return self.server.server_address
+
+    def close(self):
+        '''
+        Stops the HTTP endpoint.
+        '''
+        if self.server is None: return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+
+
+def memory_usage():
+    '''
+    Returns the resident memory of the current process in bytes. Uses the peak resident memory on systems without
+    `/proc` and `None` if neither is available.
+
+    Returns
+    ----------
+    memory : int
+        Resident memory in bytes.
+    '''
+    try:
+        with open('/proc/self/statm') as fp: return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError): pass
+    try:
+        import resource # not available on Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError): return None
+
+
+def phase_means(profiler):
+    '''
+    Returns the mean time per step of each phase measured by a profiler, which may be running in another thread.
+
+    Parameters
+    ----------
+    profiler : Profiler
+        Profiler of a simulation.
+
+    Returns
+    ----------
+    phases : dict
+        Dictionary of the form { phase : mean time in ms }.
+    '''
+    try: return {name: s['mean'] for name, s in profiler.stats().items()}
+    except RuntimeError: return {} # samples changed while being read
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/metrics':
+            body = self.server.telemetry.prometheus().encode()
+            content_type = 'text/plain; version=0.0.4'
+        elif path in ('/', '/metrics.json'):
+            body = json.dumps(self.server.telemetry.snapshot()).encode()
+            content_type = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _eta(run: dict):
+    '''
+    Estimates the remaining time of a run from its simulated time per iteration and its step rate.
+    '''
+    if run['sim_time'] is None or not run['steps_per_s'] or run['iteration'] == 0: return None
+    remaining = (run['sim_time'] - run['simulation_time']) / (run['simulation_time'] / run['iteration'])
+    return max(remaining, 0.0) / run['steps_per_s']
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
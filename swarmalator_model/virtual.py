@@ -0,0 +1,205 @@
+import hashlib
+import numpy as np
+from swarmalator_model import metrics
+from swarmalator_model.core import Simulation_core, ENGINE_VERSION
+from swarmalator_model.dataset import Dataset, _identifier
+from swarmalator_model.log_policy import Log_policy
+
+
+# arguments of Simulation_core that are stored with a virtual dataset to reproduce it
+OPTIONS = ['num_swarmalators', 'memory_init', 'time_step', 'coupling_probability', 'J', 'K', 'alpha', 'use_phasors', 'memory_budget',
+           'seed', 'communication', 'messages', 'sampling', 'multirate', 'quiescence_threshold', 'num_workers']
+
+
+class Virtual_dataset(Dataset):
+    def __init__(self, options: dict, parameters: dict, sim_time: float, schedule: dict, reduced: dict, checkpoints: list=None):
+        '''
+        Instantiates a Virtual_dataset object, a Dataset that only stores the parameters, seed, engine version, reduced
+        series and optionally a few checkpoints of a run. Positions, phases and velocities are regenerated by
+        deterministic re-simulation when they are first accessed, so the file size does not depend on the length of
+        the run. Virtual datasets are usually created with `Virtual_dataset.simulate`.
+
+        Parameters
+        ----------
+        options : dict
+            Arguments of Simulation_core the run was simulated with, including the seed.
+        parameters : dict
+            Parameters of the run as returned by `Simulation_core.parameters`.
+        sim_time : float
+            Simulation time of the run in s.
+        schedule : dict
+            Sampling schedule as returned by `Log_policy.schedule`.
+        reduced : dict
+            Series of average speed and order parameters per logged iteration of the form { name : np.ndarray }.
+        checkpoints : list, optional
+            Checkpoints as returned by `Simulation_core.checkpoint` that re-simulation can start from. default=`None`
+        '''
+        self.options = options
+        self.parameters = parameters
+        self.sim_time = sim_time
+        self.schedule = schedule
+        self.reduced = reduced
+        self.age = None
+        self.checkpoints = checkpoints if checkpoints is not None else []
+        self.engine_version = ENGINE_VERSION
+        self.identifier = _identifier(self.parameters)
+        self.__trajectory = None
+
+    @classmethod
+    def simulate(cls, max_simulation_time: float, log_policy: Log_policy=None, checkpoint_every: int=None, **kwargs):
+        '''
+        Runs a simulation with the `swarm` engine and keeps only what is needed to regenerate it.
+
+        Parameters
+        ----------
+        max_simulation_time : float
+            Time in s after which the simulation is stopped.
+        log_policy : Log_policy, optional
+            Policy deciding which iterations, fields and swarmalators are regenerated. default=`None`
+        checkpoint_every : int, optional
+            Number of iterations between two stored checkpoints. A checkpoint takes about 24 * n^2 bytes and shortens
+            the re-simulation of late iteration windows. No checkpoints are stored if `None`. default=`None`
+        **kwargs
+            Further arguments of Simulation_core listed in `OPTIONS`. A random seed is used if none is given.
+
+        Returns
+        ----------
+        dataset : Virtual_dataset
+            Virtual dataset of the run.
+        '''
+        unknown = set(kwargs) - set(OPTIONS)
+        if unknown: raise ValueError(f'Unsupported arguments {sorted(unknown)}.')
+        if kwargs.get('seed') is None: kwargs['seed'] = int(np.random.randint(2**31 - 1))
+        log_policy = log_policy if log_policy is not None else Log_policy()
+
+        core = Simulation_core(engine='swarm', **kwargs)
+        iterations = []
+        records = []
+        checkpoints = []
+        while core.simulation_time < max_simulation_time:
+            if checkpoint_every is not None and core.iteration > 1 and (core.iteration - 1) % checkpoint_every == 0:
+                checkpoints.append(core.checkpoint())
+            core.step()
+            if log_policy.should_log(core.iteration - 1):
+                iterations.append(core.iteration - 1)
+                records.append(_reduce_record(log_policy.record(core.memory, core.velocities)))
+        sim_time = round(core.simulation_time, 2)
+        parameters = core.parameters()
+        core.close()
+
+        reduced = {key: np.array([r[key] for r in records]) if records and records[0][key] is not None else None for key in ['avg_speed', 's_plus', 's_minus', 'sync']}
+        return cls(kwargs, parameters, sim_time, log_policy.schedule(iterations), reduced, checkpoints)
+
+    def __getstate__(self):
+        # regenerated trajectories are never saved
+        state = self.__dict__.copy()
+        state['_Virtual_dataset__trajectory'] = None
+        return state
+
+    @property
+    def positions(self):
+        return self.__fields().get('positions')
+
+    @property
+    def phases(self):
+        return self.__fields().get('phases')
+
+    @property
+    def velocities(self):
+        return self.__fields().get('velocities')
+
+    @property
+    def speeds(self):
+        return self.__fields().get('speeds')
+
+    def content_hash(self):
+        '''
+        Returns a hash of the options, schedule and engine version, which determine the regenerated trajectories.
+
+        Returns
+        ----------
+        hash : str
+            Hexadecimal hash.
+        '''
+        if getattr(self, 'hash', None) is not None: return self.hash
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((sorted(self.options.items()), self.sim_time, self.schedule, self.engine_version)).encode())
+        self.hash = h.hexdigest()
+        return self.hash
+
+    def compress(self, *args, **kwargs):
+        '''
+        Does nothing, since virtual datasets do not store trajectories.
+        '''
+
+    def window(self, start: int, stop: int):
+        '''
+        Regenerates a window of logged iterations, starting from the latest checkpoint before it.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first logged iteration.
+        stop : int
+            Index after the last logged iteration.
+
+        Returns
+        ----------
+        dataset : Dataset
+            Dataset containing the logged iterations of the window.
+        '''
+        iterations = self.schedule['iterations'][start:stop]
+        if not iterations: raise ValueError(f'Empty window [{start}, {stop}).')
+        fields = self.__regenerate(iterations[0], iterations[-1])
+        dataset = Dataset([fields, None, self.sim_time, self.parameters], {**self.schedule, 'iterations': iterations})
+        dataset.identifier = f'{self.identifier}[{start}:{stop}]'
+        return dataset
+
+    def __fields(self):
+        '''
+        Returns the regenerated fields of all logged iterations, which are kept until the dataset is saved.
+        '''
+        if self.__trajectory is None:
+            iterations = self.schedule['iterations']
+            self.__trajectory = self.__regenerate(iterations[0], iterations[-1]) if iterations else {}
+
+            # the series of the regenerated run have to match the stored ones
+            avg_speed = self.reduced['avg_speed']
+            if avg_speed is not None and len(avg_speed) > 0:
+                speeds = self.__trajectory['speeds'] if 'speeds' in self.__trajectory else np.linalg.norm(self.__trajectory['velocities'], axis=2)
+                if not np.allclose(metrics.average_speed(speeds), avg_speed, rtol=0.0, atol=1e-9):
+                    self.__trajectory = None
+                    raise RuntimeError(f'Regenerating {self.identifier} did not reproduce the stored run.')
+        return self.__trajectory
+
+    def __regenerate(self, first: int, last: int):
+        '''
+        Re-simulates the run from the latest checkpoint before `first` and logs the iterations from `first` to `last`.
+        '''
+        if self.engine_version != ENGINE_VERSION:
+            raise ValueError(f'{self.identifier} was simulated with engine version {self.engine_version}, but version {ENGINE_VERSION} is installed.')
+
+        log_policy = Log_policy(self.schedule['every'], self.schedule['spacing'], self.schedule['per_decade'], self.schedule['fields'], self.schedule['agents'])
+        core = Simulation_core(engine='swarm', **self.options)
+        earlier = [c for c in self.checkpoints if c['iteration'] <= first]
+        if earlier: core.restore(max(earlier, key=lambda c: c['iteration']))
+
+        fields = {}
+        while core.iteration <= last:
+            core.step()
+            if core.iteration - 1 >= first and log_policy.should_log(core.iteration - 1):
+                for field, values in log_policy.record(core.memory, core.velocities).items(): fields.setdefault(field, []).append(values)
+        core.close()
+        return {field: np.array(values) for field, values in fields.items()}
+
+
+def _reduce_record(record: dict):
+    '''
+    Reduces the fields of one logged iteration to the average speed and order parameters.
+    '''
+    reduced = {'avg_speed': None, 's_plus': None, 's_minus': None, 'sync': None}
+    if 'speeds' in record: reduced['avg_speed'] = float(np.mean(record['speeds']))
+    elif 'velocities' in record: reduced['avg_speed'] = float(np.mean(np.linalg.norm(record['velocities'], axis=1)))
+    if 'positions' in record and 'phases' in record:
+        reduced['s_plus'], reduced['s_minus'], reduced['sync'] = [float(v) for v in metrics.order_parameters(record['positions'], record['phases'])]
+    return reduced
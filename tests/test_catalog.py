@@ -0,0 +1,39 @@
+import pytest
+from swarmalator_model.catalog import Catalog, _to_sql
+from swarmalator_model.core import Simulation_core
+
+
+def test_expression_to_sql():
+    where, args = _to_sql('cp == 0.1 and j >= 1 or not (a in (0, 0.5e0)) and i != "random"')
+    assert where == 'cp = ? AND j >= ? OR NOT ( a IN ( ? , ? ) ) AND i != ?'
+    assert args == [0.1, 1, 0, 0.5, 'random']
+    assert isinstance(args[1], int) and isinstance(args[3], float)
+
+
+@pytest.mark.parametrize('expression', [
+    'cp == 0.1; DROP TABLE runs',
+    'cp == 0.1 or 1=1',
+    'cp == 0.1 -- comment',
+    'n > 0 union select * from sqlite_master',
+    'filename == "x"',
+    'cp == 0.1 /* */'])
+def test_rejects_injection(expression):
+    with pytest.raises(ValueError): _to_sql(expression)
+
+
+def test_query(tmp_path):
+    catalog = Catalog(str(tmp_path))
+    for seed, cp in ((1, 0.1), (2, 0.5), (3, 0.5)):
+        core = Simulation_core(num_swarmalators=5, coupling_probability=cp, seed=seed)
+        core.run(0.5)
+        catalog.add(core.to_dataset(), str(tmp_path / f'{seed}.ssd'))
+
+    assert [h.parameters['seed'] for h in catalog.query('cp == 0.5', order_by='seed')] == [2, 3]
+    assert len(catalog.query('seed in (1, 3) and not cp > 0.2')) == 1
+    assert len(catalog.query()) == 3
+
+    # quoted strings are passed as parameters and never become part of the statement
+    assert catalog.query('identifier == "x\' or \'1\'=\'1"') == []
+    assert catalog.query('identifier == "x; DROP TABLE runs"') == []
+    assert len(catalog.query()) == 3
+    with pytest.raises(ValueError): catalog.query(order_by='seed; DROP TABLE runs')
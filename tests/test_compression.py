@@ -0,0 +1,38 @@
+import math
+import numpy as np
+import pytest
+from swarmalator_model.compression import Compressed_trajectory
+
+
+def walk(seed, shape=(300, 20, 2), scale=0.01):
+    return np.cumsum(np.random.default_rng(seed).normal(0.0, scale, shape), axis=0)
+
+
+@pytest.mark.parametrize('coding', ['delta', 'delta2', 'none'])
+@pytest.mark.parametrize('compressor', ['zlib', 'lzma'])
+def test_round_trip_within_error_bound(coding, compressor):
+    data = walk(0)
+    trajectory = Compressed_trajectory(data, error_bound=1e-4, coding=coding, chunk_size=64, compressor=compressor)
+    assert len(trajectory) == len(data)
+    assert np.abs(np.asarray(trajectory) - data).max() <= 1e-4 + 1e-12
+
+
+def test_slices_and_indices_across_chunks():
+    data = walk(1)
+    trajectory = Compressed_trajectory(data, error_bound=1e-3, chunk_size=64)
+    decoded = np.asarray(trajectory)
+    assert np.array_equal(trajectory[60:130:3], decoded[60:130:3])
+    assert np.array_equal(trajectory[::-1], decoded[::-1])
+    assert np.array_equal(trajectory[-1], decoded[-1])
+    assert trajectory[10:10].shape == (0, 20, 2)
+    with pytest.raises(IndexError): trajectory[len(data)]
+
+
+def test_periodic_phases_wrap():
+    # phases that keep crossing -pi/pi are unwrapped, so the deltas stay small, and are wrapped again on decoding
+    phases = np.mod(np.cumsum(np.full((300, 20), 0.3), axis=0) + walk(2, (300, 20)) + math.pi, 2.0 * math.pi) - math.pi
+    trajectory = Compressed_trajectory(phases, error_bound=1e-4, chunk_size=64, period=2.0 * math.pi)
+    decoded = np.asarray(trajectory)
+    assert decoded.min() >= -math.pi and decoded.max() < math.pi
+    error = np.abs(np.mod(decoded - phases + math.pi, 2.0 * math.pi) - math.pi)
+    assert error.max() <= 1e-4 + 1e-12
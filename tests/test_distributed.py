@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from swarmalator_model.distributed import Coordinator, Sweep_worker
+from swarmalator_model.store import Results_store
+from swarmalator_model.telemetry import Telemetry
+
+
+PRESET = {'n': 6, 'i': 'random', 'dt': 0.1, 'cp': 0.5, 'j': 1.0, 'k': 0.5, 'a': 0.0}
+
+
+def result(job, worker, identifier):
+    # a reduced run as uploaded by a worker
+    reduced = {
+        'identifier': identifier, 'parameters': {**PRESET, 'seed': job['seed']}, 'iterations': [1, 2],
+        'avg_speed': [0.2, 0.1], 's_plus': None, 's_minus': None, 'sync': None,
+        'summary': {'final_speed': 0.1, 'mean_speed': 0.15, 'convergence_time': None, 's_plus': 0.5, 's_minus': 0.1, 'sync': 0.9}}
+    return {'type': 'result', 'job': job['job'], 'worker': worker, 'reduced': reduced}
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = Coordinator([PRESET], 1.0, str(tmp_path / 'store'), lease_timeout=0.2, max_attempts=2, telemetry=Telemetry(), seed=1)
+    yield coordinator
+    coordinator.close()
+
+
+def test_expired_lease_is_queued_again(coordinator):
+    job = coordinator.handle({'type': 'request', 'worker': 'a'})
+    assert job['type'] == 'job'
+    assert coordinator.handle({'type': 'request', 'worker': 'b'})['type'] == 'wait'
+    assert coordinator.handle({'type': 'heartbeat', 'job': job['job'], 'worker': 'a'})['type'] == 'ok'
+
+    time.sleep(0.3)
+    retry = coordinator.handle({'type': 'request', 'worker': 'b'})
+    assert retry['type'] == 'job' and retry['job'] == job['job'] and retry['seed'] == job['seed']
+    assert coordinator.handle({'type': 'heartbeat', 'job': job['job'], 'worker': 'a'})['type'] == 'cancel'
+    assert coordinator.status()['running'][job['job']]['worker'] == 'b'
+
+
+def test_duplicate_results_are_stored_once(coordinator):
+    job = coordinator.handle({'type': 'request', 'worker': 'a'})
+    time.sleep(0.3)
+    coordinator.handle({'type': 'request', 'worker': 'b'})
+
+    # the worker whose lease ran out still finishes first, the result of the second worker is ignored
+    assert coordinator.handle(result(job, 'a', 'run-a'))['type'] == 'ok'
+    assert coordinator.handle(result(job, 'b', 'run-b'))['type'] == 'ok'
+    assert coordinator.store.query(columns=['identifier'])['identifier'].tolist() == ['run-a']
+    assert coordinator.wait(0.0)
+    assert coordinator.handle({'type': 'request', 'worker': 'c'})['type'] == 'done'
+
+    snapshot = coordinator.telemetry.snapshot()
+    assert (snapshot['completed'], snapshot['failed'], snapshot['queued']) == (1, 0, 0)
+
+
+def test_late_result_of_failed_job_is_dropped(coordinator):
+    job = coordinator.handle({'type': 'request', 'worker': 'a'})
+    for _ in range(2):
+        time.sleep(0.3)
+        coordinator.handle({'type': 'request', 'worker': 'b'})
+    assert coordinator.status()['failed'] == 1
+    assert coordinator.wait(0.0)
+
+    assert coordinator.handle(result(job, 'b', 'run-b'))['type'] == 'ok'
+    assert len(coordinator.store) == 0
+    assert coordinator.status()['failed'] == 1
+    snapshot = coordinator.telemetry.snapshot()
+    assert (snapshot['completed'], snapshot['failed']) == (0, 1)
+
+
+def test_unknown_messages(coordinator):
+    assert coordinator.handle({'type': 'heartbeat', 'job': 99, 'worker': 'a'})['type'] == 'error'
+    assert coordinator.handle({'type': 'unknown', 'job': 0, 'worker': 'a'})['type'] == 'error'
+
+
+def test_sweep_over_tcp(tmp_path):
+    coordinator = Coordinator([PRESET, {**PRESET, 'cp': 0.1}], 0.5, str(tmp_path / 'store'), replicas=2, seed=1)
+    host, port = coordinator.start()
+    try:
+        workers = [Sweep_worker(host, port, f'w{w}', retry_timeout=1.0) for w in range(2)]
+        threads = [threading.Thread(target=w.run) for w in workers]
+        for t in threads: t.start()
+        assert coordinator.wait(60.0)
+        for t in threads: t.join(60.0)
+    finally: coordinator.close()
+
+    assert sum(w.completed for w in workers) == 4
+    assert coordinator.status()['done'] == 4
+    assert sorted(coordinator.store.query(columns=['cp'])['cp'].tolist()) == [0.1, 0.1, 0.5, 0.5]
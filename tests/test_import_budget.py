@@ -0,0 +1,19 @@
+import os
+import pytest
+from swarmalator_model import import_budget
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the budget is enforced by `python -m swarmalator_model.import_budget`, the test only catches gross regressions,
+# so that a loaded machine does not make it fail
+MARGIN = 3.0
+
+
+@pytest.mark.parametrize('module', import_budget.HEADLESS_MODULES)
+def test_headless_import(module, monkeypatch):
+    # fresh interpreters import the package from the repository root
+    monkeypatch.chdir(ROOT)
+    import_time, forbidden = import_budget.measure(module, repeats=5)
+    assert forbidden == []
+    assert import_time <= MARGIN * import_budget.BUDGET_MS
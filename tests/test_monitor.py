@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import uuid
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from swarmalator_model.monitor import Monitor_publisher, Monitor_reader
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def name():
+    return f'test_monitor_{uuid.uuid4().hex[:12]}'
+
+
+def state(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.random((n, 3)), rng.random((n, 2))
+
+
+# creates a block as another process would and leaves it behind, prints the pid of that process
+FAKE_BLOCK = """
+import os, sys
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from swarmalator_model.monitor import HEADER_SIZE, _size
+shm = shared_memory.SharedMemory(name=sys.argv[1], create=True, size=_size(4, 2))
+header = np.ndarray((HEADER_SIZE, ), dtype=np.int64, buffer=shm.buf)
+header[:] = [-1, 4, 2, 0, int(sys.argv[2]) or os.getpid(), 1]
+del header
+shm.close()
+resource_tracker.unregister(shm._name, 'shared_memory')
+print(os.getpid())
+"""
+
+
+def fake_block(name, pid=0):
+    # a block published by the given pid, or by the exited process creating it if 0
+    process = subprocess.run([sys.executable, '-c', FAKE_BLOCK, name, str(pid)], cwd=ROOT, capture_output=True, text=True, check=True)
+    return int(process.stdout)
+
+
+def test_publish_and_read(name):
+    publisher = Monitor_publisher(name, 5, slots=3, every=2)
+    reader = Monitor_reader(name)
+    try:
+        assert reader.read() is None
+        for iteration in range(1, 10):
+            memory, velocities = state(5, iteration)
+            publisher.publish(iteration, 0.1 * iteration, memory, velocities)
+
+        latest = reader.read()
+        memory, velocities = state(5, 8)
+        assert latest['iteration'] == 8 and latest['published'] == 4
+        assert latest['simulation_time'] == pytest.approx(0.8)
+        assert np.array_equal(latest['memory'], memory)
+        assert np.array_equal(latest['velocities'], velocities)
+        assert latest['avg_speed'] == pytest.approx(np.mean(np.linalg.norm(velocities, axis=1)))
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_slot_being_written_is_not_read(name):
+    publisher = Monitor_publisher(name, 5, slots=2)
+    reader = Monitor_reader(name)
+    try:
+        publisher.publish(1, 0.1, *state(5, 1))
+        slot = int(publisher.header[0])
+        publisher.sequences[slot] += 1 # a write in progress
+        assert reader.read(retries=5) is None
+        publisher.sequences[slot] += 1
+        assert reader.read()['iteration'] == 1
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_name_collision_in_process(name):
+    publisher = Monitor_publisher(name, 5)
+    try:
+        with pytest.raises(ValueError): Monitor_publisher(name, 5)
+    finally: publisher.close()
+    with pytest.raises(FileNotFoundError): shared_memory.SharedMemory(name=name)
+
+
+def test_block_of_running_publisher_is_kept(name):
+    fake_block(name, os.getpid())
+    try:
+        with pytest.raises(FileExistsError): Monitor_publisher(name, 5)
+        reader = Monitor_reader(name)
+        assert reader.num_swarmalators == 4 # the block was not replaced
+        reader.close()
+    finally:
+        block = shared_memory.SharedMemory(name=name)
+        block.close()
+        block.unlink()
+
+
+def test_stale_block_is_replaced(name):
+    fake_block(name)
+    publisher = Monitor_publisher(name, 5)
+    reader = Monitor_reader(name)
+    try:
+        assert reader.num_swarmalators == 5
+        publisher.publish(0, 0.0, *state(5, 0))
+        assert reader.read()['iteration'] == 0
+    finally:
+        reader.close()
+        publisher.close()
+    with pytest.raises(FileNotFoundError): shared_memory.SharedMemory(name=name)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from swarmalator_model.core import Simulation_core, multirate_error
+
+
+def trajectory(steps=30, **kwargs):
+    core = Simulation_core(num_swarmalators=12, seed=3, **kwargs)
+    states = []
+    for _ in range(steps):
+        core.step()
+        states.append(np.concatenate([core.memory, core.velocities], axis=1))
+    updates = core.updates()
+    core.close()
+    return np.array(states), updates
+
+
+@pytest.mark.parametrize('engine', ['swarm', 'agents'])
+@pytest.mark.parametrize('communication', ['probabilistic', 'budget'])
+def test_multirate_one_equals_plain_engine(engine, communication):
+    plain, plain_updates = trajectory(engine=engine, communication=communication)
+    multi, multi_updates = trajectory(engine=engine, communication=communication, multirate=1)
+    assert np.array_equal(plain, multi)
+    assert plain_updates == multi_updates == 12 * 30
+
+
+@pytest.mark.parametrize('engine', ['swarm', 'agents'])
+def test_multirate_without_quiescence_equals_plain_engine(engine):
+    # with a threshold of 0 no swarmalator becomes quiescent, so every swarmalator is updated every step
+    plain, _ = trajectory(engine=engine)
+    multi, multi_updates = trajectory(engine=engine, multirate=4, quiescence_threshold=0.0)
+    assert np.array_equal(plain, multi)
+    assert multi_updates == 12 * 30
+
+
+def test_multirate_error_report():
+    report = multirate_error(3.0, multirate=4, quiescence_threshold=0.0, num_swarmalators=12, seed=3)
+    assert report['max_position_error'] == report['max_phase_error'] == 0.0
+    assert report['saved_updates'] == 0.0
+
+    report = multirate_error(3.0, multirate=4, quiescence_threshold=10.0, num_swarmalators=12, seed=3)
+    assert 0.0 < report['saved_updates'] < 1.0
+    assert len(report['position_error']) == len(report['iterations'])
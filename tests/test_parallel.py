@@ -0,0 +1,49 @@
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+import numpy as np
+import pytest
+from swarmalator_model.parallel import Parallel_swarm
+from swarmalator_model.swarm import Swarm
+
+
+# delta_t, J, K, coupling_probability, alpha
+STEP = (0.1, 1.0, 0.5, 0.5, 0.3)
+
+
+def run(num_workers, seed, steps=5, coupling_probability=STEP[3]):
+    swarm = Parallel_swarm(30, 'random', num_workers, seed=seed, timeout=30.0)
+    try:
+        for _ in range(steps): swarm.step(*STEP[:3], coupling_probability, STEP[4])
+        return swarm.env_memory.copy(), swarm.env_velocities.copy()
+    finally: swarm.close()
+
+
+def test_seeded_runs_repeat_for_fixed_worker_count():
+    memory, velocities = run(2, seed=5)
+    repeated_memory, repeated_velocities = run(2, seed=5)
+    assert np.array_equal(memory, repeated_memory)
+    assert np.array_equal(velocities, repeated_velocities)
+
+
+def test_matches_single_process_without_random_scan():
+    # with a coupling probability of 1 no random numbers are drawn while stepping, so the blocks must add up to the single-process swarm
+    memory, velocities = run(3, seed=5, coupling_probability=1.0)
+    swarm = Swarm(30, 'random', seed=5)
+    for _ in range(5): swarm.step(*STEP[:3], 1.0, STEP[4])
+    assert np.allclose(memory, swarm.env_memory)
+    assert np.allclose(velocities, swarm.env_velocities)
+
+
+def test_dead_worker_breaks_step():
+    swarm = Parallel_swarm(30, 'random', 2, seed=5, timeout=30.0)
+    names = [shm.name for shm in swarm.shms.values()]
+    try:
+        swarm.step(*STEP)
+        swarm.workers[0].kill()
+        swarm.workers[0].join()
+        with pytest.raises(BrokenBarrierError): swarm.step(*STEP)
+    finally: swarm.close()
+
+    assert swarm.workers == []
+    for name in names:
+        with pytest.raises(FileNotFoundError): shared_memory.SharedMemory(name=name)
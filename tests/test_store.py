@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import pytest
+from swarmalator_model.store import Results_store
+
+
+def reduced(identifier, cp, a, j=1.0, length=4):
+    # a run as returned by metrics.reduce_dataset
+    iterations = np.arange(1, length + 1)
+    return {
+        'identifier': identifier,
+        'parameters': {'n': 10, 'i': 'random', 'dt': 0.1, 'cp': cp, 'j': j, 'k': 0.5, 'a': a, 'seed': 1},
+        'summary': {'final_speed': 0.1 * cp, 'mean_speed': 0.2, 'convergence_time': None, 's_plus': 0.5, 's_minus': 0.1, 'sync': 0.9},
+        'iterations': iterations, 'avg_speed': iterations * cp, 's_plus': None, 's_minus': None, 'sync': iterations * a}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Results_store(str(tmp_path / 'store'))
+    store.append([reduced('r1', 0.1, 0.0), reduced('r2', 0.1, 0.5, j=2.0, length=6), reduced('r3', 0.5, 0.0)])
+    store.append([reduced('r4', 0.5, 0.0, j=3.0), reduced('r5', 0.5, 0.5)])
+    return store
+
+
+def test_append_and_dedupe(store):
+    assert len(store) == 5
+    assert store.append([reduced('r1', 0.1, 0.0), reduced('r6', 0.1, 0.0), reduced('r6', 0.1, 0.0)]) == 1
+    assert len(store) == 6
+    assert sorted(store.query(columns=['identifier'])['identifier'].tolist()) == ['r1', 'r2', 'r3', 'r4', 'r5', 'r6']
+
+
+def test_query(store):
+    result = store.query('cp == 0.1 and a in (0.5)', columns=['identifier', 'j', 'convergence_time', 'sync', 'avg_speed', 's_plus_series', 'sync_series'])
+    assert result['identifier'].tolist() == ['r2']
+    assert result['j'].tolist() == [2.0]
+    assert np.isnan(result['convergence_time'][0])
+    assert np.allclose(result['avg_speed'][0], np.arange(1, 7) * 0.1)
+    assert np.all(np.isnan(result['s_plus_series'][0])) and len(result['s_plus_series'][0]) == 6
+    assert np.allclose(result['sync_series'][0], np.arange(1, 7) * 0.5)
+    assert result['sync'].tolist() == [0.9]
+
+    assert sorted(store.query('not cp == 0.1 and i == "random"', columns=['identifier'])['identifier'].tolist()) == ['r3', 'r4', 'r5']
+    assert store.query('i == 1', columns=['identifier'])['identifier'].tolist() == []
+    with pytest.raises(ValueError): store.query(columns=['filename'])
+
+
+def test_partition_pruning(store, monkeypatch):
+    read = []
+    load = np.load
+    def record(filename, *args, **kwargs):
+        read.append(os.path.relpath(filename, store.directory))
+        return load(filename, *args, **kwargs)
+    monkeypatch.setattr(np, 'load', record)
+
+    # only the partition of the requested parameters is read
+    assert store.query('cp == 0.5 and a == 0.5', columns=['identifier'])['identifier'].tolist() == ['r5']
+    assert read and all(r.startswith(os.path.join('cp=0.5', 'a=0.5')) for r in read)
+
+    # parts are skipped by the ranges of their columns, only the part containing j=3 is read
+    read.clear()
+    assert store.query('j > 2.5', columns=['identifier'])['identifier'].tolist() == ['r4']
+    assert len({os.path.dirname(r) for r in read}) == 1
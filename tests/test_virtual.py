@@ -0,0 +1,45 @@
+import pickle
+import numpy as np
+import pytest
+from swarmalator_model.core import Simulation_core
+from swarmalator_model.virtual import Virtual_dataset
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return Virtual_dataset.simulate(3.0, checkpoint_every=7, num_swarmalators=10, seed=11)
+
+
+def test_regenerates_the_original_run(dataset):
+    core = Simulation_core(num_swarmalators=10, seed=11, engine='swarm')
+    positions = []
+    while core.simulation_time < 3.0:
+        core.step()
+        positions.append(core.memory[:, :2].copy())
+    assert np.array_equal(dataset.positions, np.array(positions))
+    assert len(dataset.get_iterations()) == len(positions)
+
+
+@pytest.mark.parametrize('start, stop', [(0, 5), (3, 9), (14, 15), (20, 31)])
+def test_window_matches_full_trajectory(dataset, start, stop):
+    window = dataset.window(start, stop)
+    assert np.array_equal(window.get_iterations(), dataset.get_iterations()[start:stop])
+    assert np.array_equal(window.positions, dataset.positions[start:stop])
+    assert np.array_equal(window.phases, dataset.phases[start:stop])
+    assert np.array_equal(window.velocities, dataset.velocities[start:stop])
+
+
+def test_window_without_checkpoints():
+    dataset = Virtual_dataset.simulate(1.5, num_swarmalators=6, seed=2)
+    assert np.array_equal(dataset.window(8, 12).phases, dataset.phases[8:12])
+    with pytest.raises(ValueError): dataset.window(12, 12)
+
+
+def test_saved_without_trajectory(dataset):
+    dataset.positions
+    restored = pickle.loads(pickle.dumps(dataset))
+    assert restored._Virtual_dataset__trajectory is None
+    assert restored.content_hash() == dataset.content_hash()
+
+    restored.engine_version -= 1
+    with pytest.raises(ValueError): restored.positions